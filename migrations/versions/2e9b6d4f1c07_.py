@@ -0,0 +1,40 @@
+"""daily analytics rollups
+
+Revision ID: 2e9b6d4f1c07
+Revises: 7a4f0c2e8d51
+Create Date: 2026-10-18 08:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e9b6d4f1c07'
+down_revision = '7a4f0c2e8d51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Una fila por día: si ya hubiera duplicados, flask rollup-analytics
+    # los vuelve a calcular después
+    op.execute('DELETE FROM analytics WHERE id NOT IN '
+               '(SELECT MAX(id) FROM analytics GROUP BY date)')
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pending_quotes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_unique_constraint('uq_analytics_date', ['date'])
+
+
+def downgrade():
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_analytics_date', type_='unique')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('pending_quotes')
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
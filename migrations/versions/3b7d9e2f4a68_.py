@@ -0,0 +1,66 @@
+"""product_attribute facet table
+
+Revision ID: 3b7d9e2f4a68
+Revises: 8f1a3c5e7b92
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from api.facets import extract_attributes
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7d9e2f4a68'
+down_revision = '8f1a3c5e7b92'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+product = sa.table('product', sa.column('id', sa.Integer),
+                   sa.column('specifications', sa.JSON), sa.column('features', sa.JSON))
+product_attribute = sa.table('product_attribute', sa.column('product_id', sa.Integer),
+                             sa.column('source', sa.String), sa.column('key', sa.String),
+                             sa.column('value_text', sa.String), sa.column('value_num', sa.Float))
+
+
+def backfill_attributes():
+    # Con la tabla vacía los filtros por faceta (EXISTS) excluirían todo el
+    # catálogo: se copia aquí por lotes de ids, como sync_product_ids
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.select(product.c.id, product.c.specifications,
+                                      product.c.features)
+                            .where(product.c.id > last_id)
+                            .order_by(product.c.id).limit(BACKFILL_BATCH)).all()
+        if not rows:
+            break
+        attributes = [a for row in rows for a in extract_attributes(*row)]
+        if attributes:
+            bind.execute(product_attribute.insert(), attributes)
+        last_id = rows[-1].id
+
+
+def upgrade():
+    op.create_table('product_attribute',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=10), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('value_text', sa.String(length=200), nullable=True),
+    sa.Column('value_num', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_attribute', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_attribute_product_id'), ['product_id'], unique=False)
+        batch_op.create_index('ix_product_attribute_num', ['source', 'key', 'value_num'], unique=False)
+        batch_op.create_index('ix_product_attribute_text', ['source', 'key', 'value_text'], unique=False)
+    backfill_attributes()
+
+
+def downgrade():
+    op.drop_table('product_attribute')
@@ -0,0 +1,28 @@
+"""order stock reservations
+
+Revision ID: 4f2b8d1c6e90
+Revises: 9c1e4a7b2d63
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2b8d1c6e90'
+down_revision = '9c1e4a7b2d63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reserved_until', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_order_status_reserved_until', ['status', 'reserved_until'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_status_reserved_until')
+        batch_op.drop_column('reserved_until')
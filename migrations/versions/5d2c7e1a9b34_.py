@@ -0,0 +1,142 @@
+"""catalog, quote and order tables; product.updated_at
+
+Revision ID: 5d2c7e1a9b34
+Revises: 0763d677d453
+Create Date: 2026-10-18 08:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2c7e1a9b34'
+down_revision = '0763d677d453'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La migración inicial solo creaba user: se completa el esquema de los
+    # modelos y se añade product.updated_at (validadores ETag/Last-Modified)
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(),
+                              type_=sa.String(length=200), existing_nullable=False)
+        batch_op.alter_column('is_active', existing_type=sa.Boolean(), nullable=True)
+        batch_op.add_column(sa.Column('first_name', sa.String(length=50),
+                                      nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('last_name', sa.String(length=50),
+                                      nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('phone', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('company_name', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('role', sa.String(length=20), nullable=True,
+                                      server_default='customer'))
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    op.create_table('product',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('product_type', sa.String(length=50), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.Column('image_url', sa.String(length=200), nullable=True),
+    sa.Column('is_eco_friendly', sa.Boolean(), nullable=True),
+    sa.Column('features', sa.JSON(), nullable=True),
+    sa.Column('specifications', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('quote',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('customization', sa.JSON(), nullable=True),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('quote_item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quote_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('feature_name', sa.String(length=100), nullable=True),
+    sa.Column('selected_option', sa.String(length=100), nullable=True),
+    sa.Column('additional_cost', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['quote_id'], ['quote.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('order',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('stripe_payment_intent_id', sa.String(length=100), nullable=True),
+    sa.Column('shipping_address', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('order_item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('customization', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('address',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('street', sa.String(length=200), nullable=False),
+    sa.Column('city', sa.String(length=100), nullable=False),
+    sa.Column('state', sa.String(length=100), nullable=False),
+    sa.Column('zip_code', sa.String(length=20), nullable=False),
+    sa.Column('country', sa.String(length=100), nullable=False),
+    sa.Column('is_default', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('total_sales', sa.Float(), nullable=True),
+    sa.Column('total_orders', sa.Integer(), nullable=True),
+    sa.Column('total_quotes', sa.Integer(), nullable=True),
+    sa.Column('popular_products', sa.JSON(), nullable=True),
+    sa.Column('customer_segments', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('analytics')
+    op.drop_table('address')
+    op.drop_table('order_item')
+    op.drop_table('order')
+    op.drop_table('quote_item')
+    op.drop_table('quote')
+    op.drop_table('product')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('role')
+        batch_op.drop_column('company_name')
+        batch_op.drop_column('phone')
+        batch_op.drop_column('last_name')
+        batch_op.drop_column('first_name')
+        batch_op.alter_column('is_active', existing_type=sa.Boolean(), nullable=False)
+        batch_op.alter_column('password', existing_type=sa.String(length=200),
+                              type_=sa.String(), existing_nullable=False)
@@ -0,0 +1,29 @@
+"""shared cache version table
+
+Revision ID: 6d8a2f4c1e35
+Revises: b7e3a95d0c14
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d8a2f4c1e35'
+down_revision = 'b7e3a95d0c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_version, [{'name': 'catalog', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('cache_version')
@@ -0,0 +1,28 @@
+"""quote inbox indexes
+
+Revision ID: 7a4f0c2e8d51
+Revises: 5d2c7e1a9b34
+Create Date: 2026-10-18 08:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4f0c2e8d51'
+down_revision = '5d2c7e1a9b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.create_index('ix_quote_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index('ix_quote_product_id', ['product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.drop_index('ix_quote_product_id')
+        batch_op.drop_index('ix_quote_status_created_at')
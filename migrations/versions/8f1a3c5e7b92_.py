@@ -0,0 +1,29 @@
+"""analytics.orders_by_category
+
+Existing rows keep NULL; fill them with
+`flask rollup-analytics --backfill-categories` after upgrading.
+
+Revision ID: 8f1a3c5e7b92
+Revises: 2e9b6d4f1c07
+Create Date: 2026-10-18 08:55:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f1a3c5e7b92'
+down_revision = '2e9b6d4f1c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('orders_by_category', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.drop_column('orders_by_category')
@@ -0,0 +1,134 @@
+"""hot-path indexes and full-text search index
+
+Revision ID: 9c1e4a7b2d63
+Revises: 3b7d9e2f4a68
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e4a7b2d63'
+down_revision = '3b7d9e2f4a68'
+branch_labels = None
+depends_on = None
+
+
+# Índices parciales: solo productos activos (mismo predicado que las rutas)
+ACTIVE_PRODUCTS = dict(postgresql_where=sa.text('is_active'),
+                       sqlite_where=sa.text('is_active = 1'))
+
+SQLITE_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, features, tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, features)
+        VALUES (new.id, new.name, new.description, coalesce(new.features, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au
+    AFTER UPDATE OF name, description, features ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+        INSERT INTO product_fts(rowid, name, description, features)
+        VALUES (new.id, new.name, new.description, coalesce(new.features, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+    END""",
+)
+# Los triggers solo cubren lo que cambie a partir de ahora: se indexa el
+# catálogo que ya existe (mismo INSERT que SQLITE_REBUILD en api/search.py)
+SQLITE_SEARCH_BACKFILL = (
+    "DELETE FROM product_fts",
+    """INSERT INTO product_fts(rowid, name, description, features)
+    SELECT id, name, description, coalesce(features, '') FROM product""",
+)
+POSTGRES_SEARCH_DDL = (
+    """ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(features::text, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_product_search_vector ON product USING GIN (search_vector)",
+)
+
+
+def upgrade():
+    # created_at pasa a NOT NULL: es la clave del listado paginado
+    op.execute('UPDATE product SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_product_active_created', ['created_at', 'id'],
+                              unique=False, **ACTIVE_PRODUCTS)
+        batch_op.create_index('ix_product_active_category', ['category', 'created_at', 'id'],
+                              unique=False, **ACTIVE_PRODUCTS)
+        batch_op.create_index('ix_product_active_type', ['product_type', 'created_at', 'id'],
+                              unique=False, **ACTIVE_PRODUCTS)
+
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.create_index('ix_quote_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_quote_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_quote_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('quote_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_quote_item_quote_id'), ['quote_id'], unique=False)
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_item_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_item_product_id'), ['product_id'], unique=False)
+
+    with op.batch_alter_table('address', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_address_user_id'), ['user_id'], unique=False)
+
+    # Índice de búsqueda de texto completo (ver api/search.py)
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL + SQLITE_SEARCH_BACKFILL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in ('product_fts_ai', 'product_fts_au', 'product_fts_ad'):
+            op.execute('DROP TRIGGER IF EXISTS ' + name)
+        op.execute('DROP TABLE IF EXISTS product_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_product_search_vector')
+        op.execute('ALTER TABLE product DROP COLUMN IF EXISTS search_vector')
+
+    with op.batch_alter_table('address', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_address_user_id'))
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_item_product_id'))
+        batch_op.drop_index(batch_op.f('ix_order_item_order_id'))
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_order_created_at'))
+        batch_op.drop_index(batch_op.f('ix_order_user_id'))
+
+    with op.batch_alter_table('quote_item', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_quote_item_quote_id'))
+
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.drop_index('ix_quote_updated_at')
+        batch_op.drop_index('ix_quote_created_at')
+        batch_op.drop_index('ix_quote_user_id_created_at')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_active_type')
+        batch_op.drop_index('ix_product_active_category')
+        batch_op.drop_index('ix_product_active_created')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
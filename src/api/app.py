@@ -1,8 +1,20 @@
 from .routes import setup_routes
 from .models import db
+from .dbpool import engine_options, pool_metrics
+from .replicas import replica_router, STICKY_HEADER
+from .instrumentation import request_metrics
+from .jsonprovider import init_json_provider
+from .compression import response_compressor
+from .cache import catalog_cache
+from .passwords import password_hasher
+from .ratelimit import login_limiter
+from .identity import user_cache
+from .commands import setup_commands
+from . import tasks  # registra las tareas de la cola de trabajos
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask import Flask, request, jsonify
 import os
 import sys
@@ -10,20 +22,114 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 app = Flask(__name__)
+# Sesión de /api/login y /api/user/*
+app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
 app.config['JWT_SECRET_KEY'] = os.environ.get(
     'JWT_SECRET_KEY', 'your-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
     'DATABASE_URL', 'sqlite:///luxury_store.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool de conexiones por worker: workers * (size + overflow) < max_connections
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(
+    os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+app.config['WEB_CONCURRENCY'] = int(os.environ.get('WEB_CONCURRENCY', 0)) or None
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+# Réplicas de lectura separadas por comas; vacío = todo contra el primario
+app.config['DATABASE_REPLICA_URLS'] = os.environ.get('DATABASE_REPLICA_URLS', '')
+app.config['DATABASE_REPLICA_STICKY_SECONDS'] = int(
+    os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 5))
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(
+    os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+app.config['LOGIN_RATE_PER_IP'] = int(os.environ.get('LOGIN_RATE_PER_IP', 20))
+app.config['LOGIN_RATE_PER_EMAIL'] = int(
+    os.environ.get('LOGIN_RATE_PER_EMAIL', 5))
+# Proxies delante de la app (el router de Render es uno). Con 0 se usa la
+# IP de la conexión; no subirlo por encima de los proxies reales o el
+# cliente podrá elegir su IP con X-Forwarded-For y saltarse el límite
+app.config['TRUSTED_PROXY_COUNT'] = int(
+    os.environ.get('TRUSTED_PROXY_COUNT', 0))
+app.config['CATALOG_CACHE_ENABLED'] = os.environ.get(
+    'CATALOG_CACHE_ENABLED', '1') == '1'
+app.config['CATALOG_CACHE_SIZE'] = int(
+    os.environ.get('CATALOG_CACHE_SIZE', 1024))
+app.config['CATALOG_CACHE_TTL'] = int(
+    os.environ.get('CATALOG_CACHE_TTL', 300))
+# Cada cuánto relee cada worker la versión compartida del catálogo
+app.config['CATALOG_VERSION_TTL'] = float(
+    os.environ.get('CATALOG_VERSION_TTL', 1))
+# Rango máximo (en días) de /analytics/timeseries
+app.config['ANALYTICS_MAX_RANGE_DAYS'] = int(
+    os.environ.get('ANALYTICS_MAX_RANGE_DAYS', 366))
+app.config['ORDER_RESERVATION_MINUTES'] = int(
+    os.environ.get('ORDER_RESERVATION_MINUTES', 15))
+# Tareas en segundo plano (flask jobs-worker): emails y pagos
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'
+app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+app.config['MAIL_SENDER'] = os.environ.get(
+    'MAIL_SENDER', 'no-reply@ecoluxury.example.com')
+app.config['STRIPE_SECRET_KEY'] = os.environ.get('STRIPE_SECRET_KEY')
+app.config['STRIPE_CURRENCY'] = os.environ.get('STRIPE_CURRENCY', 'eur')
+# JSON: auto (orjson si está instalado), orjson o stdlib
+app.config['JSON_BACKEND'] = os.environ.get('JSON_BACKEND', 'auto')
+app.config['JSON_SORT_KEYS'] = os.environ.get('JSON_SORT_KEYS', '1') == '1'
+# Compresión gzip/brotli de las respuestas (si no la hace ya un proxy)
+app.config['COMPRESSION_ENABLED'] = os.environ.get(
+    'COMPRESSION_ENABLED', '1') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(
+    os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+app.config['COMPRESSION_CACHE_SIZE'] = int(
+    os.environ.get('COMPRESSION_CACHE_SIZE', 256))
+# Rol, estado y token_version en memoria (ver identity.py): lo que tarda
+# una baja o un cambio de rol en llegar a los demás workers
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 5))
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 10000))
+# Métricas por petición (/metrics, Server-Timing, log de consultas lentas)
+app.config['INSTRUMENTATION_ENABLED'] = os.environ.get(
+    'INSTRUMENTATION_ENABLED', '1') == '1'
+app.config['SERVER_TIMING_ENABLED'] = os.environ.get(
+    'SERVER_TIMING_ENABLED', '0') == '1'
+app.config['SLOW_QUERY_MS'] = int(os.environ.get('SLOW_QUERY_MS', 200))
+# Sin token /metrics responde 404
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+if app.config['TRUSTED_PROXY_COUNT']:
+    proxies = app.config['TRUSTED_PROXY_COUNT']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
 
 # Inicializar extensiones
+init_json_provider(app)
 db.init_app(app)
+pool_metrics.init_app(app)
+replica_router.init_app(app)
 migrate = Migrate(app, db)
 jwt = JWTManager(app)
-CORS(app)
+# La ventana de lectura del primario también viaja en una cabecera (ver replicas.py)
+CORS(app, expose_headers=[STICKY_HEADER])
+catalog_cache.init_app(app)
+password_hasher.init_app(app)
+login_limiter.init_app(app)
+user_cache.init_app(app)
+request_metrics.init_app(app)
+# Después de request_metrics: su tiempo total incluye la compresión
+response_compressor.init_app(app)
 
 # Configurar rutas
 setup_routes(app)
+setup_commands(app)
 
 
 @app.route('/')
@@ -0,0 +1,457 @@
+import http.client
+import json
+import math
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+from .models import db, User, Product, Quote, Order, OrderItem
+from .passwords import password_hasher
+from .cache import catalog_cache, LRUCache
+from .compression import response_compressor
+from .checkout import RESERVED
+from .identity import create_user_token
+from .serializers import serializers
+from .jsonprovider import OrjsonProvider, orjson
+from flask.json.provider import DefaultJSONProvider
+
+# (nombre, método, ruta, usuario, cuerpo). {product_id}, {category},
+# {term} y {last_day} se rellenan en cada petición con valores del dataset
+SCENARIOS = (
+    ('products.list', 'GET', '/products?limit=50', None, None),
+    ('products.category', 'GET', '/products?category={category}&limit=50', None, None),
+    ('products.facets', 'GET', '/products?spec.seats[gte]=5&facets=spec.seats,feature.color',
+     None, None),
+    ('products.detail', 'GET', '/products/{product_id}', None, None),
+    ('products.search', 'GET', '/products/search?q={term}', None, None),
+    ('quotes.price', 'POST', '/quotes/price', None,
+     {'configurations': [{'product_id': '{product_id}', 'customization': {}}]}),
+    ('quotes.list', 'GET', '/quotes', 'customer', None),
+    ('business.quotes', 'GET', '/business/quotes?status=pending&per_page=50', 'business', None),
+    ('analytics.overview', 'GET', '/analytics/overview', 'business', None),
+    ('analytics.timeseries', 'GET',
+     '/analytics/timeseries?metric=sales&bucket=week&to={last_day}', 'business', None),
+)
+SEARCH_TERMS = ('eco', 'suv', 'villa', 'solar', 'leather', 'cabin', 'jet')
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'status': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'max_ms': _round(latencies[-1] if latencies else None)
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class _InProcessClient:
+    """Llama a las rutas reales a través del WSGI de Flask, sin red."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers, data=body)
+        response.get_data()
+        return response.status_code
+
+
+class _HTTPClient:
+    """Conexión keep-alive contra un servidor en marcha (p. ej. gunicorn)."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        connection = (http.client.HTTPSConnection if parts.scheme == 'https'
+                      else http.client.HTTPConnection)
+        self.prefix = parts.path.rstrip('/')
+        self.connection = connection(parts.netloc, timeout=60)
+
+    def request(self, method, path, headers, body):
+        self.connection.request(method, self.prefix + path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response.status
+
+
+def _fill(value, params):
+    if isinstance(value, str):
+        filled = value.format(**params)
+        return int(filled) if value == '{product_id}' else filled
+    if isinstance(value, dict):
+        return {k: _fill(v, params) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, params) for v in value]
+    return value
+
+
+def load_fixtures(app, seed=42):
+    """Ids, categorías y tokens reales del dataset para parametrizar las rutas."""
+    with app.app_context():
+        rng = random.Random(seed)
+        product_ids = [product_id for (product_id,) in db.session.query(Product.id).filter(
+            Product.is_active == db.true()).order_by(Product.id).limit(1000)]
+        categories = [c for (c,) in db.session.query(Product.category).distinct()]
+        business = User.query.filter_by(role='business').order_by(User.id).first()
+        # Un cliente con cotizaciones, para que GET /quotes no devuelva vacío
+        customer_id = db.session.query(Quote.user_id).order_by(Quote.id).limit(1).scalar()
+        if customer_id is None:
+            customer = User.query.filter_by(role='customer').order_by(User.id).first()
+            customer_id = customer.id if customer else None
+        tokens = {}
+        if business:
+            tokens['business'] = create_user_token(business)
+        if customer_id:
+            tokens['customer'] = create_user_token(db.session.get(User, customer_id))
+        dataset = {
+            'users': db.session.query(db.func.count(User.id)).scalar(),
+            'products': db.session.query(db.func.count(Product.id)).scalar(),
+            'quotes': db.session.query(db.func.count(Quote.id)).scalar(),
+            'orders': db.session.query(db.func.count(Order.id)).scalar()
+        }
+        # El dataset generado termina en SEED_EPOCH, no hoy
+        last_quote = db.session.query(db.func.max(Quote.created_at)).scalar()
+        last_day = (last_quote or datetime.utcnow()).date().isoformat()
+        rng.shuffle(product_ids)
+        return {'product_ids': product_ids, 'categories': categories or ['all'],
+                'last_day': last_day,
+                'tokens': tokens, 'dataset': dataset,
+                'dialect': db.engine.dialect.name}
+
+
+def run_scenario(make_client, scenario, fixtures, requests, concurrency, warmup, seed):
+    name, method, path, role, body = scenario
+    headers = {'Accept': 'application/json'}
+    if role:
+        headers['Authorization'] = 'Bearer ' + fixtures['tokens'][role]
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+
+    latencies = []
+    statuses = {}
+    measured_from = []
+    lock = threading.Lock()
+    counter = iter(range(warmup + requests))
+
+    def worker(worker_id):
+        rng = random.Random('{}-{}-{}'.format(seed, name, worker_id))
+        client = make_client()
+        local_latencies = []
+        local_statuses = {}
+        first_measured = None
+        for n in counter:
+            params = {'product_id': rng.choice(fixtures['product_ids'] or [1]),
+                      'category': rng.choice(fixtures['categories']),
+                      'term': rng.choice(SEARCH_TERMS),
+                      'last_day': fixtures['last_day']}
+            data = json.dumps(_fill(body, params)) if body is not None else None
+            started = time.perf_counter()
+            status = client.request(method, path.format(**params), headers, data)
+            elapsed = (time.perf_counter() - started) * 1000
+            if n >= warmup:
+                if first_measured is None:
+                    first_measured = started
+                local_latencies.append(elapsed)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            if first_measured is not None:
+                measured_from.append(first_measured)
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    # El throughput se mide desde la primera petición tras el calentamiento
+    elapsed = time.perf_counter() - min(measured_from) if measured_from else 0
+    return summarize(latencies, statuses, elapsed)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+            timeout=5).decode().strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(app, requests=500, concurrency=8, warmup=50, base_url=None,
+                  only=None, seed=42, log=print):
+    """Ejecuta los escenarios (todos o los de only) y devuelve el informe."""
+    fixtures = load_fixtures(app, seed=seed)
+    if base_url:
+        def make_client():
+            return _HTTPClient(base_url)
+    else:
+        def make_client():
+            return _InProcessClient(app)
+
+    report = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'git_commit': _git_commit(),
+        'target': base_url or 'in-process',
+        'database': fixtures['dialect'],
+        'config': {'requests': requests, 'concurrency': concurrency,
+                   'warmup': warmup, 'seed': seed},
+        'dataset': fixtures['dataset'],
+        'endpoints': {}
+    }
+    for scenario in SCENARIOS:
+        name, role = scenario[0], scenario[3]
+        if only and name not in only:
+            continue
+        if role and role not in fixtures['tokens']:
+            log('skip', name, '(no {} user)'.format(role))
+            continue
+        result = run_scenario(make_client, scenario, fixtures, requests,
+                              concurrency, warmup, seed)
+        report['endpoints'][name] = result
+        log('{:<22} p50 {:>8} p95 {:>8} p99 {:>8} ms  {:>8} req/s  errors {}'.format(
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['throughput_rps'], result['errors']))
+    return report
+
+
+def compare_reports(baseline, current, threshold=10.0):
+    """Regresiones de p95 por encima de threshold (%) respecto a baseline."""
+    regressions = []
+    for name, result in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before.get('p95_ms') or result.get('p95_ms') is None:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        if change > threshold:
+            regressions.append({'endpoint': name, 'baseline_p95_ms': before['p95_ms'],
+                                'p95_ms': result['p95_ms'], 'change_pct': round(change, 1)})
+    return regressions
+
+
+def run_checkout_benchmark(app, checkouts=300, stock=100, quantity=1,
+                           concurrency=None, base_url=None, log=print):
+    """
+    Lanza checkouts en paralelo contra un único producto con stock limitado
+    y comprueba que no se vende más de lo que había.
+    """
+    with app.app_context():
+        product = Product(
+            name='Checkout benchmark {}'.format(datetime.utcnow().isoformat()),
+            description='Temporary product for flask checkout-benchmark',
+            price=1000.0, category='benchmark', stock=stock, features={})
+        user = User.query.filter_by(role='customer').order_by(User.id).first()
+        if user is None:
+            user = User(email='checkout-benchmark@seed.example.com',
+                        password=password_hasher.dummy_hash(),
+                        first_name='Checkout', last_name='Benchmark')
+            db.session.add(user)
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+        fixtures = {'product_ids': [product_id], 'categories': ['benchmark'],
+                    'tokens': {'customer': create_user_token(user)}}
+
+    if base_url:
+        def make_client():
+            return _HTTPClient(base_url)
+    else:
+        def make_client():
+            return _InProcessClient(app)
+
+    scenario = ('orders.checkout', 'POST', '/orders', 'customer',
+                {'items': [{'product_id': '{product_id}', 'quantity': quantity}]})
+    result = run_scenario(make_client, scenario, fixtures, checkouts,
+                          concurrency or checkouts, 0, 0)
+
+    with app.app_context():
+        final_stock = db.session.query(Product.stock).filter(
+            Product.id == product_id).scalar()
+        reserved = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).join(
+            Order, OrderItem.order_id == Order.id).filter(
+            OrderItem.product_id == product_id, Order.status == RESERVED).scalar()
+        # El producto temporal no debe quedar a la venta en el catálogo
+        db.session.execute(db.update(Product).where(Product.id == product_id)
+                           .values(is_active=False))
+        db.session.commit()
+        catalog_cache.bump_version()
+
+    successes = result['status'].get('201', 0)
+    result.update({
+        'product_id': product_id,
+        'initial_stock': stock,
+        'final_stock': final_stock,
+        'reserved_quantity': reserved,
+        'successful_checkouts': successes,
+        'oversold': max(0, reserved - stock),
+        'consistent': (final_stock >= 0 and stock - final_stock == reserved
+                       and successes * quantity == reserved
+                       and successes == min(checkouts, stock // quantity))
+    })
+    log('checkouts {} ok {} sold out {} | stock {} -> {} | oversold {} | consistent {}'.format(
+        checkouts, successes, result['status'].get('409', 0), stock, final_stock,
+        result['oversold'], result['consistent']))
+    log('p50 {} p95 {} p99 {} ms  {} req/s  errors {}'.format(
+        result['p50_ms'], result['p95_ms'], result['p99_ms'],
+        result['throughput_rps'], result['errors']))
+    return result
+
+
+def _benchmark_products(count, seed):
+    rng = random.Random(seed)
+    return [Product(
+        id=n + 1, name='Product {}'.format(n + 1),
+        description='Eco product {} built with recycled materials.'.format(n + 1),
+        price=float(rng.randrange(20000, 2000000, 1000)), category=rng.choice(
+            ('cars', 'yachts', 'jets', 'homes')),
+        product_type='standard', stock=rng.randrange(50), image_url=None,
+        is_eco_friendly=rng.random() < 0.8,
+        features={'color': {c: {'additional_cost': rng.choice((0, 500, 1500))}
+                            for c in ('white', 'black', 'green')}},
+        specifications={'seats': rng.choice((2, 4, 5, 7)), 'origin': 'ES'}
+    ) for n in range(count)]
+
+
+def run_serialization_benchmark(app, products=10000, rounds=5, seed=42, log=print):
+    """
+    Serializa una respuesta de products productos por tres caminos: dicts
+    a mano + json de la stdlib (lo de antes), serializador compilado +
+    stdlib y serializador compilado + orjson. Se queda con la mejor ronda.
+    """
+    catalog = _benchmark_products(products, seed)
+    fields = serializers.fields('product')
+    serializer = serializers.get('product')
+
+    def handwritten():
+        return {'products': [{f: getattr(p, f) for f in fields} for p in catalog]}
+
+    def compiled():
+        return {'products': serializer.many(catalog)}
+
+    variants = [('handwritten+stdlib', handwritten, DefaultJSONProvider(app)),
+                ('registry+stdlib', compiled, DefaultJSONProvider(app))]
+    if orjson is not None:
+        variants.append(('registry+orjson', compiled, OrjsonProvider(app)))
+    else:
+        log('orjson is not installed, skipping registry+orjson')
+
+    report = {'timestamp': datetime.utcnow().isoformat() + 'Z',
+              'git_commit': _git_commit(), 'products': products,
+              'rounds': rounds, 'variants': {}}
+    with app.app_context():
+        for name, build, provider in variants:
+            best = None
+            for _ in range(rounds):
+                started = time.perf_counter()
+                payload = build()
+                built = time.perf_counter()
+                # Los mismos argumentos que usa response() sin modo debug
+                body = provider.dumps(payload, separators=(',', ':'))
+                finished = time.perf_counter()
+                if best is None or finished - started < best[2] - best[0]:
+                    best = (started, built, finished, len(body.encode('utf-8')))
+            started, built, finished, size = best
+            total = finished - started
+            report['variants'][name] = {
+                'build_ms': round((built - started) * 1000, 2),
+                'dump_ms': round((finished - built) * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'products_per_s': round(products / total),
+                'mb_per_s': round(size / total / 1e6, 1),
+                'bytes': size
+            }
+    baseline = report['variants']['handwritten+stdlib']['total_ms']
+    for name, result in report['variants'].items():
+        result['speedup'] = round(baseline / result['total_ms'], 2)
+        log('{:<20} build {:>8} ms  dump {:>8} ms  total {:>8} ms  {:>9} products/s  x{}'.format(
+            name, result['build_ms'], result['dump_ms'], result['total_ms'],
+            result['products_per_s'], result['speedup']))
+    return report
+
+
+COMPRESSION_SCENARIOS = ('products.list', 'products.category', 'products.detail',
+                         'products.facets', 'business.quotes', 'analytics.timeseries')
+
+
+def run_compression_benchmark(app, requests=200, seed=42, log=print):
+    """
+    Antes/después de la compresión en las rutas GET grandes: bytes por
+    respuesta y CPU por petición (thread_time) sin comprimir, comprimiendo
+    en cada petición y sirviendo la variante comprimida cacheada.
+    """
+    if 'response_compressor' not in app.extensions or not response_compressor.enabled:
+        raise RuntimeError('Compression is disabled (COMPRESSION_ENABLED=0)')
+    fixtures = load_fixtures(app, seed=seed)
+    client = app.test_client()
+    variants = [('identity', 'identity', True)]
+    for encoding in reversed(response_compressor.encodings):
+        variants += [(encoding + ' (no cache)', encoding, False),
+                     (encoding, encoding, True)]
+
+    report = {'timestamp': datetime.utcnow().isoformat() + 'Z',
+              'git_commit': _git_commit(), 'requests': requests,
+              'min_size': response_compressor.min_size,
+              'gzip_level': response_compressor.gzip_level,
+              'brotli_quality': response_compressor.brotli_quality,
+              'dataset': fixtures['dataset'], 'endpoints': {}}
+    cache = response_compressor.cache
+    try:
+        for name, method, path, role, body in SCENARIOS:
+            if name not in COMPRESSION_SCENARIOS or (role and role not in fixtures['tokens']):
+                continue
+            rng = random.Random('{}-{}'.format(seed, name))
+            # Las mismas URLs para todas las variantes
+            paths = [path.format(product_id=rng.choice(fixtures['product_ids'] or [1]),
+                                 category=rng.choice(fixtures['categories']), term='')
+                     for _ in range(requests)]
+            results = {}
+            for label, encoding, use_cache in variants:
+                response_compressor.cache = cache if use_cache else LRUCache(max_size=0)
+                headers = {'Accept-Encoding': encoding}
+                if role:
+                    headers['Authorization'] = 'Bearer ' + fixtures['tokens'][role]
+                # Calienta las cachés con cada URL antes de medir
+                for url in set(paths):
+                    client.get(url, headers=headers)
+                total_bytes = 0
+                cpu = 0.0
+                for url in paths:
+                    started = time.thread_time()
+                    response = client.get(url, headers=headers)
+                    total_bytes += len(response.get_data())
+                    cpu += time.thread_time() - started
+                results[label] = {'bytes_per_response': round(total_bytes / requests),
+                                  'cpu_ms_per_request': round(cpu * 1000 / requests, 3)}
+            identity = results['identity']
+            for result in results.values():
+                if identity['bytes_per_response']:
+                    result['ratio'] = round(
+                        result['bytes_per_response'] / identity['bytes_per_response'], 3)
+            report['endpoints'][name] = results
+            log(name)
+            for label, result in results.items():
+                log('  {:<18} {:>9} bytes  {:>8} ms CPU/request  ratio {}'.format(
+                    label, result['bytes_per_response'], result['cpu_ms_per_request'],
+                    result.get('ratio')))
+    finally:
+        response_compressor.cache = cache
+    return report
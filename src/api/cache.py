@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.exc import IntegrityError
+from .models import db, CacheVersion
+from .replicas import primary_reads
+
+
+class LRUCache:
+    """Caché en memoria del proceso con límite de entradas y TTL."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CatalogCache:
+    """
+    Caché read-through del catálogo. Las claves llevan la versión del
+    catálogo, así que al subir la versión todas las entradas anteriores
+    dejan de usarse sin tener que borrarlas una a una.
+
+    La versión vive en la tabla cache_version para que la vean todos los
+    workers; cada proceso la relee como mucho cada CATALOG_VERSION_TTL
+    segundos, que es lo que tarda otro worker en dejar de servir datos
+    anteriores a una escritura.
+
+    El backend compartido es opcional y debe ofrecer get(key), set(key,
+    value, ttl) e incr(key) (por ejemplo un adaptador sobre Redis); si se
+    configura, la versión vive ahí en lugar de en la base de datos.
+    """
+
+    VERSION_KEY = 'catalog:version'
+    VERSION_NAME = 'catalog'
+
+    def __init__(self):
+        self.local = LRUCache()
+        self.backend = None
+        self.enabled = True
+        self.version_ttl = 1
+        self._version = None
+        self._version_read_at = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app, backend=None):
+        self.enabled = app.config.get('CATALOG_CACHE_ENABLED', True)
+        self.local = LRUCache(
+            max_size=app.config.get('CATALOG_CACHE_SIZE', 1024),
+            ttl=app.config.get('CATALOG_CACHE_TTL', 300))
+        self.version_ttl = app.config.get('CATALOG_VERSION_TTL', 1)
+        self.backend = backend
+        self._version = None
+        app.extensions['catalog_cache'] = self
+
+    def _remember_version(self, version):
+        with self._lock:
+            self._version = version
+            self._version_read_at = time.monotonic()
+        return version
+
+    @property
+    def version(self):
+        if self.backend is not None:
+            value = self.backend.get(self.VERSION_KEY)
+            return int(value) if value is not None else 0
+        if (self._version is not None
+                and time.monotonic() - self._version_read_at < self.version_ttl):
+            return self._version
+        # Del primario: una réplica atrasada devolvería una versión anterior
+        with primary_reads():
+            version = db.session.query(CacheVersion.version).filter(
+                CacheVersion.name == self.VERSION_NAME).scalar()
+        return self._remember_version(version or 0)
+
+    def bump_version(self):
+        """Se llama desde los endpoints que escriben en el catálogo, después del commit."""
+        if self.backend is not None:
+            return int(self.backend.incr(self.VERSION_KEY))
+        update = db.update(CacheVersion).where(
+            CacheVersion.name == self.VERSION_NAME
+        ).values(version=CacheVersion.version + 1)
+        if db.session.execute(update).rowcount == 0:
+            # Sin la fila que crea la migración (p. ej. tras db.create_all)
+            try:
+                db.session.add(CacheVersion(name=self.VERSION_NAME, version=1))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                db.session.execute(update)
+        db.session.commit()
+        with primary_reads():
+            version = db.session.query(CacheVersion.version).filter(
+                CacheVersion.name == self.VERSION_NAME).scalar()
+        return self._remember_version(version)
+
+    def _key(self, version, namespace, parts):
+        return 'catalog:v{}:{}:{}'.format(
+            version, namespace, ':'.join(str(p) for p in parts))
+
+    def get(self, namespace, parts, version=None):
+        """
+        Valor cacheado o None; cuenta aciertos y fallos. Quien hace get y
+        luego set debe leer la versión una vez y pasarla a los dos: si se
+        relee entre medias, lo cargado antes de una escritura acabaría
+        guardado con la versión nueva.
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(self.version if version is None else version, namespace, parts)
+        value = self.local.get(key)
+        if value is None and self.backend is not None:
+            raw = self.backend.get(key)
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, namespace, parts, value, version=None):
+        if not self.enabled or value is None:
+            return
+        key = self._key(self.version if version is None else version, namespace, parts)
+        self.local.set(key, value)
+        if self.backend is not None:
+            self.backend.set(key, json.dumps(value), self.local.ttl)
+
+    def get_or_set(self, namespace, parts, loader):
+        """Devuelve el valor cacheado o llama a loader() y lo guarda."""
+        if not self.enabled:
+            return loader()
+        # La versión se lee antes de cargar: si hay una escritura mientras
+        # loader() corre, lo cargado queda bajo la versión anterior
+        version = self.version
+        value = self.get(namespace, parts, version)
+        if value is None:
+            # Se carga del primario: una réplica con retraso dejaría datos
+            # viejos cacheados durante todo el TTL
+            with primary_reads():
+                value = loader()
+            self.set(namespace, parts, value, version)
+        return value
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.local.evictions,
+            'size': len(self.local),
+            'max_size': self.local.max_size,
+            'shared_backend': self.backend is not None
+        }
+
+
+catalog_cache = CatalogCache()
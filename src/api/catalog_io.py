@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, Product
+from .cache import catalog_cache
+from .facets import sync_product_ids
+
+FORMATS = ('csv', 'ndjson')
+REQUIRED_FIELDS = ('name', 'description', 'price', 'category')
+EXPORT_FIELDS = ('id', 'name', 'description', 'price', 'category',
+                 'product_type', 'stock', 'image_url', 'is_eco_friendly',
+                 'is_active', 'features', 'specifications')
+INSERT_DEFAULTS = {
+    'product_type': 'solar',
+    'stock': 1,
+    'image_url': '',
+    'is_eco_friendly': True,
+    'is_active': True,
+    'features': {},
+    'specifications': {}
+}
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename, default='ndjson'):
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return default
+
+
+def iter_records(stream, fmt):
+    """Genera (número de línea, dict) leyendo el fichero de texto fila a fila."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _as_json(value):
+    if isinstance(value, (dict, list)):
+        return value
+    return json.loads(value) if value not in (None, '') else {}
+
+
+def validate_record(record):
+    """Devuelve los valores listos para la tabla product o lanza ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError('Row is not a valid object')
+
+    # En CSV las columnas vacías equivalen a no enviadas
+    record = {k: v for k, v in record.items() if k and v not in (None, '')}
+    missing = [f for f in REQUIRED_FIELDS if f not in record]
+    if missing:
+        raise ValueError('Missing fields: ' + ', '.join(missing))
+
+    values = {
+        'name': str(record['name'])[:100],
+        'description': str(record['description']),
+        'price': float(record['price']),
+        'category': str(record['category'])[:50]
+    }
+    if values['price'] < 0:
+        raise ValueError('price must be positive')
+    if 'id' in record:
+        values['id'] = int(record['id'])
+    if 'product_type' in record:
+        values['product_type'] = str(record['product_type'])[:50]
+    if 'stock' in record:
+        values['stock'] = int(record['stock'])
+    if 'image_url' in record:
+        values['image_url'] = str(record['image_url'])[:200]
+    for field in ('is_eco_friendly', 'is_active'):
+        if field in record:
+            values[field] = _as_bool(record[field])
+    for field in ('features', 'specifications'):
+        if field in record:
+            values[field] = _as_json(record[field])
+    return values
+
+
+def _write_chunk(chunk, report):
+    ids = [values['id'] for _, values in chunk if 'id' in values]
+    existing = {product_id for (product_id,) in db.session.query(Product.id).filter(
+        Product.id.in_(ids))} if ids else set()
+
+    now = datetime.utcnow()
+    inserts = []
+    updates = {}
+    for _, values in chunk:
+        if values.get('id') in existing:
+            values['updated_at'] = now
+            # executemany necesita las mismas columnas en cada fila
+            updates.setdefault(frozenset(values), []).append(values)
+        else:
+            inserts.append(dict(INSERT_DEFAULTS, created_at=now,
+                                updated_at=now, **values))
+
+    # Las filas con id explícito y sin él no comparten columnas
+    synced = [values['id'] for _, values in chunk if values.get('id') in existing]
+    with_id = [row for row in inserts if 'id' in row]
+    without_id = [row for row in inserts if 'id' not in row]
+    for rows in (with_id, without_id):
+        if rows:
+            synced.extend(db.session.execute(
+                db.insert(Product).returning(Product.id), rows).scalars())
+    for rows in updates.values():
+        db.session.execute(db.update(Product), rows)
+
+    sync_product_ids(synced)
+    db.session.commit()
+
+    report['inserted'] += len(inserts)
+    report['updated'] += sum(len(rows) for rows in updates.values())
+
+
+def _report_error(report, line_number, error):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line_number, 'error': error})
+
+
+def _flush_chunk(chunk, report):
+    """Escribe un lote; si la base de datos lo rechaza, lo deshace entero y lo informa."""
+    try:
+        _write_chunk(chunk, report)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        error = 'Chunk rolled back: {}'.format(getattr(e, 'orig', None) or e)
+        for line_number, _ in chunk:
+            _report_error(report, line_number, error)
+
+
+def import_products(stream, fmt, chunk_size=500):
+    """
+    Importa productos en lotes: valida cada fila, inserta las nuevas y
+    actualiza (por id) las existentes con un executemany por lote y un
+    commit por lote. Los errores se informan por número de línea; si un
+    lote falla en la base de datos (p. ej. un id duplicado) se deshace ese
+    lote, sus filas cuentan como fallidas y el resto del fichero sigue.
+    """
+    report = {'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    chunk = []
+    for line_number, record in iter_records(stream, fmt):
+        try:
+            chunk.append((line_number, validate_record(record)))
+        except (ValueError, TypeError) as e:
+            _report_error(report, line_number, str(e))
+        if len(chunk) >= chunk_size:
+            _flush_chunk(chunk, report)
+            chunk = []
+    if chunk:
+        _flush_chunk(chunk, report)
+
+    if report['inserted'] or report['updated']:
+        _sync_id_sequence()
+        catalog_cache.bump_version()
+    return report
+
+
+def _sync_id_sequence():
+    # En PostgreSQL los ids explícitos no avanzan la secuencia de product.id
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text(
+            "SELECT setval(pg_get_serial_sequence('product', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM product), 1))"))
+        db.session.commit()
+
+
+def export_products(fmt, batch_size=1000):
+    """Genera el catálogo línea a línea; las filas se leen con yield_per."""
+    columns = [getattr(Product, field) for field in EXPORT_FIELDS]
+    result = db.session.execute(
+        db.select(*columns).order_by(Product.id).execution_options(
+            yield_per=batch_size))
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for row in result:
+            writer.writerow([
+                json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for row in result:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from .models import db, Product, Order, OrderItem
+from .pricing import get_price_tables, price_configuration, PricingError
+from .jobs import enqueue
+from .cache import catalog_cache
+
+RESERVED = 'reserved'
+PLACED = 'pending'
+RELEASED = 'released'
+EXPIRED = 'expired'
+# Pedidos que nunca llegaron a confirmarse: no cuentan en analytics
+UNPLACED_ORDER_STATUSES = (RESERVED, RELEASED, EXPIRED)
+
+DEFAULT_RESERVATION_MINUTES = 15
+MAX_CHECKOUT_ITEMS = 50
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status=400, details=None):
+        Exception.__init__(self, message)
+        self.status = status
+        self.details = details
+
+
+def _parse_items(items):
+    if not isinstance(items, list) or not items:
+        raise CheckoutError('items must be a non-empty list')
+    if len(items) > MAX_CHECKOUT_ITEMS:
+        raise CheckoutError('At most {} items per order'.format(MAX_CHECKOUT_ITEMS))
+    parsed = []
+    for index, item in enumerate(items):
+        product_id = item.get('product_id') if isinstance(item, dict) else None
+        quantity = item.get('quantity', 1) if isinstance(item, dict) else None
+        if not isinstance(product_id, int) or not isinstance(quantity, int) or quantity < 1:
+            raise CheckoutError('Item {} needs an integer product_id and a positive quantity'.format(index))
+        parsed.append((product_id, quantity, item.get('customization')))
+    return parsed
+
+
+def _take_stock(product_id, quantity):
+    """UPDATE condicional: solo descuenta si queda stock suficiente."""
+    result = db.session.execute(
+        db.update(Product).where(
+            Product.id == product_id,
+            Product.is_active == db.true(),
+            Product.stock >= quantity
+        ).values(stock=Product.stock - quantity)
+        .execution_options(synchronize_session=False))
+    return result.rowcount == 1
+
+
+def _return_stock(quantities):
+    for product_id, quantity in sorted(quantities.items()):
+        db.session.execute(
+            db.update(Product).where(Product.id == product_id)
+            .values(stock=Product.stock + quantity)
+            .execution_options(synchronize_session=False))
+
+
+def reserve_order(user_id, items, shipping_address=None, minutes=DEFAULT_RESERVATION_MINUTES):
+    """
+    Reserva el stock de todos los artículos en una transacción y crea el
+    pedido en estado reserved hasta reserved_until. Si falta stock de
+    cualquier artículo no se reserva nada (CheckoutError 409).
+    """
+    items = _parse_items(items)
+    tables = get_price_tables(product_id for product_id, _, _ in items)
+
+    lines = []
+    errors = []
+    for index, (product_id, quantity, customization) in enumerate(items):
+        table = tables.get(product_id)
+        if table is None:
+            errors.append({'index': index, 'product_id': product_id,
+                           'error': 'Product not found'})
+            continue
+        try:
+            price = price_configuration(table, customization)['total_price']
+        except PricingError as e:
+            errors.append({'index': index, 'product_id': product_id,
+                           'error': str(e)})
+            continue
+        lines.append((product_id, quantity, customization, price))
+    if errors:
+        raise CheckoutError('Invalid items', 400, errors)
+
+    quantities = {}
+    for product_id, quantity, _, _ in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    try:
+        # Siempre en el mismo orden de ids: sin interbloqueos entre checkouts
+        for product_id, quantity in sorted(quantities.items()):
+            if not _take_stock(product_id, quantity):
+                db.session.rollback()
+                raise CheckoutError('Insufficient stock', 409, [
+                    {'product_id': product_id, 'quantity': quantity}])
+
+        order = Order(
+            user_id=user_id,
+            total_amount=sum(price * quantity for _, quantity, _, price in lines),
+            status=RESERVED,
+            shipping_address=shipping_address,
+            reserved_until=datetime.utcnow() + timedelta(minutes=minutes))
+        db.session.add(order)
+        db.session.flush()
+        db.session.execute(db.insert(OrderItem), [{
+            'order_id': order.id,
+            'product_id': product_id,
+            'quantity': quantity,
+            'price': price,
+            'customization': customization
+        } for product_id, quantity, customization, price in lines])
+        db.session.commit()
+        # El stock forma parte de las respuestas cacheadas del catálogo
+        catalog_cache.bump_version()
+        return order
+    except CheckoutError:
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _order_quantities(order_id):
+    quantities = {}
+    for product_id, quantity in db.session.query(
+            OrderItem.product_id, OrderItem.quantity).filter(OrderItem.order_id == order_id):
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _transition(order_id, user_id, source, target, extra_filter=None):
+    query = db.update(Order).where(Order.id == order_id, Order.status == source)
+    if user_id is not None:
+        query = query.where(Order.user_id == user_id)
+    if extra_filter is not None:
+        query = query.where(extra_filter)
+    values = {'status': target}
+    if target != RESERVED:
+        values['reserved_until'] = None
+    result = db.session.execute(
+        query.values(**values).execution_options(synchronize_session=False))
+    return result.rowcount == 1
+
+
+def confirm_order(order_id, user_id):
+    """
+    Pasa la reserva a pedido (pending) si todavía no ha caducado. El cobro
+    y el email se encolan en la misma transacción y los hace el worker.
+    """
+    if not _transition(order_id, user_id, RESERVED, PLACED,
+                       Order.reserved_until > datetime.utcnow()):
+        db.session.rollback()
+        raise CheckoutError('Reservation not found or expired', 409)
+    if current_app.config.get('STRIPE_SECRET_KEY'):
+        enqueue('payments.create_intent', order_id=order_id)
+    enqueue('email.order_placed', order_id=order_id)
+    db.session.commit()
+
+
+def release_order(order_id, user_id):
+    """Cancela una reserva y devuelve su stock."""
+    if not _transition(order_id, user_id, RESERVED, RELEASED):
+        db.session.rollback()
+        raise CheckoutError('Reservation not found or already closed', 409)
+    _return_stock(_order_quantities(order_id))
+    db.session.commit()
+    catalog_cache.bump_version()
+
+
+def expired_reservations_query(now, batch_size):
+    """Ids de las reservas vencidas, las más antiguas primero."""
+    return db.session.query(Order.id).filter(
+        Order.status == RESERVED, Order.reserved_until <= now
+    ).order_by(Order.reserved_until).limit(batch_size)
+
+
+def release_expired_reservations(batch_size=500, now=None):
+    """
+    Caduca las reservas vencidas y devuelve su stock. Cada pedido se cierra
+    con un UPDATE condicional, así que es seguro ejecutar varios barridos a
+    la vez o que el cliente confirme justo en ese momento.
+    """
+    now = now or datetime.utcnow()
+    released = 0
+    while True:
+        order_ids = [order_id for (order_id,) in expired_reservations_query(now, batch_size)]
+        if not order_ids:
+            break
+        quantities = {}
+        for order_id in order_ids:
+            if _transition(order_id, None, RESERVED, EXPIRED):
+                for product_id, quantity in _order_quantities(order_id).items():
+                    quantities[product_id] = quantities.get(product_id, 0) + quantity
+                released += 1
+        _return_stock(quantities)
+        db.session.commit()
+        if quantities:
+            catalog_cache.bump_version()
+    return released
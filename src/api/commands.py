@@ -1,6 +1,19 @@
 
+import json
+import time
 import click
-from api.models import db, User
+from api.models import db, User, Product
+from api.rollups import rollup_analytics, backfill_orders_by_category
+from api.search import create_search_index
+from api.facets import sync_product_ids
+from api.catalog_io import import_products, export_products, detect_format, FORMATS
+from api.query_plans import check_query_plans
+from api.passwords import password_hasher
+from api.seed import generate_dataset, SEED_EPOCH
+from api.benchmark import (run_benchmark, run_checkout_benchmark, run_serialization_benchmark,
+                           run_compression_benchmark, compare_reports, SCENARIOS)
+from api.checkout import release_expired_reservations
+from api.jobs import run_worker, job_stats, TASKS
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -18,17 +31,277 @@ def setup_commands(app):
     @click.argument("count") # argument of out command
     def insert_test_users(count):
         print("Creating test users")
+        # Un solo hash y un solo commit para todos
+        password = password_hasher.hash_password("123456")
         for x in range(1, int(count) + 1):
             user = User()
             user.email = "test_user" + str(x) + "@test.com"
-            user.password = "123456"
+            user.password = password
+            user.first_name = "Test"
+            user.last_name = "User " + str(x)
             user.is_active = True
             db.session.add(user)
-            db.session.commit()
             print("User: ", user.email, " created.")
+        db.session.commit()
 
         print("All test users created")
 
     @app.cli.command("insert-test-data")
     def insert_test_data():
-        pass
\ No newline at end of file
+        generate_dataset(users=50, products=40, quotes=500, orders=100)
+        rollup_analytics(full=True)
+        print("Test data created")
+
+    """
+    Genera un dataset reproducible con volúmenes realistas, por lotes:
+    $ flask seed-dataset --users 20000 --products 2000 --quotes 1000000 --orders 200000
+    """
+    @app.cli.command("seed-dataset")
+    @click.option("--users", default=1000)
+    @click.option("--products", default=500)
+    @click.option("--quotes", default=100000)
+    @click.option("--orders", default=20000)
+    @click.option("--days", default=365, help="Spread created_at over this many days")
+    @click.option("--seed", default=42)
+    @click.option("--batch-size", default=5000)
+    @click.option("--epoch", type=click.DateTime(formats=["%Y-%m-%d"]),
+                  default=SEED_EPOCH.strftime("%Y-%m-%d"),
+                  help="created_at values fall in the --days before this date")
+    def seed_dataset_command(users, products, quotes, orders, days, seed, batch_size, epoch):
+        started = time.perf_counter()
+        try:
+            counts = generate_dataset(users=users, products=products, quotes=quotes,
+                                      orders=orders, days=days, seed=seed,
+                                      batch_size=batch_size, epoch=epoch)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        rollup_analytics(full=True)
+        print("Dataset created", counts, "in {:.1f}s".format(time.perf_counter() - started))
+
+    """
+    Lanza carga contra las rutas reales (en proceso o contra --url) y guarda
+    p50/p95/p99 y throughput por endpoint en JSON. Con --compare falla si el
+    p95 de algún endpoint empeora más de --threshold %:
+    $ flask benchmark --output bench/base.json
+    $ flask benchmark --compare bench/base.json --output bench/new.json
+    """
+    @app.cli.command("benchmark")
+    @click.option("--requests", "request_count", default=500, help="Requests per endpoint")
+    @click.option("--concurrency", default=8)
+    @click.option("--warmup", default=50)
+    @click.option("--url", default=None, help="Running server, e.g. http://localhost:3001")
+    @click.option("--endpoint", "endpoints", multiple=True,
+                  type=click.Choice([s[0] for s in SCENARIOS]))
+    @click.option("--seed", default=42)
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--compare", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--threshold", default=10.0, help="Allowed p95 regression in %")
+    def benchmark_command(request_count, concurrency, warmup, url, endpoints, seed,
+                          output, compare, threshold):
+        report = run_benchmark(app, requests=request_count, concurrency=concurrency,
+                               warmup=warmup, base_url=url, only=endpoints, seed=seed)
+        if output:
+            with open(output, 'w') as stream:
+                json.dump(report, stream, indent=2)
+            print("Results saved to", output)
+        if compare:
+            with open(compare) as stream:
+                regressions = compare_reports(json.load(stream), report, threshold)
+            for r in regressions:
+                print("REGRESSION", r['endpoint'], r['baseline_p95_ms'], "->",
+                      r['p95_ms'], "ms (+{}%)".format(r['change_pct']))
+            if regressions:
+                raise SystemExit(1)
+
+    """
+    Consolida quotes y orders en filas diarias de Analytics. Solo recalcula
+    los días con cambios desde la última ejecución; pensado para un cron:
+    $ flask rollup-analytics            (incremental)
+    $ flask rollup-analytics --full     (recalcula todo el histórico)
+
+    Las filas creadas antes de la columna orders_by_category la tienen a
+    NULL y el desglose por categoría de /analytics/timeseries sale vacío
+    para esos días; se rellenan una vez tras migrar con:
+    $ flask rollup-analytics --backfill-categories
+    """
+    @app.cli.command("rollup-analytics")
+    @click.option("--full", is_flag=True, help="Recalculate every day")
+    @click.option("--backfill-categories", is_flag=True,
+                  help="Fill orders_by_category on rows created before that column")
+    def rollup_analytics_command(full, backfill_categories):
+        if backfill_categories:
+            days = backfill_orders_by_category()
+            print("Backfilled orders_by_category on", days, "day(s)")
+        days = rollup_analytics(full=full)
+        print("Analytics rollup updated", days, "day(s)")
+
+    """
+    Importa / exporta el catálogo en CSV o NDJSON sin cargarlo entero en memoria:
+    $ flask import-products catalog.ndjson
+    $ flask export-products catalog.csv
+    """
+    @app.cli.command("import-products")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), default=None)
+    @click.option("--chunk-size", default=500)
+    def import_products_command(path, fmt, chunk_size):
+        with open(path, newline='', encoding='utf-8') as stream:
+            report = import_products(
+                stream, fmt or detect_format(path), chunk_size=chunk_size)
+        print("Inserted:", report['inserted'], "Updated:", report['updated'],
+              "Failed:", report['failed'])
+        for error in report['errors']:
+            print("  line", error['line'], "-", error['error'])
+
+    @app.cli.command("export-products")
+    @click.argument("path", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), default=None)
+    def export_products_command(path, fmt):
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            for chunk in export_products(fmt or detect_format(path)):
+                stream.write(chunk)
+        print("Catalog exported to", path)
+
+    """
+    Crea el índice de búsqueda de productos (FTS5 en SQLite, tsvector + GIN
+    en PostgreSQL). Con --rebuild vuelve a indexar el catálogo existente:
+    $ flask search-index --rebuild
+    """
+    @app.cli.command("search-index")
+    @click.option("--rebuild", is_flag=True, help="Reindex existing products")
+    def search_index_command(rebuild):
+        if create_search_index(rebuild=rebuild):
+            print("Product search index ready")
+        else:
+            print("Full-text index not supported on this database, using LIKE fallback")
+
+    """
+    Regenera la tabla product_attribute (filtros por specs/features) a partir
+    del JSON de cada producto, por lotes. La migración ya la rellena; sirve
+    para resincronizar si se escribió en product sin pasar por la API:
+    $ flask sync-product-attributes
+    """
+    @app.cli.command("sync-product-attributes")
+    @click.option("--batch-size", default=1000)
+    def sync_product_attributes_command(batch_size):
+        last_id = 0
+        total = 0
+        while True:
+            ids = [product_id for (product_id,) in db.session.query(Product.id).filter(
+                Product.id > last_id).order_by(Product.id).limit(batch_size)]
+            if not ids:
+                break
+            sync_product_ids(ids)
+            db.session.commit()
+            total += len(ids)
+            last_id = ids[-1]
+        print("Attributes synced for", total, "products")
+
+    """
+    Comprueba con EXPLAIN que las consultas de las rutas calientes usan
+    índices. Termina con código 1 si alguna recorre una tabla entera:
+    $ flask check-indexes
+    """
+    @app.cli.command("check-indexes")
+    @click.option("--verbose", is_flag=True, help="Print every query plan")
+    def check_indexes_command(verbose):
+        failed = []
+        for name, (plan, full_scan) in check_query_plans().items():
+            print("FULL SCAN" if full_scan else "ok       ", name)
+            if verbose or full_scan:
+                for line in plan:
+                    print("           ", line)
+            if full_scan:
+                failed.append(name)
+        if failed:
+            raise SystemExit(1)
+
+    """
+    Caduca las reservas de stock vencidas y devuelve el stock. Para cron, o
+    como proceso con --loop cada N segundos:
+    $ flask release-reservations --loop 30
+    """
+    @app.cli.command("release-reservations")
+    @click.option("--loop", "interval", default=0, help="Run every N seconds")
+    @click.option("--batch-size", default=500)
+    def release_reservations_command(interval, batch_size):
+        while True:
+            released = release_expired_reservations(batch_size=batch_size)
+            if released or not interval:
+                print("Released", released, "expired reservation(s)")
+            if not interval:
+                break
+            time.sleep(interval)
+
+    """
+    Cientos de checkouts en paralelo sobre un mismo producto: comprueba que
+    no hay sobreventa y mide la latencia y el throughput del checkout:
+    $ flask checkout-benchmark --checkouts 500 --stock 100
+    """
+    @app.cli.command("checkout-benchmark")
+    @click.option("--checkouts", default=300)
+    @click.option("--stock", default=100)
+    @click.option("--quantity", default=1)
+    @click.option("--concurrency", default=None, type=int,
+                  help="Parallel clients (default: one per checkout)")
+    @click.option("--url", default=None, help="Running server, e.g. http://localhost:3001")
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True))
+    def checkout_benchmark_command(checkouts, stock, quantity, concurrency, url, output):
+        result = run_checkout_benchmark(app, checkouts=checkouts, stock=stock,
+                                        quantity=quantity, concurrency=concurrency,
+                                        base_url=url)
+        if output:
+            with open(output, 'w') as stream:
+                json.dump(result, stream, indent=2)
+        if not result['consistent']:
+            raise SystemExit(1)
+
+    """
+    Coste de serializar una respuesta grande de productos (10k por defecto)
+    con los dicts a mano de antes, el serializador compilado y orjson:
+    $ flask serialization-benchmark --products 10000
+    """
+    @app.cli.command("serialization-benchmark")
+    @click.option("--products", default=10000)
+    @click.option("--rounds", default=5)
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True))
+    def serialization_benchmark_command(products, rounds, output):
+        report = run_serialization_benchmark(app, products=products, rounds=rounds)
+        if output:
+            with open(output, 'w') as stream:
+                json.dump(report, stream, indent=2)
+
+    """
+    Bytes y CPU por petición de las rutas grandes sin comprimir, con
+    gzip/brotli en cada petición y con la variante comprimida cacheada:
+    $ flask compression-benchmark --requests 200
+    """
+    @app.cli.command("compression-benchmark")
+    @click.option("--requests", "request_count", default=200, help="Requests per endpoint and variant")
+    @click.option("--seed", default=42)
+    @click.option("--output", type=click.Path(dir_okay=False, writable=True))
+    def compression_benchmark_command(request_count, seed, output):
+        report = run_compression_benchmark(app, requests=request_count, seed=seed)
+        if output:
+            with open(output, 'w') as stream:
+                json.dump(report, stream, indent=2)
+
+    """
+    Worker de la cola de trabajos (tabla job). Varios procesos pueden
+    ejecutarse a la vez; con --burst termina cuando la cola queda vacía:
+    $ flask jobs-worker --queue email --queue payments --concurrency 8
+    """
+    @app.cli.command("jobs-worker")
+    @click.option("--queue", "queues", multiple=True,
+                  help="Queue to consume (repeatable, default: all known queues)")
+    @click.option("--concurrency", default=4)
+    @click.option("--poll-interval", default=1.0)
+    @click.option("--burst", is_flag=True, help="Exit when no jobs are ready")
+    def jobs_worker_command(queues, concurrency, poll_interval, burst):
+        queues = queues or sorted({t.queue for t in TASKS.values()} | {'default'})
+        run_worker(app, queues=queues, concurrency=concurrency,
+                   poll_interval=poll_interval, burst=burst)
+
+    @app.cli.command("jobs-stats")
+    def jobs_stats_command():
+        print(json.dumps(job_stats(), indent=2))
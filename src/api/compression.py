@@ -0,0 +1,134 @@
+import gzip
+import threading
+import time
+import zlib
+from flask import request
+from .cache import LRUCache
+from .conditional import ENCODED_ETAG_SUFFIXES
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se ofrece gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'text/plain', 'text/html')
+
+
+class ResponseCompressor:
+    """
+    Compresión gzip/brotli según Accept-Encoding, para respuestas de al
+    menos COMPRESSION_MIN_SIZE bytes. Las respuestas con ETag (las que
+    salen de la caché del catálogo) guardan su versión comprimida, así que
+    una respuesta caliente se comprime una vez y no en cada petición.
+    Las respuestas en streaming (NDJSON, exportaciones) no se tocan.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+        self.cache = LRUCache(max_size=256, ttl=300)
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', False)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = app.config.get('COMPRESSION_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 5)
+        self.cache = LRUCache(
+            max_size=app.config.get('COMPRESSION_CACHE_SIZE', 256),
+            ttl=app.config.get('CATALOG_CACHE_TTL', 300))
+        app.extensions['response_compressor'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def _reset_counters(self):
+        self.responses = 0
+        self.skipped_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+        self.cache_hits = 0
+        self.by_encoding = {}
+
+    @property
+    def encodings(self):
+        # Orden de preferencia del servidor cuando el cliente acepta varias
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0: misma entrada, mismos bytes (y misma ETag de la variante)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _after_request(self, response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.is_streamed or request.method == 'HEAD'
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            with self._lock:
+                self.skipped_small += 1
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding, len(data), zlib.crc32(data)) if etag else None
+        body = self.cache.get(key) if key else None
+        cached = body is not None
+        cpu_ms = 0.0
+        if not cached:
+            started = time.thread_time()
+            body = self.compress(data, encoding)
+            cpu_ms = (time.thread_time() - started) * 1000
+            if key:
+                self.cache.set(key, body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Cada codificación es otra representación: otra ETag fuerte
+            response.set_etag(etag + ENCODED_ETAG_SUFFIXES[encoding], weak)
+
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(body)
+            self.cpu_ms += cpu_ms
+            if cached:
+                self.cache_hits += 1
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+        return response
+
+    def stats(self):
+        with self._lock:
+            responses = self.responses
+            return {
+                'enabled': self.enabled,
+                'encodings': list(self.encodings),
+                'min_size': self.min_size,
+                'compressed_responses': responses,
+                'by_encoding': dict(self.by_encoding),
+                'skipped_small': self.skipped_small,
+                'cache_hits': self.cache_hits,
+                'cache_size': len(self.cache),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+                'avg_bytes_in': round(self.bytes_in / responses) if responses else None,
+                'avg_bytes_out': round(self.bytes_out / responses) if responses else None,
+                'cpu_ms_per_response': round(self.cpu_ms / responses, 3) if responses else None
+            }
+
+
+response_compressor = ResponseCompressor()
@@ -0,0 +1,57 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+# Sufijo de la ETag de cada variante comprimida (ver compression.py)
+ENCODED_ETAG_SUFFIXES = {'gzip': '-gzip', 'br': '-br'}
+
+
+def make_etag(*parts):
+    """ETag fuerte a partir de las versiones de las filas (ids, updated_at...)."""
+    raw = '|'.join(
+        p.isoformat() if hasattr(p, 'isoformat') else str(p) for p in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _as_http_date(value):
+    # Las fechas se guardan en UTC sin zona; HTTP solo tiene resolución de segundos
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _matching_etag(etag):
+    """
+    La ETag (sin comprimir o de una variante comprimida) que envió el
+    cliente. La de una variante solo vale si el cliente acepta esa
+    codificación: si no, la representación que recibiría es otra.
+    """
+    if request.if_none_match.contains(etag):
+        return etag
+    for encoding, suffix in ENCODED_ETAG_SUFFIXES.items():
+        if request.accept_encodings[encoding] and request.if_none_match.contains(etag + suffix):
+            return etag + suffix
+    return None
+
+
+def is_not_modified(etag, last_modified=None):
+    # If-None-Match tiene prioridad sobre If-Modified-Since (RFC 7232)
+    if request.if_none_match:
+        return _matching_etag(etag) is not None
+    if last_modified is not None and request.if_modified_since is not None:
+        return _as_http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_http_date(last_modified)
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    if request.if_none_match:
+        etag = _matching_etag(etag) or etag
+    return add_validators(
+        current_app.response_class(status=304), etag, last_modified)
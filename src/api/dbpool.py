@@ -0,0 +1,157 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from .metrics import Histogram
+from .models import db
+
+# Las esperas normales están por debajo del milisegundo
+WAIT_BUCKETS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 30000)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout y cuándo usa overflow."""
+
+    def _do_get(self):
+        overflow = self.overflow()
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout((time.perf_counter() - started) * 1000)
+            raise
+        pool_metrics.record_wait((time.perf_counter() - started) * 1000,
+                                 self.overflow() > max(overflow, 0))
+        return record
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS a partir de la configuración DB_POOL_*."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800)
+    }
+    # SQLite en memoria usa su propio pool de una conexión por hilo
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30)
+    })
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {
+            'options': '-c statement_timeout={}'.format(int(statement_timeout))
+        }
+    return options
+
+
+class PoolMetrics:
+    """Contadores del pool de conexiones de este proceso (uno por worker de gunicorn)."""
+
+    def __init__(self, app=None):
+        self.checkout_wait = Histogram(WAIT_BUCKETS)
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.max_in_use = 0
+        self._engine = None
+        self._config = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._config = {
+            'pool_size': app.config.get('DB_POOL_SIZE', 5),
+            'max_overflow': app.config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': app.config.get('DB_POOL_PRE_PING', True),
+            'statement_timeout_ms': app.config.get('DB_STATEMENT_TIMEOUT_MS', 0),
+            'workers': app.config.get('WEB_CONCURRENCY')
+        }
+        with app.app_context():
+            self._engine = db.engine
+        event.listen(self._engine, 'connect', self._on_connect)
+        event.listen(self._engine, 'checkout', self._on_checkout)
+        event.listen(self._engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        checked_out = getattr(self._engine.pool, 'checkedout', None)
+        in_use = checked_out() if checked_out else 0
+        with self._lock:
+            self.checkouts += 1
+            self.max_in_use = max(self.max_in_use, in_use)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        # pre_ping o una desconexión detectada (p. ej. tras un failover)
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, elapsed_ms, overflowed):
+        self.checkout_wait.observe(elapsed_ms)
+        if overflowed:
+            with self._lock:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, elapsed_ms):
+        self.checkout_wait.observe(elapsed_ms)
+        with self._lock:
+            self.timeouts += 1
+
+    def pool_status(self):
+        pool = self._engine.pool if self._engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return {'class': type(pool).__name__ if pool else None}
+        return {
+            'class': type(pool).__name__,
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        }
+
+    def database_max_connections(self):
+        if self._engine is None or self._engine.dialect.name != 'postgresql':
+            return None
+        with self._engine.connect() as connection:
+            return int(connection.exec_driver_sql('SHOW max_connections').scalar())
+
+    def stats(self):
+        per_worker = self._config.get('pool_size', 0) + self._config.get('max_overflow', 0)
+        workers = self._config.get('workers')
+        with self._lock:
+            counters = {
+                'checkouts': self.checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'max_in_use': self.max_in_use
+            }
+        return {
+            'config': self._config,
+            'pool': self.pool_status(),
+            'checkout_wait_ms': self.checkout_wait.snapshot(),
+            'counters': counters,
+            'capacity': {
+                'max_connections_per_worker': per_worker,
+                'max_connections_all_workers': per_worker * workers if workers else None,
+                'database_max_connections': self.database_max_connections()
+            }
+        }
+
+
+pool_metrics = PoolMetrics()
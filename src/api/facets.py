@@ -0,0 +1,144 @@
+import re
+from .models import db, Product, ProductAttribute
+
+FILTER_PARAM = re.compile(
+    r'^(spec|feature)\.([\w\-]+)(?:\[(eq|ne|gt|gte|lt|lte)\])?$')
+NUMERIC_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+MAX_FACETS = 10
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)[:200]
+
+
+def extract_attributes(product_id, specifications, features):
+    rows = []
+
+    def add(source, key, value):
+        if isinstance(value, (str, int, float, bool)):
+            rows.append({'product_id': product_id, 'source': source,
+                         'key': str(key)[:100], 'value_text': _as_text(value),
+                         'value_num': _as_number(value)})
+
+    for key, value in (specifications or {}).items():
+        for item in (value if isinstance(value, list) else [value]):
+            add('spec', key, item)
+
+    # En features se indexan las opciones disponibles de cada feature
+    for key, options in (features or {}).items():
+        if isinstance(options, dict):
+            options = list(options)
+        for option in (options if isinstance(options, list) else [options]):
+            add('feature', key, option)
+    return rows
+
+
+def sync_attributes(products):
+    """Reescribe los atributos de los productos dados: (id, specs, features)."""
+    products = list(products)
+    if not products:
+        return
+    ids = [product_id for product_id, _, _ in products]
+    db.session.execute(db.delete(ProductAttribute).where(
+        ProductAttribute.product_id.in_(ids)))
+    rows = [row for product in products for row in extract_attributes(*product)]
+    if rows:
+        db.session.execute(db.insert(ProductAttribute), rows)
+
+
+def sync_product_ids(ids):
+    sync_attributes(db.session.query(
+        Product.id, Product.specifications, Product.features
+    ).filter(Product.id.in_(list(ids))))
+
+
+def parse_facet_filters(args):
+    """Convierte ?spec.range_km[gte]=500&feature.color=red en tuplas de filtro."""
+    filters = []
+    for param, values in args.lists():
+        match = FILTER_PARAM.match(param)
+        if not match:
+            continue
+        source, key, operator = match.group(1), match.group(2), match.group(3) or 'eq'
+        for value in values:
+            if operator in NUMERIC_OPERATORS and _as_number(value) is None:
+                raise ValueError('{} needs a numeric value'.format(param))
+            filters.append((source, key, operator, value))
+    return sorted(filters)
+
+
+def parse_facet_keys(value):
+    if not value:
+        return []
+    keys = [k.strip() for k in value.split(',') if k.strip()][:MAX_FACETS]
+    for key in keys:
+        if not FILTER_PARAM.match(key) or '[' in key:
+            raise ValueError('Invalid facet: ' + key)
+    return keys
+
+
+def _condition(operator, value):
+    number = _as_number(value)
+    column = ProductAttribute.value_num if number is not None else ProductAttribute.value_text
+    target = number if number is not None else value
+    return {
+        'eq': column == target,
+        'gt': column > target,
+        'gte': column >= target,
+        'lt': column < target,
+        'lte': column <= target
+    }[operator]
+
+
+def apply_facet_filters(query, filters):
+    # Un EXISTS por filtro, resuelto con los índices de product_attribute.
+    # ne es NOT EXISTS del valor: un atributo con varios valores (colores,
+    # opciones) no debe pasar el filtro solo porque tenga otro distinto
+    for source, key, operator, value in filters:
+        negate = operator == 'ne'
+        exists = db.exists().where(
+            ProductAttribute.product_id == Product.id,
+            ProductAttribute.source == source,
+            ProductAttribute.key == key,
+            _condition('eq' if negate else operator, value))
+        query = query.filter(~exists if negate else exists)
+    return query
+
+
+def facet_counts(product_ids, facet_keys):
+    """{'spec.seats': {'8': 3, ...}} contando productos dentro de product_ids."""
+    if not facet_keys:
+        return {}
+    counts = {k: {} for k in facet_keys}
+    for source, key, value, total in facet_counts_query(product_ids, facet_keys):
+        counts[source + '.' + key][value] = total
+    return counts
+
+
+def facet_counts_query(product_ids, facet_keys):
+    pairs = [tuple(k.split('.', 1)) for k in facet_keys]
+    return db.session.query(
+        ProductAttribute.source, ProductAttribute.key,
+        ProductAttribute.value_text,
+        db.func.count(db.distinct(ProductAttribute.product_id))
+    ).filter(
+        ProductAttribute.product_id.in_(product_ids),
+        db.or_(*[db.and_(ProductAttribute.source == s, ProductAttribute.key == k)
+                 for s, k in pairs])
+    ).group_by(ProductAttribute.source, ProductAttribute.key,
+               ProductAttribute.value_text)
@@ -0,0 +1,109 @@
+import threading
+from collections import namedtuple
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token
+from .models import db, User
+from .cache import LRUCache
+from .replicas import primary_reads
+
+UserIdentity = namedtuple('UserIdentity', 'id role is_active token_version')
+
+
+def user_claims(user):
+    """Claims del JWT; ver es la token_version del usuario al emitirlo."""
+    return {'role': user.role or 'customer', 'active': user.is_active is not False,
+            'ver': user.token_version or 0}
+
+
+def create_user_token(user):
+    return create_access_token(identity=str(user.id), additional_claims=user_claims(user))
+
+
+def revoke_user_tokens(user):
+    """
+    Invalida en todos los workers los tokens ya emitidos (baja, cambio de
+    rol). Llamar antes del commit y después user_cache.invalidate().
+    """
+    user.token_version = User.token_version + 1
+
+
+class UserCache:
+    """
+    Rol, estado y token_version de los usuarios, en memoria del proceso
+    con TTL corto (USER_CACHE_TTL). El rol no se toma de los claims del
+    token: se lee de aquí, y los tokens con una versión anterior a la del
+    usuario se rechazan. invalidate() lo aplica al momento en este proceso;
+    en los demás workers tarda como mucho USER_CACHE_TTL.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(max_size=10000, ttl=5)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revoked = 0
+
+    def init_app(self, app):
+        self.local = LRUCache(max_size=app.config.get('USER_CACHE_SIZE', 10000),
+                              ttl=app.config.get('USER_CACHE_TTL', 5))
+        app.extensions['user_cache'] = self
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, user_id):
+        """UserIdentity del usuario o None si no existe."""
+        user_id = int(user_id)
+        identity = self.local.get(user_id)
+        if identity is not None:
+            self._count('hits')
+            return identity
+        self._count('misses')
+        # Del primario: tras un cambio de rol la réplica puede ir por detrás
+        with primary_reads():
+            row = db.session.query(User.role, User.is_active, User.token_version).filter(
+                User.id == user_id).first()
+        if row is None:
+            return None
+        identity = UserIdentity(user_id, row.role or 'customer', row.is_active is not False,
+                                row.token_version or 0)
+        self.local.set(user_id, identity)
+        return identity
+
+    def invalidate(self, user_id):
+        """Llamar después del commit al cambiar perfil, rol o estado del usuario."""
+        self.local.delete(int(user_id))
+
+    def from_token(self):
+        """Identidad de la petición actual, o None si el usuario no existe o el token está revocado."""
+        identity = self.get(get_jwt_identity())
+        if identity is None or get_jwt().get('ver', 0) < identity.token_version:
+            self._count('revoked')
+            return None
+        return identity
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revoked': self.revoked,
+            'size': len(self.local),
+            'ttl': self.local.ttl
+        }
+
+
+user_cache = UserCache()
+
+
+def business_required(fn):
+    """jwt_required() más rol business, cuenta activa y token no revocado (sin consultas si el usuario está en la caché)."""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        identity = user_cache.from_token()
+        if not identity or not identity.is_active or identity.role != 'business':
+            return jsonify({'error': 'Unauthorized'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
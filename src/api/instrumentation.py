@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import Histogram
+
+logger = logging.getLogger('api.slow_query')
+
+SLOW_QUERY_LOG_SIZE = 100
+MAX_SQL_LENGTH = 2000
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.requests = {}
+        self.queries = 0
+        self.query_ms = 0.0
+        self.serialize_ms = 0.0
+        self.response_bytes = 0
+
+
+class RequestMetrics:
+    """
+    Latencia por endpoint, número y tiempo de consultas SQL, tiempo de
+    serialización JSON y tamaño de respuesta. Desactivado no registra
+    ningún hook, así que no añade trabajo a las peticiones.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.server_timing = False
+        self.slow_query_ms = 200
+        self.slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('INSTRUMENTATION_ENABLED', False)
+        self.server_timing = app.config.get('SERVER_TIMING_ENABLED', False)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 200)
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        # Todas las conexiones (primario y réplicas) pasan por Engine
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        # jsonify() pasa por app.json.response(): se mide ahí la serialización
+        response = app.json.response
+
+        def timed_response(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return response(*args, **kwargs)
+            finally:
+                if has_request_context() and '_perf' in g:
+                    g._perf['serialize_ms'] += (time.perf_counter() - started) * 1000
+        app.json.response = timed_response
+
+    def _before_request(self):
+        g._perf = {'start': time.perf_counter(), 'queries': 0,
+                   'query_ms': 0.0, 'serialize_ms': 0.0}
+
+    def _after_request(self, response):
+        perf = g.pop('_perf', None)
+        if perf is None:
+            return response
+        total_ms = (time.perf_counter() - perf['start']) * 1000
+        size = response.calculate_content_length() or 0
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+
+        stats = self._endpoint((request.method, endpoint))
+        stats.latency.observe(total_ms)
+        status = '{}xx'.format(response.status_code // 100)
+        with self._lock:
+            stats.requests[status] = stats.requests.get(status, 0) + 1
+            stats.queries += perf['queries']
+            stats.query_ms += perf['query_ms']
+            stats.serialize_ms += perf['serialize_ms']
+            stats.response_bytes += size
+
+        if self.server_timing:
+            response.headers.add('Server-Timing', ', '.join((
+                'db;dur={:.2f};desc="{} queries"'.format(perf['query_ms'], perf['queries']),
+                'serialize;dur={:.2f}'.format(perf['serialize_ms']),
+                'total;dur={:.2f}'.format(total_ms))))
+        return response
+
+    def _endpoint(self, key):
+        stats = self._endpoints.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._endpoints.setdefault(key, EndpointStats())
+        return stats
+
+    def record_query(self, statement, elapsed_ms):
+        endpoint = None
+        if has_request_context():
+            perf = g.get('_perf')
+            if perf is not None:
+                perf['queries'] += 1
+                perf['query_ms'] += elapsed_ms
+            endpoint = '{} {}'.format(
+                request.method, request.url_rule.rule if request.url_rule else request.path)
+
+        if elapsed_ms >= self.slow_query_ms:
+            entry = {
+                'at': time.time(),
+                'duration_ms': round(elapsed_ms, 2),
+                'endpoint': endpoint or 'cli',
+                'sql': statement[:MAX_SQL_LENGTH]
+            }
+            self.slow_queries.append(entry)
+            logger.warning('slow query %.1fms [%s] %s', elapsed_ms,
+                           entry['endpoint'], entry['sql'])
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self._endpoints.items())
+        return {'{} {}'.format(method, rule): {
+            'latency_ms': stats.latency.snapshot(),
+            'requests': dict(stats.requests),
+            'queries': stats.queries,
+            'query_ms': round(stats.query_ms, 3),
+            'serialize_ms': round(stats.serialize_ms, 3),
+            'response_bytes': stats.response_bytes
+        } for (method, rule), stats in items}
+
+    def prometheus(self):
+        """Métricas en formato de texto de Prometheus."""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+        lines = [
+            '# HELP http_request_duration_ms Request latency in milliseconds.',
+            '# TYPE http_request_duration_ms histogram'
+        ]
+        for (method, rule), stats in items:
+            labels = 'method="{}",endpoint="{}"'.format(method, _escape(rule))
+            snapshot = stats.latency.snapshot()
+            for bound, count in snapshot['buckets'].items():
+                lines.append('http_request_duration_ms_bucket{{{},le="{}"}} {}'.format(
+                    labels, bound, count))
+            lines.append('http_request_duration_ms_sum{{{}}} {}'.format(labels, snapshot['sum']))
+            lines.append('http_request_duration_ms_count{{{}}} {}'.format(labels, snapshot['count']))
+
+        counters = (
+            ('http_requests_total', 'Requests by status class.', None),
+            ('db_queries_total', 'SQL statements executed.', 'queries'),
+            ('db_query_duration_ms_total', 'Time spent in SQL statements.', 'query_ms'),
+            ('serialization_duration_ms_total', 'Time spent serializing JSON.', 'serialize_ms'),
+            ('http_response_bytes_total', 'Response body bytes.', 'response_bytes')
+        )
+        for name, help_text, attribute in counters:
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} counter'.format(name))
+            for (method, rule), stats in items:
+                labels = 'method="{}",endpoint="{}"'.format(method, _escape(rule))
+                if attribute is None:
+                    for status, count in sorted(stats.requests.items()):
+                        lines.append('{}{{{},status="{}"}} {}'.format(name, labels, status, count))
+                else:
+                    lines.append('{}{{{}}} {}'.format(
+                        name, labels, round(getattr(stats, attribute), 3)))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución: si la consulta falla no queda nada colgado
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start', None)
+    if started is not None:
+        request_metrics.record_query(
+            statement, (time.perf_counter() - started) * 1000)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,272 @@
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from .models import db, Job
+
+logger = logging.getLogger('api.jobs')
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+LOCK_TIMEOUT_SECONDS = 600
+MAX_ERROR_LENGTH = 2000
+
+
+class PermanentJobError(Exception):
+    """Fallo que no se arregla reintentando: el trabajo pasa a failed."""
+
+
+class Task:
+    def __init__(self, name, func, queue, max_attempts, max_concurrency):
+        self.name = name
+        self.func = func
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.max_concurrency = max_concurrency
+
+
+TASKS = {}
+
+
+def task(name, queue='default', max_attempts=5, max_concurrency=None):
+    """
+    Registra una función como tarea. max_concurrency limita cuántas se
+    ejecutan a la vez entre todos los workers (p. ej. por límites de una API).
+    El límite es exacto en PostgreSQL; en SQLite es aproximado (ver claim_jobs).
+    """
+    def decorator(func):
+        TASKS[name] = Task(name, func, queue, max_attempts, max_concurrency)
+        return func
+    return decorator
+
+
+def get_task(name):
+    if name not in TASKS:
+        # Las tareas se registran al importar tasks.py; así no depende de
+        # que quien encola (rutas, scripts) lo haya importado antes
+        from . import tasks  # noqa: F401
+    return TASKS.get(name)
+
+
+def enqueue(name, queue=None, delay=0, **payload):
+    """
+    Añade el trabajo a db.session sin hacer commit: se guarda (o se descarta)
+    junto con la transacción de la petición que lo origina.
+    """
+    registered = get_task(name)
+    if registered is None:
+        raise LookupError('Unknown task: ' + name)
+    job = Job(name=name, queue=queue or registered.queue, payload=payload,
+              status=PENDING, attempts=0, max_attempts=registered.max_attempts,
+              run_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(job)
+    return job
+
+
+def backoff_seconds(attempts):
+    """Exponencial con jitter: 10s, 20s, 40s... hasta una hora."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_jobs(worker_id, queues, limit):
+    """
+    Marca como running hasta limit trabajos listos. Cada uno se reclama con
+    un UPDATE condicional, así que dos workers nunca cogen el mismo; en
+    PostgreSQL además se saltan las filas bloqueadas (SKIP LOCKED) y el
+    recuento de max_concurrency se hace bajo un advisory lock.
+    """
+    now = datetime.utcnow()
+    candidates = db.session.query(Job.id, Job.name).filter(
+        Job.status == PENDING, Job.queue.in_(queues), Job.run_at <= now
+    ).order_by(Job.run_at, Job.id).limit(limit * 4)
+    if db.engine.dialect.name == 'postgresql':
+        candidates = candidates.with_for_update(skip_locked=True)
+    candidates = candidates.all()
+    if not candidates:
+        db.session.rollback()
+        return []
+
+    limited = {name for _, name in candidates
+               if name in TASKS and TASKS[name].max_concurrency}
+    running = {}
+    if limited:
+        # Contar y reclamar deben ser atómicos entre workers: en PostgreSQL un
+        # advisory lock por tarea (en orden, sin interbloqueos) hasta el commit.
+        # En SQLite no hay lock y dos workers pueden pasarse del límite a la vez
+        if db.engine.dialect.name == 'postgresql':
+            for name in sorted(limited):
+                db.session.execute(db.select(db.func.pg_advisory_xact_lock(
+                    db.func.hashtext('jobs.' + name))))
+        running = dict(db.session.query(Job.name, db.func.count(Job.id)).filter(
+            Job.status == RUNNING, Job.name.in_(limited)).group_by(Job.name))
+
+    claimed = []
+    for job_id, name in candidates:
+        max_concurrency = TASKS[name].max_concurrency if name in TASKS else None
+        if max_concurrency and running.get(name, 0) >= max_concurrency:
+            continue
+        result = db.session.execute(
+            db.update(Job).where(Job.id == job_id, Job.status == PENDING).values(
+                status=RUNNING, locked_by=worker_id, locked_at=now,
+                attempts=Job.attempts + 1
+            ).execution_options(synchronize_session=False))
+        if result.rowcount == 1:
+            claimed.append(job_id)
+            running[name] = running.get(name, 0) + 1
+            if len(claimed) >= limit:
+                break
+    db.session.commit()
+    return claimed
+
+
+def execute_job(job_id):
+    """Ejecuta un trabajo reclamado y guarda el resultado (hecho, reintento o fallo)."""
+    job = db.session.get(Job, job_id)
+    name, payload, attempts, max_attempts = job.name, job.payload, job.attempts, job.max_attempts
+    db.session.commit()
+
+    try:
+        registered = get_task(name)
+        if registered is None:
+            raise LookupError('Unknown task: ' + name)
+        registered.func(**(payload or {}))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        retry = attempts < max_attempts and not isinstance(e, PermanentJobError)
+        logger.warning('job %s (%s) failed on attempt %s/%s: %s',
+                       job_id, name, attempts, max_attempts, e)
+        values = {'status': PENDING if retry else FAILED,
+                  'last_error': '{}: {}'.format(type(e).__name__, e)[:MAX_ERROR_LENGTH],
+                  'locked_by': None, 'locked_at': None}
+        if retry:
+            values['run_at'] = datetime.utcnow() + timedelta(seconds=backoff_seconds(attempts))
+        else:
+            values['finished_at'] = datetime.utcnow()
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(**values))
+        db.session.commit()
+        return False
+
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+        status=DONE, finished_at=datetime.utcnow(), last_error=None,
+        locked_by=None, locked_at=None))
+    db.session.commit()
+    return True
+
+
+def heartbeat_jobs(worker_id, job_ids):
+    """
+    Renueva locked_at de los trabajos que este worker sigue ejecutando, para
+    que requeue_stale_jobs no relance en otro worker uno que solo es lento.
+    """
+    if not job_ids:
+        return 0
+    touched = db.session.execute(db.update(Job).where(
+        Job.id.in_(job_ids), Job.status == RUNNING, Job.locked_by == worker_id
+    ).values(locked_at=datetime.utcnow()).execution_options(
+        synchronize_session=False)).rowcount
+    db.session.commit()
+    return touched
+
+
+def requeue_stale_jobs(timeout=LOCK_TIMEOUT_SECONDS):
+    """
+    Devuelve a la cola los trabajos de workers que murieron a medias: los
+    que siguen vivos renuevan locked_at (heartbeat_jobs) cada lock_timeout / 4.
+    """
+    stale = Job.status == RUNNING, Job.locked_at < datetime.utcnow() - timedelta(seconds=timeout)
+    failed = db.session.execute(db.update(Job).where(
+        *stale, Job.attempts >= Job.max_attempts
+    ).values(status=FAILED, finished_at=datetime.utcnow(), locked_by=None,
+             last_error='Worker lock expired').execution_options(
+        synchronize_session=False)).rowcount
+    requeued = db.session.execute(db.update(Job).where(*stale).values(
+        status=PENDING, locked_by=None, locked_at=None
+    ).execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return requeued + failed
+
+
+def _run(app, job_id):
+    with app.app_context():
+        try:
+            execute_job(job_id)
+        except Exception:
+            logger.exception('job %s crashed the worker thread', job_id)
+            db.session.rollback()
+
+
+def run_worker(app, queues=('default',), concurrency=4, poll_interval=1.0,
+               burst=False, lock_timeout=LOCK_TIMEOUT_SECONDS, log=print):
+    """
+    Bucle del worker: reclama tantos trabajos como hilos libres tiene y los
+    ejecuta en paralelo. Con burst termina cuando la cola queda vacía.
+    SIGTERM/SIGINT dejan de reclamar y esperan a los trabajos en curso.
+    """
+    worker_id = '{}:{}'.format(socket.gethostname(), os.getpid())
+    stop = threading.Event()
+    try:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop.set())
+    except ValueError:
+        pass  # fuera del hilo principal no se pueden instalar señales
+
+    log('Worker', worker_id, 'queues', ','.join(queues), 'concurrency', concurrency)
+    processed = 0
+    running = {}
+    next_stale_check = datetime.utcnow()
+    heartbeat_interval = timedelta(seconds=lock_timeout / 4)
+    next_heartbeat = datetime.utcnow() + heartbeat_interval
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while not stop.is_set():
+            done = [future for future in running if future.done()]
+            processed += len(done)
+            for future in done:
+                del running[future]
+            claimed = []
+            with app.app_context():
+                if running and datetime.utcnow() >= next_heartbeat:
+                    heartbeat_jobs(worker_id, list(running.values()))
+                    next_heartbeat = datetime.utcnow() + heartbeat_interval
+                if datetime.utcnow() >= next_stale_check:
+                    requeue_stale_jobs(lock_timeout)
+                    next_stale_check = datetime.utcnow() + timedelta(seconds=60)
+                if len(running) < concurrency:
+                    claimed = claim_jobs(worker_id, queues, concurrency - len(running))
+            for job_id in claimed:
+                running[pool.submit(_run, app, job_id)] = job_id
+            if not claimed:
+                if burst and not running:
+                    break
+                if len(running) >= concurrency:
+                    wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    stop.wait(poll_interval)
+    processed += len(running)
+    log('Worker', worker_id, 'stopped after', processed, 'job(s)')
+    return processed
+
+
+def job_stats():
+    counts = {}
+    for queue, status, total in db.session.query(
+            Job.queue, Job.status, db.func.count(Job.id)).group_by(Job.queue, Job.status):
+        counts.setdefault(queue, {})[status] = total
+    oldest = db.session.query(db.func.min(Job.run_at)).filter(
+        Job.status == PENDING, Job.run_at <= datetime.utcnow()).scalar()
+    return {
+        'queues': counts,
+        # Cuánto lleva esperando el trabajo listo más antiguo
+        'lag_seconds': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0,
+        'tasks': sorted(TASKS)
+    }
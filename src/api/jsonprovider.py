@@ -0,0 +1,98 @@
+import re
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa el json de la stdlib
+    orjson = None
+
+
+NON_ASCII = re.compile('[^\x00-\x7f]')
+COMPACT_SEPARATORS = (',', ':')
+
+
+def _escape_char(match):
+    # Igual que json.dumps(ensure_ascii=True): \uXXXX en minúsculas y
+    # pares suplentes fuera del plano básico
+    code = ord(match.group())
+    if code < 0x10000:
+        return '\\u{:04x}'.format(code)
+    code -= 0x10000
+    return '\\u{:04x}\\u{:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+
+
+def escape_non_ascii(body):
+    return body if body.isascii() else NON_ASCII.sub(_escape_char, body)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask sobre orjson. Las fechas y los tipos que orjson
+    no conoce pasan por el default de Flask, ensure_ascii se aplica después
+    y solo se usa orjson con los formatos que sabe escribir (compacto o
+    indent=2); el resto de argumentos de dumps van a la stdlib. Diferencias
+    que quedan: NaN/Infinity salen como null y los enteros de más de 64
+    bits se delegan en la stdlib.
+    """
+
+    def _encode(self, obj, default=None, sort_keys=None, indent=None):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default or self.default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        ensure_ascii = kwargs.pop('ensure_ascii', self.ensure_ascii)
+        compact = indent is None and separators == COMPACT_SEPARATORS
+        pretty = indent == 2 and separators in (None, (',', ': '))
+        if (compact or pretty) and set(kwargs) <= {'default', 'sort_keys'}:
+            try:
+                body = self._encode(obj, kwargs.get('default'), kwargs.get('sort_keys'),
+                                    pretty).decode()
+                return escape_non_ascii(body) if ensure_ascii else body
+            except orjson.JSONEncodeError:
+                pass  # p. ej. enteros de más de 64 bits: los resuelve la stdlib
+        if indent is not None:
+            kwargs['indent'] = indent
+        if separators is not None:
+            kwargs['separators'] = separators
+        return super().dumps(obj, ensure_ascii=ensure_ascii, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = self._encode(obj, indent=indent)
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        # Bytes directamente, sin pasar por str salvo que haya que escapar
+        if self.ensure_ascii and not body.isascii():
+            body = escape_non_ascii(body.decode()).encode()
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def init_json_provider(app):
+    """
+    Elige el backend según JSON_BACKEND (auto usa orjson si está instalado).
+    Debe llamarse antes que cualquier init_app que envuelva app.json.
+    """
+    backend = app.config.get('JSON_BACKEND', 'auto')
+    if backend not in JSON_BACKENDS:
+        raise ValueError('JSON_BACKEND must be one of ' + ', '.join(JSON_BACKENDS))
+    if backend == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_BACKEND=orjson but orjson is not installed')
+    if backend != 'stdlib' and orjson is not None:
+        app.json = OrjsonProvider(app)
+    # Ordenar claves cuesta; se mantiene por defecto para no cambiar la salida
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', True)
+    return app.json
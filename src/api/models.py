@@ -3,8 +3,9 @@ from flask_migrate import Migrate
 import os
 from datetime import datetime
 import json
+from .replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -18,11 +19,13 @@ class User(db.Model):
     company_name = db.Column(db.String(100))
     role = db.Column(db.String(20), default='customer')  # customer, business
     is_active = db.Column(db.Boolean, default=True)
+    # Se sube al dar de baja o cambiar el rol: los tokens anteriores dejan de valer
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relaciones
     orders = db.relationship('Order', backref='user', lazy=True)
-    quotes = db.relationship('Quote', backref='user', lazy=True)
+    quotes = db.relationship('Quote', back_populates='user', lazy=True)
     addresses = db.relationship('Address', backref='user', lazy=True)
 
 
@@ -39,9 +42,46 @@ class Product(db.Model):
     is_eco_friendly = db.Column(db.Boolean, default=True)
     features = db.Column(db.JSON)
     specifications = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
 
+    # Índices parciales sobre productos activos, en el orden del listado
+    # paginado (created_at DESC, id DESC) de GET /products
+    __table_args__ = (
+        db.Index('ix_product_active_created', 'created_at', 'id',
+                 postgresql_where=db.text('is_active'),
+                 sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_product_active_category', 'category', 'created_at', 'id',
+                 postgresql_where=db.text('is_active'),
+                 sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_product_active_type', 'product_type', 'created_at', 'id',
+                 postgresql_where=db.text('is_active'),
+                 sqlite_where=db.text('is_active = 1')),
+    )
+
+
+class ProductAttribute(db.Model):
+    """
+    Copia indexada de las specifications (source='spec') y de las opciones
+    de features (source='feature') de cada producto, para filtrar y contar
+    facetas en SQL sin abrir el JSON.
+    """
+    __tablename__ = 'product_attribute'
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey(
+        'product.id', ondelete='CASCADE'), nullable=False, index=True)
+    source = db.Column(db.String(10), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+    value_text = db.Column(db.String(200))
+    value_num = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_product_attribute_num', 'source', 'key', 'value_num'),
+        db.Index('ix_product_attribute_text', 'source', 'key', 'value_text'),
+    )
+
 
 class Quote(db.Model):
     __tablename__ = 'quote'
@@ -57,13 +97,22 @@ class Quote(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     product = db.relationship('Product', backref='quotes')
-    user = db.relationship('User', backref='quotes')
+    user = db.relationship('User', back_populates='quotes')
+
+    __table_args__ = (
+        db.Index('ix_quote_status_created_at', 'status', 'created_at'),
+        db.Index('ix_quote_product_id', 'product_id'),
+        db.Index('ix_quote_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_quote_created_at', 'created_at'),
+        db.Index('ix_quote_updated_at', 'updated_at'),
+    )
 
 
 class QuoteItem(db.Model):
     __tablename__ = 'quote_item'
     id = db.Column(db.Integer, primary_key=True)
-    quote_id = db.Column(db.Integer, db.ForeignKey('quote.id'), nullable=False)
+    quote_id = db.Column(db.Integer, db.ForeignKey(
+        'quote.id'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey(
         'product.id'), nullable=False)
     feature_name = db.Column(db.String(100))
@@ -74,22 +123,33 @@ class QuoteItem(db.Model):
 class Order(db.Model):
     __tablename__ = 'order'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        'user.id'), nullable=False, index=True)
     total_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(50), default='pending')
     stripe_payment_intent_id = db.Column(db.String(100))
     shipping_address = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        index=True)
+    # Fin de la reserva de stock mientras status == 'reserved'
+    reserved_until = db.Column(db.DateTime)
 
     items = db.relationship('OrderItem', backref='order', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_order_status_reserved_until', 'status', 'reserved_until'),
+    )
+
 
 class OrderItem(db.Model):
     __tablename__ = 'order_item'
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey(
+        'order.id'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey(
-        'product.id'), nullable=False)
+        'product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
     customization = db.Column(db.JSON)
@@ -98,7 +158,8 @@ class OrderItem(db.Model):
 class Address(db.Model):
     __tablename__ = 'address'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey(
+        'user.id'), nullable=False, index=True)
     street = db.Column(db.String(200), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(100), nullable=False)
@@ -110,10 +171,51 @@ class Address(db.Model):
 class Analytics(db.Model):
     __tablename__ = 'analytics'
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, unique=True)
     total_sales = db.Column(db.Float, default=0)
     total_orders = db.Column(db.Integer, default=0)
     total_quotes = db.Column(db.Integer, default=0)
+    pending_quotes = db.Column(db.Integer, default=0)
+    # {product_id: {'quotes': n, 'sales': total}}
     popular_products = db.Column(db.JSON)
     customer_segments = db.Column(db.JSON)
+    # {category: n} pedidos con al menos un artículo de esa categoría
+    orders_by_category = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Momento del rollup que escribió la fila; marca de agua del siguiente
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Job(db.Model):
+    """
+    Trabajo pendiente (outbox). Se inserta en la misma transacción que los
+    datos que lo originan y lo ejecuta `flask jobs-worker` después.
+    """
+    __tablename__ = 'job'
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(50), nullable=False, default='default')
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_status_queue_run_at', 'status', 'queue', 'run_at'),
+    )
+
+
+class CacheVersion(db.Model):
+    """
+    Versión compartida de una caché en memoria. Todos los workers la leen
+    (con un TTL de un segundo) para saber cuándo dejar de usar sus entradas.
+    """
+    __tablename__ = 'cache_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from .models import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT, name='limit'):
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError(name + ' must be an integer')
+    if limit < 1:
+        raise ValueError(name + ' must be greater than 0')
+    return min(limit, maximum)
+
+
+def parse_page(value):
+    try:
+        page = int(value) if value is not None else 1
+    except (TypeError, ValueError):
+        raise ValueError('page must be an integer')
+    if page < 1:
+        raise ValueError('page must be greater than 0')
+    return page
+
+
+def parse_id(value, name):
+    """Id opcional de un filtro (?product_id=); None si no viene."""
+    if value is None or value == '':
+        return None
+    try:
+        row_id = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(name + ' must be an integer')
+    if row_id < 1:
+        raise ValueError(name + ' must be greater than 0')
+    return row_id
+
+
+def parse_date_bound(value, end=False):
+    """Acepta YYYY-MM-DD o ISO 8601; una fecha sola como fin incluye todo el día."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError('Invalid date: ' + value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, row_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def apply_keyset(query, created_col, id_col, cursor):
+    """
+    Ordena por (created_at DESC, id DESC) y continúa después del cursor.
+    created_at es NOT NULL, así que el orden coincide con el índice.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            created_col < created_at,
+            db.and_(created_col == created_at, id_col < row_id)
+        ))
+    return query.order_by(created_col.desc(), id_col.desc())
+
+
+def keyset_query(query, created_col, id_col, cursor, limit):
+    """La consulta de keyset_page: limit + 1 filas para saber si hay más."""
+    return apply_keyset(query, created_col, id_col, cursor).limit(limit + 1)
+
+
+def keyset_page(query, created_col, id_col, cursor, limit):
+    """Devuelve (rows, next_cursor) pidiendo limit + 1 filas para saber si hay más."""
+    rows = keyset_query(query, created_col, id_col, cursor, limit).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
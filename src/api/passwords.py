@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+import bcrypt
+from .metrics import Histogram
+
+
+class HasherBusy(Exception):
+    """La cola del pool de hashing está llena; el cliente debe reintentar."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de procesos acotado para no bloquear los
+    workers de gunicorn. Con PASSWORD_HASH_WORKERS=0 se ejecuta en línea.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 2
+        self.max_pending = 32
+        self.timeout = 10
+        self._pool = None
+        self._pool_pid = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._dummy = None
+        self.latency = {'hash': Histogram(), 'verify': Histogram()}
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', 32)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['password_hasher'] = self
+
+    def _executor(self):
+        # El pool se crea en cada proceso después del fork de gunicorn
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _release_slot(self, future=None):
+        self._slots.release()
+
+    def _run(self, operation, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy('Password hashing queue is full')
+        started = time.perf_counter()
+        try:
+            if not self.workers:
+                try:
+                    return fn(*args)
+                finally:
+                    self._release_slot()
+            try:
+                future = self._executor().submit(fn, *args)
+            except Exception:
+                self._release_slot()
+                raise
+            # El hueco se libera cuando el hijo termina de verdad, no al
+            # vencer la espera: si no, un hash lento seguiría ocupando un
+            # proceso mientras se aceptan más peticiones de las que caben
+            future.add_done_callback(self._release_slot)
+            try:
+                return future.result(self.timeout)
+            except FuturesTimeout:
+                # Si aún no había empezado se descarta y libera el hueco ya
+                future.cancel()
+                raise HasherBusy('Password hashing timed out')
+        finally:
+            self.latency[operation].observe(
+                (time.perf_counter() - started) * 1000)
+
+    def hash_password(self, password):
+        return self._run(
+            'hash', _hash, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify_password(self, password, hashed):
+        try:
+            return self._run('verify', _check, password.encode('utf-8'),
+                             hashed.encode('utf-8'))
+        except ValueError:
+            # Hash guardado con un formato que bcrypt no reconoce
+            return False
+
+    def dummy_hash(self):
+        """Hash fijo con el coste actual, para verificar emails desconocidos."""
+        with self._lock:
+            if self._dummy is None or self.needs_rehash(self._dummy):
+                self._dummy = _hash(os.urandom(16), self.rounds).decode('utf-8')
+            return self._dummy
+
+    def needs_rehash(self, hashed):
+        # Formato $2b$12$...: el segundo campo es el coste
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def stats(self):
+        return {
+            'rounds': self.rounds,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'latency_ms': {op: h.snapshot() for op, h in self.latency.items()}
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,85 @@
+from .models import db, Product
+from .cache import catalog_cache
+
+
+class PricingError(Exception):
+    def __init__(self, errors):
+        Exception.__init__(self, '; '.join(errors))
+        self.errors = errors
+
+
+def compile_price_table(product):
+    """
+    Aplana product.features ({feature: {option: {'additional_cost': x}}})
+    en {feature: {option: coste}}. Las features que no son un dict de
+    opciones no tienen precio y no se pueden personalizar.
+    """
+    options = {}
+    for feature, feature_options in (product.features or {}).items():
+        if isinstance(feature_options, dict):
+            options[feature] = {
+                option: (details.get('additional_cost', 0) or 0)
+                if isinstance(details, dict) else 0
+                for option, details in feature_options.items()
+            }
+    return {'product_id': product.id, 'base_price': product.price,
+            'options': options}
+
+
+def get_price_tables(product_ids):
+    """
+    Tablas de precios por id. Las que no están en la caché del catálogo se
+    compilan con una sola consulta IN; update_product las invalida al
+    subir la versión del catálogo.
+    """
+    tables = {}
+    missing = []
+    version = catalog_cache.version
+    for product_id in set(product_ids):
+        table = catalog_cache.get('pricing', (product_id,), version)
+        if table is None:
+            missing.append(product_id)
+        else:
+            tables[product_id] = table
+
+    if missing:
+        for product in Product.query.options(
+                db.load_only(Product.id, Product.price, Product.features)
+        ).filter(Product.id.in_(missing)):
+            table = compile_price_table(product)
+            catalog_cache.set('pricing', (product.id,), table, version)
+            tables[product.id] = table
+    return tables
+
+
+def get_price_table(product_id):
+    product_id = int(product_id)
+    return get_price_tables([product_id]).get(product_id)
+
+
+def price_configuration(table, customization):
+    """Valida la personalización contra la tabla y devuelve el desglose."""
+    if customization is None:
+        customization = {}
+    if not isinstance(customization, dict):
+        raise PricingError(['customization must be an object'])
+
+    errors = []
+    additional_cost = 0
+    for feature, option in customization.items():
+        feature_options = table['options'].get(feature)
+        if feature_options is None:
+            errors.append("Unknown feature '{}'".format(feature))
+        elif not isinstance(option, str) or option not in feature_options:
+            errors.append("Invalid option '{}' for feature '{}'".format(
+                option, feature))
+        else:
+            additional_cost += feature_options[option]
+    if errors:
+        raise PricingError(errors)
+
+    return {
+        'base_price': table['base_price'],
+        'additional_cost': additional_cost,
+        'total_price': table['base_price'] + additional_cost
+    }
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+from .models import db, Product, Quote, Order
+from .pagination import keyset_query, encode_cursor
+from .checkout import expired_reservations_query
+from .facets import facet_counts_query
+from .rollups import changed_days_query
+from .routes.products import PRODUCT_FIELDS, product_columns, active_products_query
+from .routes.business import (business_products_query, business_quotes_query,
+                              business_quotes_page_query, quote_ordering)
+from .routes.quotes import user_quotes_query
+
+
+def hot_queries():
+    """
+    Consultas de las rutas más usadas, construidas con las mismas funciones
+    que usan las rutas (con parámetros de ejemplo), para que un cambio en
+    una ruta se refleje aquí.
+    """
+    now = datetime.utcnow()
+    columns = product_columns(list(PRODUCT_FIELDS))
+
+    def product_page(cursor=None, **filters):
+        return keyset_query(active_products_query(*columns, **filters),
+                            Product.created_at, Product.id, cursor, 50)
+
+    newest_quotes = quote_ordering('-created_at')
+    return {
+        'products.list': product_page(),
+        'products.list_cursor': product_page(encode_cursor(now, 1000)),
+        'products.by_category': product_page(category='cars'),
+        'products.by_type': product_page(product_type='suv'),
+        'products.facet_filter': product_page(
+            facet_filters=[('spec', 'seats', 'gte', '5')]),
+        'products.facet_counts': facet_counts_query(
+            active_products_query(Product.id, category='cars').statement,
+            ['spec.seats', 'feature.color']),
+        'business.products': business_products_query(),
+        'quotes.by_user': user_quotes_query(1),
+        'quotes.by_status': business_quotes_page_query(
+            business_quotes_query(status='pending'), newest_quotes, 1, 50),
+        'quotes.by_product': business_quotes_query(product_id=1).with_entities(
+            db.func.count(Quote.id)),
+        'quotes.by_customer': business_quotes_page_query(
+            business_quotes_query(customer_id=1), newest_quotes, 1, 50),
+        'quotes.changed_since': changed_days_query(Quote, now),
+        'orders.changed_since': changed_days_query(Order, now),
+        'orders.expired_reservations': expired_reservations_query(now, 500),
+    }
+
+
+def _compile(query):
+    return str(query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def explain(query):
+    """Plan de ejecución como lista de líneas de texto."""
+    sql = _compile(query)
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        rows = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql))
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        # Con tablas pequeñas el planner prefiere el seq scan; aquí solo
+        # interesa saber si existe un índice que pueda usar
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+        plan = db.session.execute(db.text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines = []
+
+        def walk(node):
+            lines.append('{} {}'.format(node['Node Type'], node.get('Relation Name', '')).strip())
+            for child in node.get('Plans', []):
+                walk(child)
+        walk(plan[0]['Plan'])
+        return lines
+    raise ValueError('EXPLAIN not supported for ' + dialect)
+
+
+def is_full_scan(line):
+    if line.startswith('Seq Scan'):
+        return True
+    # SQLite: "SCAN quote" es un recorrido completo; "SCAN x USING INDEX" no
+    return (line.startswith('SCAN ') and 'USING' not in line
+            and 'VIRTUAL TABLE' not in line)
+
+
+def check_query_plans():
+    """{nombre: (plan, hay_full_scan)} para cada consulta caliente."""
+    results = {}
+    for name, query in hot_queries().items():
+        plan = explain(query)
+        results[name] = (plan, any(is_full_scan(line) for line in plan))
+    db.session.rollback()
+    return results
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class _LocalStore:
+    """Estado en memoria del proceso, con límite de claves (LRU)."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+
+class LoginLimiter:
+    """
+    Token buckets por IP y por email para /api/login, más bloqueo
+    exponencial tras fallos consecutivos. Todo se comprueba antes de tocar
+    la base de datos o bcrypt.
+
+    El backend compartido es opcional y debe ofrecer get(key) y
+    set(key, value, ttl) con valores str, igual que el de api.cache.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ip_capacity = 20
+        self.ip_refill_per_sec = 20 / 60
+        self.email_capacity = 5
+        self.email_refill_per_sec = 5 / 60
+        self.lockout_threshold = 3
+        self.lockout_base = 1
+        self.lockout_max = 900
+        self.backend = None
+        self._local = _LocalStore()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def init_app(self, app, backend=None):
+        self.enabled = app.config.get('LOGIN_RATE_LIMIT_ENABLED', True)
+        self.ip_capacity = app.config.get('LOGIN_RATE_PER_IP', 20)
+        self.ip_refill_per_sec = self.ip_capacity / 60
+        self.email_capacity = app.config.get('LOGIN_RATE_PER_EMAIL', 5)
+        self.email_refill_per_sec = self.email_capacity / 60
+        self.lockout_threshold = app.config.get('LOGIN_LOCKOUT_THRESHOLD', 3)
+        self.lockout_base = app.config.get('LOGIN_LOCKOUT_BASE', 1)
+        self.lockout_max = app.config.get('LOGIN_LOCKOUT_MAX', 900)
+        self.backend = backend
+        app.extensions['login_limiter'] = self
+
+    def _get(self, key):
+        if self.backend is not None:
+            raw = self.backend.get(key)
+            return json.loads(raw) if raw is not None else None
+        return self._local.get(key)
+
+    def _set(self, key, value, ttl):
+        if self.backend is not None:
+            self.backend.set(key, json.dumps(value), int(ttl) + 1)
+        else:
+            self._local.set(key, value, ttl)
+
+    def _take(self, key, capacity, refill_per_sec, now):
+        """Consume un token; devuelve los segundos de espera si no queda ninguno."""
+        state = self._get(key) or {'tokens': capacity, 'at': now}
+        tokens = min(capacity, state['tokens'] + (now - state['at']) * refill_per_sec)
+        if tokens < 1:
+            self._set(key, {'tokens': tokens, 'at': now}, capacity / refill_per_sec)
+            return (1 - tokens) / refill_per_sec
+        self._set(key, {'tokens': tokens - 1, 'at': now}, capacity / refill_per_sec)
+        return None
+
+    def check(self, ip, email):
+        """Devuelve None si el intento puede seguir o los segundos de Retry-After."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            lockout = self._get('login:lock:' + email)
+            if lockout and lockout.get('until', 0) > now:
+                self.rejected += 1
+                return lockout['until'] - now
+
+            for key, capacity, rate in (
+                    ('login:ip:' + ip, self.ip_capacity, self.ip_refill_per_sec),
+                    ('login:email:' + email, self.email_capacity, self.email_refill_per_sec)):
+                wait = self._take(key, capacity, rate, now)
+                if wait is not None:
+                    self.rejected += 1
+                    return wait
+        return None
+
+    def record_failure(self, email):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            state = self._get('login:lock:' + email) or {'failures': 0, 'until': 0}
+            state['failures'] += 1
+            excess = state['failures'] - self.lockout_threshold
+            if excess >= 0:
+                state['until'] = now + min(
+                    self.lockout_max, self.lockout_base * 2 ** excess)
+            self._set('login:lock:' + email, state, self.lockout_max)
+
+    def record_success(self, email):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._set('login:lock:' + email, {'failures': 0, 'until': 0}, 1)
+
+    def stats(self):
+        return {'enabled': self.enabled, 'rejected': self.rejected,
+                'shared_backend': self.backend is not None}
+
+
+login_limiter = LoginLimiter()
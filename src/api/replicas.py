@@ -0,0 +1,210 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+READ_METHODS = ('GET', 'HEAD')
+STICKY_COOKIE = 'db_primary_until'
+STICKY_HEADER = 'X-DB-Primary-Until'
+MAX_STICKY_IDENTITIES = 100000
+
+
+def _request_identity():
+    """Usuario del JWT si la ruta ya lo verificó; None en rutas públicas."""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+class ReplicaRouter:
+    """
+    Reparte las lecturas de las peticiones GET/HEAD entre las réplicas de
+    DATABASE_REPLICA_URLS. Las escrituras, la CLI y los clientes que acaban
+    de escribir siguen usando el primario durante unos segundos.
+
+    Quién acaba de escribir se reconoce por el usuario del JWT (en este
+    proceso), por la cookie o por la cabecera X-DB-Primary-Until, que se
+    devuelve tras cada escritura para los clientes de otro origen que no
+    envían cookies y que pueden reenviarla tal cual.
+    """
+
+    def __init__(self, app=None):
+        self.engines = []
+        self.sticky_seconds = 5
+        self.retry_seconds = 30
+        self.replica_reads = 0
+        self.fallback_reads = 0
+        self._next = 0
+        self._down_until = {}
+        self._sticky_identities = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        urls = app.config.get('DATABASE_REPLICA_URLS') or []
+        if isinstance(urls, str):
+            urls = [url.strip() for url in urls.split(',') if url.strip()]
+        self.sticky_seconds = app.config.get('DATABASE_REPLICA_STICKY_SECONDS', 5)
+        self.retry_seconds = app.config.get('DATABASE_REPLICA_RETRY_SECONDS', 30)
+
+        # Mismas opciones de pool que el primario, sin las métricas del primario
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        options.pop('poolclass', None)
+        self.engines = [create_engine(url, **options) for url in urls]
+        for engine in self.engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+        app.extensions['replica_router'] = self
+        app.after_request(self._set_sticky)
+
+    @property
+    def enabled(self):
+        return bool(self.engines)
+
+    def _on_error(self, context):
+        # Réplica caída: se saca del reparto durante retry_seconds
+        if context.is_disconnect and context.engine is not None:
+            with self._lock:
+                self._down_until[context.engine] = time.time() + self.retry_seconds
+
+    def _healthy(self):
+        now = time.time()
+        return [e for e in self.engines if self._down_until.get(e, 0) <= now]
+
+    def wants_replica(self, clause=None):
+        if not self.enabled or not has_request_context():
+            return False
+        if request.method not in READ_METHODS or g.get('_db_primary'):
+            return False
+        if getattr(clause, 'is_dml', False):
+            return False
+        return self._sticky_until() < time.time()
+
+    def _sticky_until(self):
+        until = 0
+        for value in (request.cookies.get(STICKY_COOKIE), request.headers.get(STICKY_HEADER)):
+            try:
+                until = max(until, float(value or 0))
+            except ValueError:
+                pass
+        # La cabecera la pone el cliente: no puede fijar más que la ventana normal
+        until = min(until, time.time() + self.sticky_seconds)
+        identity = _request_identity()
+        if identity is not None:
+            until = max(until, self._sticky_identities.get(str(identity), 0))
+        return until
+
+    def replica(self):
+        """Réplica de la petición actual (una por petición, en round robin)."""
+        engine = g.get('_db_replica')
+        if engine is not None and self._down_until.get(engine, 0) <= time.time():
+            return engine
+        healthy = self._healthy()
+        if not healthy:
+            return None
+        with self._lock:
+            engine = healthy[self._next % len(healthy)]
+            self._next += 1
+        g._db_replica = engine
+        return engine
+
+    def count_read(self, replica):
+        with self._lock:
+            if replica:
+                self.replica_reads += 1
+            else:
+                self.fallback_reads += 1
+
+    def mark_write(self):
+        if has_request_context():
+            g._db_wrote = True
+
+    def _remember_identity(self, identity, until):
+        now = time.time()
+        with self._lock:
+            if len(self._sticky_identities) >= MAX_STICKY_IDENTITIES:
+                self._sticky_identities = {
+                    k: v for k, v in self._sticky_identities.items() if v > now}
+            self._sticky_identities[str(identity)] = until
+
+    def _set_sticky(self, response):
+        if self.enabled and self.sticky_seconds and g.get('_db_wrote'):
+            until = int(time.time() + self.sticky_seconds)
+            response.set_cookie(
+                STICKY_COOKIE, str(until),
+                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+            response.headers[STICKY_HEADER] = str(until)
+            identity = _request_identity()
+            if identity is not None:
+                self._remember_identity(identity, until)
+        return response
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'replicas': [{
+                    'url': engine.url.render_as_string(hide_password=True),
+                    'healthy': self._down_until.get(engine, 0) <= now
+                } for engine in self.engines],
+                'sticky_seconds': self.sticky_seconds,
+                'replica_reads': self.replica_reads,
+                # Lecturas que iban a réplica pero acabaron en el primario
+                'fallback_reads': self.fallback_reads
+            }
+
+
+replica_router = ReplicaRouter()
+
+
+@contextmanager
+def primary_reads():
+    """Fuerza las lecturas de este bloque al primario (read-your-writes)."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('_db_primary')
+    g._db_primary = True
+    try:
+        yield
+    finally:
+        g._db_primary = previous
+
+
+def use_primary(view):
+    """Decorador para rutas GET que necesitan leer del primario."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with primary_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que envía las lecturas de GET a una réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_router.wants_replica(clause):
+            engine = replica_router.replica()
+            replica_router.count_read(engine is not None)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    replica_router.mark_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        replica_router.mark_write()
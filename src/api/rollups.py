@@ -0,0 +1,236 @@
+from datetime import date, datetime, timedelta
+from .models import db, Quote, Order, OrderItem, Product, User, Analytics
+from .checkout import UNPLACED_ORDER_STATUSES
+
+
+def _as_date(value):
+    # func.date devuelve str en SQLite y date en PostgreSQL
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _empty_day():
+    return {
+        'total_sales': 0,
+        'total_orders': 0,
+        'total_quotes': 0,
+        'pending_quotes': 0,
+        'popular_products': {},
+        'customer_segments': {'company': 0, 'individual': 0},
+        'orders_by_category': {}
+    }
+
+
+def compute_days(start, end=None):
+    """
+    Agrega quotes y orders creados en [start, end) por día con consultas
+    agrupadas. Devuelve {date: métricas} con el mismo formato que Analytics.
+    """
+    def in_range(query, column):
+        query = query.filter(column >= start)
+        if column is Order.created_at:
+            # Las reservas de stock sin confirmar no son pedidos
+            query = query.filter(Order.status.notin_(UNPLACED_ORDER_STATUSES))
+        return query.filter(column < end) if end else query
+
+    days = {}
+
+    def day(value):
+        return days.setdefault(_as_date(value), _empty_day())
+
+    quote_day = db.func.date(Quote.created_at)
+    approved = db.case((Quote.status == 'approved', Quote.total_price), else_=0)
+    pending = db.case((Quote.status == 'pending', 1), else_=0)
+
+    for d, product_id, quotes, sales, pending_count in in_range(db.session.query(
+            quote_day, Quote.product_id, db.func.count(Quote.id),
+            db.func.sum(approved), db.func.sum(pending)
+    ), Quote.created_at).group_by(quote_day, Quote.product_id):
+        metrics = day(d)
+        metrics['total_quotes'] += quotes
+        metrics['total_sales'] += sales or 0
+        metrics['pending_quotes'] += pending_count or 0
+        metrics['popular_products'][str(product_id)] = {
+            'quotes': quotes, 'sales': sales or 0}
+
+    is_company = db.func.coalesce(User.company_name, '') != ''
+    for d, company, quotes in in_range(db.session.query(
+            quote_day, is_company, db.func.count(Quote.id)
+    ).join(User, Quote.user_id == User.id), Quote.created_at).group_by(
+            quote_day, is_company):
+        day(d)['customer_segments']['company' if company else 'individual'] += quotes
+
+    order_day = db.func.date(Order.created_at)
+    for d, orders in in_range(db.session.query(
+            order_day, db.func.count(Order.id)
+    ), Order.created_at).group_by(order_day):
+        day(d)['total_orders'] += orders
+
+    for d, category, orders in in_range(db.session.query(
+            order_day, Product.category, db.func.count(db.distinct(Order.id))
+    ).join(OrderItem, OrderItem.order_id == Order.id).join(
+            Product, OrderItem.product_id == Product.id
+    ), Order.created_at).group_by(order_day, Product.category):
+        day(d)['orders_by_category'][category] = orders
+
+    return days
+
+
+def merge_days(rows):
+    """Suma varias métricas diarias (filas de Analytics o dicts) en una sola."""
+    total = _empty_day()
+    for row in rows:
+        get = row.get if isinstance(row, dict) else (
+            lambda key, row=row: getattr(row, key))
+        for key in ('total_sales', 'total_orders', 'total_quotes', 'pending_quotes'):
+            total[key] += get(key) or 0
+        for product_id, counts in (get('popular_products') or {}).items():
+            merged = total['popular_products'].setdefault(
+                product_id, {'quotes': 0, 'sales': 0})
+            merged['quotes'] += counts['quotes']
+            merged['sales'] += counts['sales']
+        for key in ('customer_segments', 'orders_by_category'):
+            for name, count in (get(key) or {}).items():
+                total[key][name] = total[key].get(name, 0) + count
+    return total
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def daily_metrics(date_from, date_to):
+    """
+    Métricas diarias entre date_from y date_to (incluidos): filas de
+    Analytics para los días consolidados y cálculo en vivo para el resto.
+    """
+    days = {row.date: row for row in Analytics.query.filter(
+        Analytics.date >= date_from, Analytics.date <= date_to)}
+
+    last_day = last_rolled_up_day()
+    live_from = max(date_from, last_day + timedelta(days=1)) if last_day else date_from
+    if live_from <= date_to:
+        days.update(compute_days(
+            datetime.combine(live_from, datetime.min.time()),
+            datetime.combine(date_to + timedelta(days=1), datetime.min.time())))
+    return days
+
+
+def last_rolled_up_day():
+    return db.session.query(db.func.max(Analytics.date)).scalar()
+
+
+def first_activity_day():
+    """Día del primer quote u order (MIN sobre created_at, indexado), o None."""
+    first = min(filter(None, (db.session.query(db.func.min(Quote.created_at)).scalar(),
+                              db.session.query(db.func.min(Order.created_at)).scalar())),
+                default=None)
+    return first.date() if first else None
+
+
+def changed_days_query(model, since):
+    """Días (de created_at) con filas de model creadas o modificadas desde since."""
+    created_day = db.func.date(model.created_at)
+    return db.session.query(created_day).filter(model.updated_at >= since).distinct()
+
+
+def _changed_days(since):
+    days = set()
+    for model in (Quote, Order):
+        days.update(_as_date(d) for (d,) in changed_days_query(model, since))
+    return days
+
+
+def _contiguous_ranges(days):
+    ranges = []
+    for d in days:
+        if ranges and d == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = d
+        else:
+            ranges.append([d, d])
+    return ranges
+
+
+def rollup_analytics(full=False):
+    """
+    Actualiza las filas diarias de Analytics. Solo recalcula los días con
+    quotes/orders nuevos o modificados desde el último rollup, más los días
+    completos que aún no tienen fila. El día de hoy nunca se consolida; lo
+    cubre el delta en vivo del endpoint.
+    """
+    run_started = datetime.utcnow()
+    today = run_started.date()
+
+    watermark = None if full else db.session.query(
+        db.func.max(Analytics.updated_at)).scalar()
+
+    if watermark is None:
+        start = first_activity_day()
+        if start is None:
+            return 0
+        days = {start + timedelta(days=i) for i in range((today - start).days)}
+    else:
+        days = _changed_days(watermark)
+        last = last_rolled_up_day()
+        if last is not None:
+            days.update(last + timedelta(days=i)
+                        for i in range(1, (today - last).days))
+
+    days = sorted(d for d in days if d < today)
+    if not days:
+        return 0
+
+    # Un rango por cada tramo de días consecutivos
+    computed = {}
+    for first, last in _contiguous_ranges(days):
+        computed.update(compute_days(
+            datetime.combine(first, datetime.min.time()),
+            datetime.combine(last + timedelta(days=1), datetime.min.time())))
+    existing = {row.date: row for row in Analytics.query.filter(
+        Analytics.date.in_(days))}
+
+    for d in days:
+        row = existing.get(d)
+        if row is None:
+            row = Analytics(date=d)
+            db.session.add(row)
+        for key, value in computed.get(d, _empty_day()).items():
+            setattr(row, key, value)
+        row.updated_at = run_started
+
+    db.session.commit()
+    return len(days)
+
+
+def backfill_orders_by_category():
+    """
+    Rellena orders_by_category en las filas de Analytics anteriores a esa
+    columna (NULL), con el mismo cálculo que el rollup. No toca el resto
+    de métricas de esas filas.
+    """
+    rows = {row.date: row for row in Analytics.query.filter(
+        Analytics.orders_by_category.is_(None))}
+    if not rows:
+        return 0
+
+    computed = {}
+    for first, last in _contiguous_ranges(sorted(rows)):
+        computed.update(compute_days(
+            datetime.combine(first, datetime.min.time()),
+            datetime.combine(last + timedelta(days=1), datetime.min.time())))
+    for d, row in rows.items():
+        row.orders_by_category = computed.get(d, _empty_day())['orders_by_category']
+
+    db.session.commit()
+    return len(rows)
@@ -1,19 +1,27 @@
-from .routes.products import setup_products_routes
-from .routes.quotes import setup_quotes_routes
-from .routes.customers import setup_customers_routes
-from .routes.business import setup_business_routes
-from .routes.analytics import setup_analytics_routes
+from flask import Blueprint, jsonify
+from flask_cors import CORS
+from .auth import setup_auth_routes
+from .products import setup_products_routes
+from .quotes import setup_quotes_routes
+from .customers import setup_customers_routes
+from .business import setup_business_routes
+from .analytics import setup_analytics_routes
+from .orders import setup_orders_routes
+from .system import setup_system_routes
 
 api = Blueprint('api', __name__)
 
 
 def setup_routes(app):
     # Registrar todas las rutas
+    setup_auth_routes(app)
     setup_products_routes(app)
     setup_quotes_routes(app)
     setup_customers_routes(app)
     setup_business_routes(app)
     setup_analytics_routes(app)
+    setup_orders_routes(app)
+    setup_system_routes(app)
 
 
 # Allow CORS requests to this API
@@ -1,51 +1,153 @@
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, User, Product, Quote
-from datetime import datetime, timedelta
+from flask import current_app, request, jsonify
+from ..models import db, Product, Quote, Analytics
+from ..identity import business_required
+from ..pagination import parse_id
+from ..rollups import (compute_days, merge_days, last_rolled_up_day, first_activity_day,
+                       daily_metrics, bucket_start, next_bucket)
+from datetime import date, datetime, timedelta
+
+TIMESERIES_METRICS = {
+    'sales': 'total_sales',
+    'quotes': 'total_quotes',
+    'orders': 'total_orders'
+}
+TIMESERIES_BUCKETS = ('day', 'week', 'month')
+DEFAULT_MAX_RANGE_DAYS = 366
 
 
 def setup_analytics_routes(app):
 
     @app.route('/analytics/overview', methods=['GET'])
-    @jwt_required()
+    @business_required
     def get_analytics_overview():
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-
-            if not user or user.role != 'business':
-                return jsonify({'error': 'Unauthorized'}), 403
+            # ?popular_days=N limita los productos populares a los últimos N
+            # días; sin él son de todo el histórico, como los totales
+            try:
+                popular_days = parse_id(request.args.get('popular_days'), 'popular_days')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
 
-            # Estadísticas básicas
             total_products = Product.query.filter_by(is_active=True).count()
-            total_quotes = Quote.query.count()
-            pending_quotes = Quote.query.filter_by(status='pending').count()
-
-            # Ventas totales
-            total_sales = db.session.query(db.func.sum(Quote.total_price)).filter(
-                Quote.status == 'approved'
-            ).scalar() or 0
-
-            # Productos más populares
-            popular_products = db.session.query(
-                Product.name,
-                db.func.count(Quote.id).label('quote_count')
-            ).join(Quote).group_by(Product.id).order_by(
-                db.func.count(Quote.id).desc()
-            ).limit(5).all()
+
+            # Días ya consolidados (sumados en SQL) + delta en vivo desde el día siguiente
+            today = datetime.utcnow().date()
+            last_day = last_rolled_up_day()
+            if last_day is None:
+                # Sin rollup el delta en vivo sería un recorrido de las tablas
+                # completas en cada petición: solo se permite si todo es de hoy
+                if first_activity_day() not in (None, today):
+                    return jsonify({'error': 'Analytics are not rolled up yet, '
+                                             'run flask rollup-analytics'}), 503
+                last_day = today - timedelta(days=1)
+            live = compute_days(datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+            rolled_up = db.session.query(
+                db.func.coalesce(db.func.sum(Analytics.total_quotes), 0).label('total_quotes'),
+                db.func.coalesce(db.func.sum(Analytics.pending_quotes), 0).label('pending_quotes'),
+                db.func.coalesce(db.func.sum(Analytics.total_sales), 0).label('total_sales')
+            ).one()._asdict()
+            totals = {key: value + sum(day[key] for day in live.values())
+                      for key, value in rolled_up.items()}
+
+            # Los productos populares son JSON por día: se mezclan en Python
+            popular_rows = db.session.query(Analytics.popular_products)
+            popular_from = date.min
+            if popular_days:
+                popular_from = today - timedelta(days=popular_days - 1)
+                popular_rows = popular_rows.filter(Analytics.date >= popular_from)
+            popular = merge_days(
+                [{'popular_products': products} for (products,) in popular_rows] +
+                [day for d, day in live.items() if d >= popular_from])['popular_products']
+
+            top = sorted(popular.items(),
+                         key=lambda item: item[1]['quotes'], reverse=True)[:5]
+            names = dict(db.session.query(Product.id, Product.name).filter(
+                Product.id.in_([int(product_id) for product_id, _ in top])))
 
             return jsonify({
                 'overview': {
                     'total_products': total_products,
-                    'total_quotes': total_quotes,
-                    'pending_quotes': pending_quotes,
-                    'total_sales': total_sales,
+                    'total_quotes': totals['total_quotes'],
+                    'pending_quotes': totals['pending_quotes'],
+                    'total_sales': totals['total_sales'],
+                    'popular_products_days': popular_days,
                     'popular_products': [
-                        {'name': name, 'quotes': quote_count}
-                        for name, quote_count in popular_products
+                        {'name': names.get(int(product_id)), 'quotes': counts['quotes']}
+                        for product_id, counts in top
                     ]
                 }
             }), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
+
+    @app.route('/analytics/timeseries', methods=['GET'])
+    @business_required
+    def get_analytics_timeseries():
+        try:
+            metric = request.args.get('metric', 'sales')
+            bucket = request.args.get('bucket', 'day')
+            if metric not in TIMESERIES_METRICS:
+                return jsonify({'error': 'Invalid metric'}), 400
+            if bucket not in TIMESERIES_BUCKETS:
+                return jsonify({'error': 'Invalid bucket'}), 400
+
+            try:
+                date_to = date.fromisoformat(
+                    request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+                date_from = date.fromisoformat(
+                    request.args['from']) if request.args.get('from') else date_to - timedelta(days=29)
+            except ValueError:
+                return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+            if date_from > date_to:
+                return jsonify({'error': 'from must be before to'}), 400
+            # Limita las filas leídas y el número de buckets de la respuesta
+            max_days = current_app.config.get('ANALYTICS_MAX_RANGE_DAYS', DEFAULT_MAX_RANGE_DAYS)
+            if (date_to - date_from).days + 1 > max_days:
+                return jsonify({'error': 'Range cannot exceed {} days'.format(max_days)}), 400
+
+            # Los buckets se alinean al inicio de semana/mes
+            first_bucket = bucket_start(date_from, bucket)
+            days = daily_metrics(first_bucket, date_to)
+
+            buckets = {}
+            start = first_bucket
+            while start <= date_to:
+                buckets[start] = []
+                start = next_bucket(start, bucket)
+            for day, metrics in days.items():
+                buckets[bucket_start(day, bucket)].append(metrics)
+            totals = {start: merge_days(rows) for start, rows in buckets.items()}
+
+            # Desglose por categoría: quotes/sales vienen por producto
+            product_ids = {int(product_id) for t in totals.values()
+                           for product_id in t['popular_products']}
+            categories = dict(db.session.query(Product.id, Product.category).filter(
+                Product.id.in_(product_ids))) if product_ids else {}
+
+            def breakdown(t):
+                if metric == 'orders':
+                    return t['orders_by_category']
+                key = 'sales' if metric == 'sales' else 'quotes'
+                result = {}
+                for product_id, counts in t['popular_products'].items():
+                    category = categories.get(int(product_id), 'unknown')
+                    result[category] = result.get(category, 0) + counts[key]
+                return result
+
+            return jsonify({
+                'timeseries': {
+                    'metric': metric,
+                    'bucket': bucket,
+                    'from': date_from.isoformat(),
+                    'to': date_to.isoformat(),
+                    'points': [{
+                        'period': start.isoformat(),
+                        'value': t[TIMESERIES_METRICS[metric]],
+                        'categories': breakdown(t)
+                    } for start, t in totals.items()]
+                }
+            }), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
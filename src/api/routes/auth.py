@@ -1,8 +1,13 @@
 from flask import request, jsonify, session
 from ..models import db, User
 from ..utils import generate_sitemap, APIException
-import bcrypt
+from ..passwords import password_hasher, HasherBusy
+from ..ratelimit import login_limiter
+from ..jobs import enqueue
+from ..serializers import serialize
+from ..identity import create_user_token, user_cache, business_required
 from datetime import datetime
+import math
 
 
 def setup_auth_routes(app):
@@ -20,8 +25,7 @@ def setup_auth_routes(app):
                 return jsonify({'error': 'Email already registered'}), 400
 
             # Crear usuario
-            hashed_password = bcrypt.hashpw(data['password'].encode(
-                'utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_password = password_hasher.hash_password(data['password'])
             user = User(
                 email=data['email'],
                 password=hashed_password,
@@ -33,22 +37,23 @@ def setup_auth_routes(app):
             )
 
             db.session.add(user)
+            db.session.flush()
+            # El email sale desde el worker, no bloquea el registro
+            enqueue('email.welcome', user_id=user.id)
             db.session.commit()
 
             session['user_id'] = user.id
 
             return jsonify({
                 'message': 'User registered successfully',
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'role': user.role,
-                    'company_name': user.company_name
-                }
+                'access_token': create_user_token(user),
+                'user': serialize('user', user)
             }), 201
 
+        except HasherBusy as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
@@ -57,24 +62,56 @@ def setup_auth_routes(app):
     def login():
         try:
             data = request.get_json()
+            email = data['email'].strip().lower()
+
+            # Antes de cualquier consulta o bcrypt
+            retry_after = login_limiter.check(request.remote_addr or '', email)
+            if retry_after is not None:
+                return jsonify({'error': 'Too many login attempts'}), 429, {
+                    'Retry-After': str(int(math.ceil(retry_after)))}
+
             user = User.query.filter_by(email=data['email']).first()
 
-            if user and bcrypt.check_password_hash(user.password, data['password']):
+            # Con emails desconocidos se verifica contra un hash ficticio del
+            # mismo coste para que la respuesta tarde lo mismo
+            hashed = user.password if user else password_hasher.dummy_hash()
+            valid = password_hasher.verify_password(data['password'], hashed)
+
+            if user and valid:
+                login_limiter.record_success(email)
+
+                # Si cambió el coste configurado se rehashea de forma transparente
+                if password_hasher.needs_rehash(user.password):
+                    user.password = password_hasher.hash_password(data['password'])
+                    db.session.commit()
+
                 session['user_id'] = user.id
                 return jsonify({
                     'message': 'Login successful',
-                    'user': {
-                        'id': user.id,
-                        'email': user.email,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name,
-                        'role': user.role,
-                        'company_name': user.company_name
-                    }
+                    'access_token': create_user_token(user),
+                    'user': serialize('user', user)
                 }), 200
             else:
+                login_limiter.record_failure(email)
                 return jsonify({'error': 'Invalid credentials'}), 401
 
+        except HasherBusy as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/auth/hash-stats', methods=['GET'])
+    @business_required
+    def get_hash_stats():
+        try:
+            return jsonify({
+                'password_hashing': password_hasher.stats(),
+                'login_rate_limit': login_limiter.stats()
+            }), 200
+
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -94,16 +131,7 @@ def setup_auth_routes(app):
                 return jsonify({'error': 'User not found'}), 404
 
             return jsonify({
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'phone': user.phone,
-                    'company_name': user.company_name,
-                    'role': user.role,
-                    'created_at': user.created_at.isoformat()
-                }
+                'user': serialize('user.profile', user)
             }), 200
 
         except Exception as e:
@@ -127,18 +155,11 @@ def setup_auth_routes(app):
             user.company_name = data.get('company_name', user.company_name)
 
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             return jsonify({
                 'message': 'Profile updated successfully',
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'phone': user.phone,
-                    'company_name': user.company_name,
-                    'role': user.role
-                }
+                'user': serialize('user.profile', user)
             }), 200
 
         except Exception as e:
@@ -156,8 +177,10 @@ def setup_auth_routes(app):
                 return jsonify({'error': 'User not found'}), 404
 
             # En una implementación real, podrías querer soft delete
+            user_id = user.id
             db.session.delete(user)
             db.session.commit()
+            user_cache.invalidate(user_id)
             session.pop('user_id', None)
 
             return jsonify({'message': 'Account deleted successfully'}), 200
@@ -1,21 +1,83 @@
 from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
+from datetime import datetime
 from ..models import db, User, Product, Quote
+from ..streaming import wants_ndjson, stream_ndjson
+from ..pagination import parse_limit, parse_page, parse_id, parse_date_bound
+from ..identity import business_required
+
+QUOTE_STATUSES = ('pending', 'approved', 'rejected')
+MAX_BULK_STATUS_UPDATES = 500
+
+QUOTE_SORT_COLUMNS = {
+    'created_at': Quote.created_at,
+    'total_price': Quote.total_price,
+    'status': Quote.status
+}
+
+
+def business_products_query():
+    """Productos activos con su número de cotizaciones (un COUNT agrupado)."""
+    quote_counts = db.session.query(
+        Quote.product_id,
+        db.func.count(Quote.id).label('total_quotes')
+    ).group_by(Quote.product_id).subquery()
+
+    return db.session.query(
+        Product.id,
+        Product.name,
+        Product.price,
+        Product.category,
+        Product.stock,
+        db.func.coalesce(quote_counts.c.total_quotes, 0).label('total_quotes')
+    ).outerjoin(
+        quote_counts, quote_counts.c.product_id == Product.id
+    ).filter(Product.is_active == db.true())
+
+
+def business_quotes_query(status=None, date_from=None, date_to=None,
+                          product_id=None, customer_id=None):
+    """Cotizaciones filtradas como en GET /business/quotes."""
+    query = Quote.query
+    if status:
+        query = query.filter(Quote.status.in_(status.split(',')))
+    if date_from:
+        query = query.filter(Quote.created_at >= date_from)
+    if date_to:
+        query = query.filter(Quote.created_at < date_to)
+    if product_id:
+        query = query.filter(Quote.product_id == product_id)
+    if customer_id:
+        query = query.filter(Quote.user_id == customer_id)
+    return query
+
+
+def quote_ordering(sort):
+    """(orden, desempate por id) para ?sort=; None si el campo no se puede ordenar."""
+    sort_column = QUOTE_SORT_COLUMNS.get(sort.lstrip('-'))
+    if sort_column is None:
+        return None
+    if sort.startswith('-'):
+        return sort_column.desc(), Quote.id.desc()
+    return sort_column.asc(), Quote.id.asc()
+
+
+def business_quotes_page_query(query, ordering, page, per_page):
+    # Cliente y producto en el mismo SELECT, solo con las columnas usadas
+    return query.options(
+        joinedload(Quote.user).load_only(User.first_name, User.last_name),
+        joinedload(Quote.product).load_only(Product.name)
+    ).order_by(*ordering).offset((page - 1) * per_page).limit(per_page)
 
 
 def setup_business_routes(app):
 
     @app.route('/business/products', methods=['GET'])
-    @jwt_required()
+    @business_required
     def get_business_products():
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-
-            if not user or user.role != 'business':
-                return jsonify({'error': 'Unauthorized'}), 403
-
-            products = Product.query.filter_by(is_active=True).all()
+            # Un solo COUNT agrupado en lugar de cargar p.quotes por producto
+            products = business_products_query().all()
 
             return jsonify({
                 'products': [{
@@ -24,7 +86,7 @@ def setup_business_routes(app):
                     'price': p.price,
                     'category': p.category,
                     'stock': p.stock,
-                    'total_quotes': len(p.quotes)
+                    'total_quotes': p.total_quotes
                 } for p in products]
             }), 200
 
@@ -32,16 +94,50 @@ def setup_business_routes(app):
             return jsonify({'error': str(e)}), 500
 
     @app.route('/business/quotes', methods=['GET'])
-    @jwt_required()
+    @business_required
     def get_business_quotes():
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            try:
+                page = parse_page(request.args.get('page'))
+                per_page = parse_limit(request.args.get('per_page'), name='per_page')
+                date_from = parse_date_bound(request.args.get('from'))
+                date_to = parse_date_bound(request.args.get('to'), end=True)
+                product_id = parse_id(request.args.get('product_id'), 'product_id')
+                customer_id = parse_id(request.args.get('customer_id'), 'customer_id')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
 
-            if not user or user.role != 'business':
-                return jsonify({'error': 'Unauthorized'}), 403
+            ordering = quote_ordering(request.args.get('sort', '-created_at'))
+            if ordering is None:
+                return jsonify({'error': 'Invalid sort field'}), 400
 
-            quotes = Quote.query.all()
+            query = business_quotes_query(
+                status=request.args.get('status'), date_from=date_from,
+                date_to=date_to, product_id=product_id, customer_id=customer_id)
+
+            if wants_ndjson():
+                # Todas las filas filtradas, sin paginar ni COUNT
+                return stream_ndjson(query.join(
+                    User, Quote.user_id == User.id
+                ).join(
+                    Product, Quote.product_id == Product.id
+                ).with_entities(
+                    Quote.id, User.first_name, User.last_name,
+                    Product.name.label('product_name'), Quote.total_price,
+                    Quote.status, Quote.created_at
+                ).order_by(*ordering), lambda q: {
+                    'id': q.id,
+                    'customer_name': f"{q.first_name} {q.last_name}",
+                    'product_name': q.product_name,
+                    'total_price': q.total_price,
+                    'status': q.status,
+                    'created_at': q.created_at.isoformat()
+                })
+
+            # COUNT aparte, sin ORDER BY ni joins
+            total = query.with_entities(db.func.count(Quote.id)).scalar()
+
+            quotes = business_quotes_page_query(query, ordering, page, per_page).all()
 
             return jsonify({
                 'quotes': [{
@@ -51,8 +147,66 @@ def setup_business_routes(app):
                     'total_price': q.total_price,
                     'status': q.status,
                     'created_at': q.created_at.isoformat()
-                } for q in quotes]
+                } for q in quotes],
+                'pagination': {
+                    'page': page,
+                    'per_page': per_page,
+                    'total': total,
+                    'pages': (total + per_page - 1) // per_page
+                }
             }), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
+
+    @app.route('/business/quotes/status', methods=['PATCH'])
+    @business_required
+    def update_business_quotes_status():
+        try:
+            data = request.get_json() or {}
+            updates = data.get('updates')
+
+            if not isinstance(updates, list) or not updates:
+                return jsonify({'error': 'updates must be a non-empty list'}), 400
+            if len(updates) > MAX_BULK_STATUS_UPDATES:
+                return jsonify({
+                    'error': 'At most {} updates per request'.format(MAX_BULK_STATUS_UPDATES)
+                }), 400
+
+            requested_ids = [u.get('id') for u in updates
+                             if isinstance(u, dict) and isinstance(u.get('id'), int)]
+            existing = {quote_id for (quote_id,) in db.session.query(Quote.id).filter(
+                Quote.id.in_(requested_ids))} if requested_ids else set()
+
+            now = datetime.utcnow()
+            results = []
+            rows = {}
+            for index, item in enumerate(updates):
+                quote_id = item.get('id') if isinstance(item, dict) else None
+                status = item.get('status') if isinstance(item, dict) else None
+                if quote_id not in existing:
+                    results.append({'index': index, 'id': quote_id,
+                                    'error': 'Quote not found'})
+                elif status not in QUOTE_STATUSES:
+                    results.append({'index': index, 'id': quote_id,
+                                    'error': 'Invalid status'})
+                else:
+                    # Si un id se repite gana la última actualización
+                    rows[quote_id] = {'id': quote_id, 'status': status,
+                                      'updated_at': now}
+                    results.append({'index': index, 'id': quote_id,
+                                    'status': status})
+
+            if rows:
+                # UPDATE por clave primaria en un único executemany
+                db.session.execute(db.update(Quote), list(rows.values()))
+                db.session.commit()
+
+            return jsonify({
+                'message': '{} quotes updated'.format(len(rows)),
+                'results': results
+            }), 200 if rows else 400
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
@@ -1,6 +1,8 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, User
+from ..serializers import serialize
+from ..identity import user_cache, revoke_user_tokens
 
 
 def setup_customers_routes(app):
@@ -16,16 +18,7 @@ def setup_customers_routes(app):
                 return jsonify({'error': 'User not found'}), 404
 
             return jsonify({
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'phone': user.phone,
-                    'company_name': user.company_name,
-                    'role': user.role,
-                    'created_at': user.created_at.isoformat()
-                }
+                'user': serialize('user.profile', user)
             }), 200
 
         except Exception as e:
@@ -53,18 +46,11 @@ def setup_customers_routes(app):
                 user.company_name = data['company_name']
 
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             return jsonify({
                 'message': 'Profile updated successfully',
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'phone': user.phone,
-                    'company_name': user.company_name,
-                    'role': user.role
-                }
+                'user': serialize('user.profile', user)
             }), 200
 
         except Exception as e:
@@ -83,7 +69,10 @@ def setup_customers_routes(app):
 
             # Soft delete - mark as inactive
             user.is_active = False
+            # Los tokens emitidos antes dejan de valer en todos los workers
+            revoke_user_tokens(user)
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             return jsonify({'message': 'Account deleted successfully'}), 200
 
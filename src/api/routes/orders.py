@@ -0,0 +1,107 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, Order, OrderItem
+from ..replicas import use_primary
+from ..checkout import (reserve_order, confirm_order, release_order,
+                        CheckoutError, DEFAULT_RESERVATION_MINUTES)
+
+
+def serialize_order(order, items):
+    return {
+        'id': order.id,
+        'status': order.status,
+        'total_amount': order.total_amount,
+        'shipping_address': order.shipping_address,
+        'reserved_until': order.reserved_until.isoformat() if order.reserved_until else None,
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+        'items': [{
+            'product_id': item.product_id,
+            'quantity': item.quantity,
+            'price': item.price,
+            'customization': item.customization
+        } for item in items]
+    }
+
+
+def checkout_error(e):
+    body = {'error': str(e)}
+    if e.details:
+        body['details'] = e.details
+    return jsonify(body), e.status
+
+
+def setup_orders_routes(app):
+
+    @app.route('/orders', methods=['POST'])
+    @jwt_required()
+    def create_order():
+        try:
+            current_user_id = get_jwt_identity()
+            data = request.get_json() or {}
+
+            # Reserva el stock de todos los artículos o de ninguno
+            try:
+                order = reserve_order(
+                    int(current_user_id), data.get('items'),
+                    shipping_address=data.get('shipping_address'),
+                    minutes=current_app.config.get(
+                        'ORDER_RESERVATION_MINUTES', DEFAULT_RESERVATION_MINUTES))
+            except CheckoutError as e:
+                return checkout_error(e)
+
+            items = OrderItem.query.filter_by(order_id=order.id).all()
+            return jsonify({
+                'message': 'Stock reserved, confirm the order before it expires',
+                'order': serialize_order(order, items)
+            }), 201
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/orders/<int:order_id>/confirm', methods=['POST'])
+    @jwt_required()
+    def confirm_order_route(order_id):
+        try:
+            try:
+                confirm_order(order_id, int(get_jwt_identity()))
+            except CheckoutError as e:
+                return checkout_error(e)
+
+            return jsonify({'message': 'Order placed', 'order_id': order_id}), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/orders/<int:order_id>/cancel', methods=['POST'])
+    @jwt_required()
+    def cancel_order_route(order_id):
+        try:
+            try:
+                release_order(order_id, int(get_jwt_identity()))
+            except CheckoutError as e:
+                return checkout_error(e)
+
+            return jsonify({'message': 'Reservation cancelled', 'order_id': order_id}), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    # El estado de la reserva cambia justo antes: siempre del primario
+    @app.route('/orders/<int:order_id>', methods=['GET'])
+    @jwt_required()
+    @use_primary
+    def get_order(order_id):
+        try:
+            order = Order.query.filter_by(
+                id=order_id, user_id=int(get_jwt_identity())).first()
+            if not order:
+                return jsonify({'error': 'Order not found'}), 404
+
+            items = OrderItem.query.filter_by(order_id=order.id).all()
+            return jsonify({'order': serialize_order(order, items)}), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
@@ -1,6 +1,72 @@
-from flask import request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Product, User
+from datetime import datetime
+import io
+from flask import request, jsonify, Response, stream_with_context
+from ..models import db, Product
+from ..identity import business_required
+from ..pagination import parse_limit, keyset_page, apply_keyset
+from ..streaming import wants_ndjson, stream_ndjson
+from ..cache import catalog_cache
+from ..search import search_products
+from ..facets import (parse_facet_filters, parse_facet_keys, apply_facet_filters,
+                      facet_counts, sync_attributes)
+from ..catalog_io import import_products, export_products, detect_format, FORMATS
+from ..conditional import make_etag, is_not_modified, not_modified, add_validators
+from ..serializers import serializers, serialize
+
+# Campos que se pueden pedir con ?fields=, en el orden de la respuesta
+PRODUCT_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'description': Product.description,
+    'price': Product.price,
+    'category': Product.category,
+    'product_type': Product.product_type,
+    'stock': Product.stock,
+    'image_url': Product.image_url,
+    'is_eco_friendly': Product.is_eco_friendly,
+    'features': Product.features,
+    'specifications': Product.specifications
+}
+
+
+def parse_product_fields(value):
+    if not value:
+        return list(PRODUCT_FIELDS)
+    requested = {f.strip() for f in value.split(',') if f.strip()}
+    unknown = sorted(requested.difference(PRODUCT_FIELDS))
+    if unknown:
+        raise ValueError('Unknown fields: ' + ', '.join(unknown))
+    # Sin duplicados y en el orden de PRODUCT_FIELDS (id siempre): así cada
+    # subconjunto es una sola entrada en la caché de serializadores
+    requested.add('id')
+    return [f for f in PRODUCT_FIELDS if f in requested]
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def product_columns(fields):
+    """Columnas de los campos pedidos más las que necesita el cursor."""
+    columns = [PRODUCT_FIELDS[f] for f in fields]
+    for column in (Product.id, Product.created_at):
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def active_products_query(*columns, category='all', product_type='all', facet_filters=()):
+    """Productos activos filtrados como en GET /products (también lo usa check-indexes)."""
+    # "= true" (no "IS true") para que se usen los índices parciales
+    query = db.session.query(*columns).filter(Product.is_active == db.true())
+
+    if category != 'all':
+        query = query.filter(Product.category == category)
+
+    if product_type != 'all':
+        query = query.filter(Product.product_type == product_type)
+
+    return apply_facet_filters(query, facet_filters)
 
 
 def setup_products_routes(app):
@@ -11,31 +77,97 @@ def setup_products_routes(app):
             category = request.args.get('category', 'all')
             product_type = request.args.get('type', 'all')
 
-            query = Product.query.filter_by(is_active=True)
+            try:
+                limit = parse_limit(request.args.get('limit'))
+                fields = parse_product_fields(request.args.get('fields'))
+                facet_filters = parse_facet_filters(request.args)
+                facet_keys = parse_facet_keys(request.args.get('facets'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
 
-            if category != 'all':
-                query = query.filter_by(category=category)
+            cursor = request.args.get('cursor')
 
-            if product_type != 'all':
-                query = query.filter_by(product_type=product_type)
+            def active_products(*columns):
+                return active_products_query(
+                    *columns, category=category, product_type=product_type,
+                    facet_filters=facet_filters)
 
-            products = query.all()
+            if wants_ndjson():
+                # Sin caché ni límite por defecto: todas las filas filtradas
+                # (desde el cursor si lo hay), leídas por lotes
+                try:
+                    query = apply_keyset(active_products(*product_columns(fields)),
+                                         Product.created_at, Product.id, cursor)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                if request.args.get('limit'):
+                    query = query.limit(limit)
+                return stream_ndjson(query, serializers.get('product', fields))
 
-            return jsonify({
-                'products': [{
-                    'id': p.id,
-                    'name': p.name,
-                    'description': p.description,
-                    'price': p.price,
-                    'category': p.category,
-                    'product_type': p.product_type,
-                    'stock': p.stock,
-                    'image_url': p.image_url,
-                    'is_eco_friendly': p.is_eco_friendly,
-                    'features': p.features,
-                    'specifications': p.specifications
-                } for p in products]
-            }), 200
+            def load_validators():
+                # Consulta ligera: no toca description/features/specifications
+                total, last_updated, last_id = active_products(
+                    db.func.count(Product.id),
+                    db.func.max(Product.updated_at),
+                    db.func.max(Product.id)).one()
+                return {
+                    'etag': make_etag(total, last_updated, last_id, *cache_key),
+                    'last_modified': last_updated.isoformat() if last_updated else None
+                }
+
+            def load_page():
+                # Solo se seleccionan las columnas pedidas (más las del cursor)
+                rows, next_cursor = keyset_page(
+                    active_products(*product_columns(fields)), Product.created_at,
+                    Product.id, cursor, limit)
+
+                payload = {
+                    'products': serializers.get('product', fields).many(rows),
+                    'next_cursor': next_cursor
+                }
+                if facet_keys:
+                    # Conteos sobre todo el conjunto filtrado, no solo la página
+                    payload['facets'] = facet_counts(
+                        active_products(Product.id).statement, facet_keys)
+                return payload
+
+            cache_key = (category, product_type, ','.join(fields), limit, cursor,
+                         repr(facet_filters), ','.join(facet_keys))
+            validators = catalog_cache.get_or_set(
+                'products-validators', cache_key, load_validators)
+            etag = validators['etag']
+            last_modified = parse_datetime(validators['last_modified'])
+
+            if is_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            try:
+                payload = catalog_cache.get_or_set(
+                    'products', cache_key, load_page)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            return add_validators(jsonify(payload), etag, last_modified), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/products/search', methods=['GET'])
+    def search_products_route():
+        try:
+            text = request.args.get('q', '').strip()
+            if not text:
+                return jsonify({'error': 'q is required'}), 400
+
+            try:
+                limit = parse_limit(request.args.get('limit'), default=20)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            category = request.args.get('category', 'all')
+
+            return jsonify(catalog_cache.get_or_set(
+                'search', (text.lower(), category, limit),
+                lambda: {'results': search_products(text, limit, category)})), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -43,25 +175,45 @@ def setup_products_routes(app):
     @app.route('/products/<int:product_id>', methods=['GET'])
     def get_product(product_id):
         try:
-            product = Product.query.get(product_id)
-            if not product or not product.is_active:
-                return jsonify({'error': 'Product not found'}), 404
+            def load_validators():
+                row = db.session.query(
+                    Product.id, Product.updated_at, Product.created_at
+                ).filter(Product.id == product_id,
+                         Product.is_active == db.true()).first()
+                if not row:
+                    return None
 
-            return jsonify({
-                'product': {
-                    'id': product.id,
-                    'name': product.name,
-                    'description': product.description,
-                    'price': product.price,
-                    'category': product.category,
-                    'product_type': product.product_type,
-                    'stock': product.stock,
-                    'image_url': product.image_url,
-                    'is_eco_friendly': product.is_eco_friendly,
-                    'features': product.features,
-                    'specifications': product.specifications
+                last_modified = row.updated_at or row.created_at
+                return {
+                    'etag': make_etag('product', row.id, last_modified),
+                    'last_modified': last_modified.isoformat() if last_modified else None
                 }
-            }), 200
+
+            def load_product():
+                product = Product.query.get(product_id)
+                if not product or not product.is_active:
+                    return None
+
+                return {'product': serialize('product', product)}
+
+            validators = catalog_cache.get_or_set(
+                'product-validators', (product_id,), load_validators)
+            if validators is None:
+                return jsonify({'error': 'Product not found'}), 404
+
+            etag = validators['etag']
+            last_modified = parse_datetime(validators['last_modified'])
+
+            # 304 antes de cargar las columnas pesadas del producto
+            if is_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            payload = catalog_cache.get_or_set(
+                'product', (product_id,), load_product)
+            if payload is None:
+                return jsonify({'error': 'Product not found'}), 404
+
+            return add_validators(jsonify(payload), etag, last_modified), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -83,24 +235,19 @@ def setup_products_routes(app):
                 {'value': 'all', 'label': 'All Types'}
             ]
 
-            return jsonify({
-                'categories': categories,
-                'product_types': product_types
-            }), 200
+            return jsonify(catalog_cache.get_or_set(
+                'categories', (), lambda: {
+                    'categories': categories,
+                    'product_types': product_types
+                })), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     @app.route('/products', methods=['POST'])
-    @jwt_required()
+    @business_required
     def create_product():
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-
-            if not user or user.role != 'business':
-                return jsonify({'error': 'Unauthorized'}), 403
-
             data = request.get_json()
             product = Product(
                 name=data['name'],
@@ -116,7 +263,11 @@ def setup_products_routes(app):
             )
 
             db.session.add(product)
+            db.session.flush()
+            sync_attributes(
+                [(product.id, product.specifications, product.features)])
             db.session.commit()
+            catalog_cache.bump_version()
 
             return jsonify({
                 'message': 'Product created successfully',
@@ -128,15 +279,9 @@ def setup_products_routes(app):
             return jsonify({'error': str(e)}), 500
 
     @app.route('/products/<int:product_id>', methods=['PUT'])
-    @jwt_required()
+    @business_required
     def update_product(product_id):
         try:
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-
-            if not user or user.role != 'business':
-                return jsonify({'error': 'Unauthorized'}), 403
-
             product = Product.query.get(product_id)
             if not product:
                 return jsonify({'error': 'Product not found'}), 404
@@ -160,10 +305,63 @@ def setup_products_routes(app):
             if 'is_eco_friendly' in data:
                 product.is_eco_friendly = data['is_eco_friendly']
 
+            if 'features' in data or 'specifications' in data:
+                sync_attributes(
+                    [(product.id, product.specifications, product.features)])
+
             db.session.commit()
+            catalog_cache.bump_version()
 
             return jsonify({'message': 'Product updated successfully'}), 200
 
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
+
+    @app.route('/products/cache/stats', methods=['GET'])
+    @business_required
+    def get_catalog_cache_stats():
+        try:
+            return jsonify({'cache': catalog_cache.stats()}), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/products/import', methods=['POST'])
+    @business_required
+    def import_products_file():
+        try:
+            # Fichero multipart o el cuerpo en crudo; se lee como stream
+            upload = request.files.get('file')
+            fmt = request.args.get('format') or detect_format(
+                upload.filename if upload else None,
+                default='csv' if request.mimetype == 'text/csv' else 'ndjson')
+            if fmt not in FORMATS:
+                return jsonify({'error': 'Invalid format'}), 400
+
+            raw = upload.stream if upload else request.stream
+            report = import_products(
+                io.TextIOWrapper(raw, encoding='utf-8', newline=''), fmt)
+
+            return jsonify({'import': report}), 200 if not report['failed'] else 207
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/products/export', methods=['GET'])
+    @business_required
+    def export_products_file():
+        try:
+            fmt = request.args.get('format', 'ndjson')
+            if fmt not in FORMATS:
+                return jsonify({'error': 'Invalid format'}), 400
+
+            mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+            return Response(
+                stream_with_context(export_products(fmt)), mimetype=mimetype,
+                headers={'Content-Disposition':
+                         'attachment; filename=products.' + fmt})
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
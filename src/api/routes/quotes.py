@@ -1,6 +1,24 @@
 from flask import request, jsonify
+from sqlalchemy.orm import joinedload
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Product, Quote, QuoteItem, User
+from ..pricing import (get_price_table, get_price_tables,
+                       price_configuration, PricingError)
+from ..streaming import wants_ndjson, stream_ndjson
+from ..conditional import make_etag, is_not_modified, not_modified, add_validators
+from ..replicas import use_primary
+from ..pagination import parse_id
+from ..jobs import enqueue
+
+MAX_PRICE_BATCH = 100
+MAX_BULK_QUOTES = 100
+
+
+def user_quotes_query(user_id):
+    """Cotizaciones de un cliente (GET /quotes), con el nombre del producto en la misma consulta."""
+    return Quote.query.options(
+        joinedload(Quote.product).load_only(Product.name)
+    ).filter_by(user_id=user_id)
 
 
 def setup_quotes_routes(app):
@@ -10,39 +28,38 @@ def setup_quotes_routes(app):
     def create_quote():
         try:
             current_user_id = get_jwt_identity()
-            data = request.get_json()
-            product = Product.query.get(data['product_id'])
+            data = request.get_json() or {}
+            try:
+                product_id = parse_id(data.get('product_id'), 'product_id')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if product_id is None:
+                return jsonify({'error': 'product_id is required'}), 400
 
-            if not product:
+            table = get_price_table(product_id)
+            if not table:
                 return jsonify({'error': 'Product not found'}), 404
 
-            # Calculate total price based on customizations
-            base_price = product.price
-            additional_cost = 0
+            # Precio a partir de la tabla precompilada del producto
             customizations = data.get('customization', {})
-
-            # Process customizations and calculate additional costs
-            for feature, option in customizations.items():
-                if (product.features and
-                    feature in product.features and
-                        isinstance(product.features[feature], dict)):
-                    feature_options = product.features[feature]
-                    if option in feature_options:
-                        additional_cost += feature_options[option].get(
-                            'additional_cost', 0)
-
-            total_price = base_price + additional_cost
+            try:
+                total_price = price_configuration(
+                    table, customizations)['total_price']
+            except PricingError as e:
+                return jsonify({'error': str(e), 'details': e.errors}), 400
 
             # Create quote
             quote = Quote(
                 user_id=current_user_id,
-                product_id=data['product_id'],
+                product_id=product_id,
                 customization=customizations,
                 total_price=total_price,
                 status='pending'
             )
 
             db.session.add(quote)
+            db.session.flush()
+            enqueue('email.quote_received', quote_id=quote.id)
             db.session.commit()
 
             return jsonify({
@@ -59,12 +76,146 @@ def setup_quotes_routes(app):
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/quotes/bulk', methods=['POST'])
+    @jwt_required()
+    def create_quotes_bulk():
+        try:
+            current_user_id = get_jwt_identity()
+            data = request.get_json() or {}
+            items = data.get('quotes')
+
+            if not isinstance(items, list) or not items:
+                return jsonify({'error': 'quotes must be a non-empty list'}), 400
+            if len(items) > MAX_BULK_QUOTES:
+                return jsonify({
+                    'error': 'At most {} quotes per request'.format(MAX_BULK_QUOTES)
+                }), 400
+
+            # Una sola consulta IN para los productos que no estén en caché
+            tables = get_price_tables(
+                i.get('product_id') for i in items
+                if isinstance(i, dict) and isinstance(i.get('product_id'), int))
+
+            results = []
+            quotes = []
+            for index, item in enumerate(items):
+                product_id = item.get('product_id') if isinstance(item, dict) else None
+                table = tables.get(product_id)
+                if table is None:
+                    results.append({'index': index, 'product_id': product_id,
+                                    'error': 'Product not found'})
+                    continue
+                customization = item.get('customization') or {}
+                try:
+                    price = price_configuration(table, customization)
+                except PricingError as e:
+                    results.append({'index': index, 'product_id': product_id,
+                                    'error': str(e), 'details': e.errors})
+                    continue
+
+                quote = Quote(
+                    user_id=current_user_id,
+                    product_id=product_id,
+                    customization=customization,
+                    total_price=price['total_price'],
+                    status='pending'
+                )
+                quotes.append(quote)
+                results.append({'index': index, 'product_id': product_id,
+                                'quote': quote})
+
+            if not quotes:
+                return jsonify({'error': 'No valid quotes', 'results': results}), 400
+
+            # Un solo flush: SQLAlchemy agrupa los INSERT en uno multi-fila
+            # (insertmanyvalues) y devuelve los ids; se leen antes del commit
+            # para no recargar cada fila al expirar la sesión
+            db.session.add_all(quotes)
+            db.session.flush()
+
+            for result in results:
+                quote = result.pop('quote', None)
+                if quote is not None:
+                    result.update({
+                        'id': quote.id,
+                        'total_price': quote.total_price,
+                        'status': quote.status
+                    })
+
+            db.session.commit()
+
+            return jsonify({
+                'message': '{} quotes created'.format(len(quotes)),
+                'results': results
+            }), 201
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/quotes/price', methods=['POST'])
+    def price_quotes():
+        try:
+            data = request.get_json() or {}
+            configurations = data.get('configurations')
+
+            if not isinstance(configurations, list) or not configurations:
+                return jsonify({'error': 'configurations must be a non-empty list'}), 400
+            if len(configurations) > MAX_PRICE_BATCH:
+                return jsonify({
+                    'error': 'At most {} configurations per request'.format(MAX_PRICE_BATCH)
+                }), 400
+
+            # Una sola consulta para todas las tablas que no estén en caché
+            tables = get_price_tables(
+                c.get('product_id') for c in configurations
+                if isinstance(c, dict) and isinstance(c.get('product_id'), int))
+
+            results = []
+            for index, configuration in enumerate(configurations):
+                product_id = configuration.get('product_id') if isinstance(
+                    configuration, dict) else None
+                table = tables.get(product_id)
+                if table is None:
+                    results.append({'index': index, 'product_id': product_id,
+                                    'error': 'Product not found'})
+                    continue
+                try:
+                    results.append(dict(
+                        price_configuration(table, configuration.get('customization')),
+                        index=index, product_id=product_id))
+                except PricingError as e:
+                    results.append({'index': index, 'product_id': product_id,
+                                    'error': str(e), 'details': e.errors})
+
+            return jsonify({'prices': results}), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
     @app.route('/quotes', methods=['GET'])
     @jwt_required()
     def get_quotes():
         try:
             current_user_id = get_jwt_identity()
-            quotes = Quote.query.filter_by(user_id=current_user_id).all()
+
+            if wants_ndjson():
+                return stream_ndjson(db.session.query(
+                    Quote.id, Product.name.label('product_name'),
+                    Quote.total_price, Quote.status, Quote.customization,
+                    Quote.created_at
+                ).join(Product, Quote.product_id == Product.id).filter(
+                    Quote.user_id == current_user_id
+                ).order_by(Quote.id), lambda q: {
+                    'id': q.id,
+                    'product_name': q.product_name,
+                    'total_price': q.total_price,
+                    'status': q.status,
+                    'customization': q.customization,
+                    'created_at': q.created_at.isoformat()
+                })
+
+            quotes = user_quotes_query(current_user_id).all()
 
             return jsonify({
                 'quotes': [{
@@ -80,17 +231,33 @@ def setup_quotes_routes(app):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    # Se consulta justo después de crear la cotización: siempre al primario
     @app.route('/quotes/<int:quote_id>', methods=['GET'])
     @jwt_required()
+    @use_primary
     def get_quote(quote_id):
         try:
             current_user_id = get_jwt_identity()
-            quote = Quote.query.get(quote_id)
+            # Validadores con una consulta ligera antes de cargar la cotización
+            row = db.session.query(
+                Quote.user_id, Quote.updated_at, Product.updated_at.label('product_updated_at')
+            ).join(Product, Quote.product_id == Product.id).filter(
+                Quote.id == quote_id).first()
 
-            if not quote or quote.user_id != current_user_id:
+            if not row or str(row.user_id) != str(current_user_id):
                 return jsonify({'error': 'Quote not found'}), 404
 
-            return jsonify({
+            last_modified = max(
+                filter(None, (row.updated_at, row.product_updated_at)), default=None)
+            etag = make_etag('quote', quote_id, row.updated_at,
+                             row.product_updated_at)
+
+            if is_not_modified(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            quote = Quote.query.get(quote_id)
+
+            return add_validators(jsonify({
                 'quote': {
                     'id': quote.id,
                     'product': {
@@ -104,7 +271,7 @@ def setup_quotes_routes(app):
                     'customization': quote.customization,
                     'created_at': quote.created_at.isoformat()
                 }
-            }), 200
+            }), etag, last_modified), 200
 
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -0,0 +1,70 @@
+import hmac
+from flask import request, jsonify, Response
+from ..dbpool import pool_metrics
+from ..replicas import replica_router
+from ..instrumentation import request_metrics
+from ..jobs import job_stats
+from ..identity import business_required, user_cache
+from ..compression import response_compressor
+
+
+def setup_system_routes(app):
+
+    @app.route('/system/db-pool', methods=['GET'])
+    @business_required
+    def get_db_pool_stats():
+        try:
+            # Las cifras son del worker que atiende la petición
+            return jsonify({
+                'db_pool': pool_metrics.stats(),
+                'replicas': replica_router.stats()
+            }), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/system/performance', methods=['GET'])
+    @business_required
+    def get_performance_stats():
+        try:
+            if not request_metrics.enabled:
+                return jsonify({'error': 'Instrumentation is disabled'}), 404
+
+            return jsonify({
+                'endpoints': request_metrics.snapshot(),
+                'slow_query_ms': request_metrics.slow_query_ms,
+                'slow_queries': list(request_metrics.slow_queries),
+                'user_cache': user_cache.stats(),
+                'compression': response_compressor.stats()
+            }), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/system/jobs', methods=['GET'])
+    @business_required
+    def get_job_stats():
+        try:
+            return jsonify(job_stats()), 200
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/metrics', methods=['GET'])
+    def get_prometheus_metrics():
+        # Prometheus no maneja JWT: token estático en METRICS_TOKEN. Sin
+        # token configurado el endpoint no existe (rutas, latencias y
+        # volumen de tráfico no son públicos)
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            return jsonify({'error': 'Not found'}), 404
+
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, 'Bearer ' + token):
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        if not request_metrics.enabled:
+            return jsonify({'error': 'Instrumentation is disabled'}), 404
+
+        return Response(request_metrics.prometheus(),
+                        mimetype='text/plain; version=0.0.4')
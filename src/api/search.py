@@ -0,0 +1,164 @@
+import html
+import re
+from .models import db, Product
+
+MAX_TERMS = 10
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+# La base de datos marca con caracteres de uso privado; el HTML se pone
+# después de escapar el texto, que viene tal cual del producto
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+# SQLite: tabla FTS5 con rowid = product.id, sincronizada con triggers
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, features, tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, features)
+        VALUES (new.id, new.name, new.description, coalesce(new.features, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au
+    AFTER UPDATE OF name, description, features ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+        INSERT INTO product_fts(rowid, name, description, features)
+        VALUES (new.id, new.name, new.description, coalesce(new.features, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+    END""",
+)
+SQLITE_REBUILD = (
+    "DELETE FROM product_fts",
+    """INSERT INTO product_fts(rowid, name, description, features)
+    SELECT id, name, description, coalesce(features, '') FROM product""",
+)
+
+# PostgreSQL: columna generada tsvector (se mantiene sola) + índice GIN
+POSTGRES_DDL = (
+    """ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(features::text, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_product_search_vector ON product USING GIN (search_vector)",
+)
+
+SQLITE_SEARCH = """
+SELECT p.id, p.name, p.price, p.category, p.product_type, p.image_url,
+       highlight(product_fts, 0, :open, :close) AS name_highlight,
+       snippet(product_fts, 1, :open, :close, '…', 16) AS description_snippet,
+       -bm25(product_fts, 10.0, 4.0, 1.0) AS score
+FROM product_fts JOIN product p ON p.id = product_fts.rowid
+WHERE product_fts MATCH :query AND p.is_active = 1 {category}
+ORDER BY score DESC
+LIMIT :limit
+"""
+
+# ts_headline es caro: solo se calcula para las filas ya limitadas
+POSTGRES_SEARCH = """
+SELECT ranked.*,
+       ts_headline('simple', ranked.name, to_tsquery('simple', :query),
+                   'StartSel=' || :open || ', StopSel=' || :close || ', HighlightAll=true') AS name_highlight,
+       ts_headline('simple', ranked.description, to_tsquery('simple', :query),
+                   'StartSel=' || :open || ', StopSel=' || :close || ', MaxWords=24, MinWords=8') AS description_snippet
+FROM (
+    SELECT p.id, p.name, p.description, p.price, p.category, p.product_type, p.image_url,
+           ts_rank_cd(p.search_vector, to_tsquery('simple', :query)) AS score
+    FROM product p
+    WHERE p.search_vector @@ to_tsquery('simple', :query) AND p.is_active {category}
+    ORDER BY score DESC
+    LIMIT :limit
+) ranked
+ORDER BY ranked.score DESC
+"""
+
+
+def search_terms(text):
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def render_highlight(text):
+    """Texto del producto escapado para HTML con las coincidencias entre <mark>."""
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_OPEN, HIGHLIGHT_OPEN).replace(
+        MARK_CLOSE, HIGHLIGHT_CLOSE)
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def create_search_index(rebuild=False):
+    """Crea (idempotente) el índice de texto completo del dialecto actual."""
+    dialect = _dialect()
+    statements = ()
+    if dialect == 'sqlite':
+        statements = SQLITE_DDL + (SQLITE_REBUILD if rebuild else ())
+    elif dialect == 'postgresql':
+        statements = POSTGRES_DDL
+    for statement in statements:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+    return dialect in ('sqlite', 'postgresql')
+
+
+def search_products(text, limit=20, category=None):
+    """
+    Búsqueda con ranking, coincidencia por prefijo en cada término y
+    fragmentos resaltados. En otros motores cae a un LIKE sin ranking.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+
+    params = {'limit': limit, 'open': MARK_OPEN, 'close': MARK_CLOSE}
+    category_filter = ''
+    if category and category != 'all':
+        category_filter = 'AND p.category = :category'
+        params['category'] = category
+
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        params['query'] = ' '.join('"{}"*'.format(t) for t in terms)
+        sql = SQLITE_SEARCH.format(category=category_filter)
+    elif dialect == 'postgresql':
+        params['query'] = ' & '.join(t + ':*' for t in terms)
+        sql = POSTGRES_SEARCH.format(category=category_filter)
+    else:
+        return _search_like(terms, limit, category)
+
+    return [{
+        'id': row.id,
+        'name': row.name,
+        'price': row.price,
+        'category': row.category,
+        'product_type': row.product_type,
+        'image_url': row.image_url,
+        'score': round(row.score, 6),
+        'highlight': {
+            'name': render_highlight(row.name_highlight),
+            'description': render_highlight(row.description_snippet)
+        }
+    } for row in db.session.execute(db.text(sql), params)]
+
+
+def _search_like(terms, limit, category):
+    query = Product.query.filter(Product.is_active == db.true())
+    if category and category != 'all':
+        query = query.filter(Product.category == category)
+    for term in terms:
+        query = query.filter(db.or_(Product.name.ilike('%' + term + '%'),
+                                    Product.description.ilike('%' + term + '%')))
+    return [{
+        'id': p.id,
+        'name': p.name,
+        'price': p.price,
+        'category': p.category,
+        'product_type': p.product_type,
+        'image_url': p.image_url,
+        'score': None,
+        'highlight': None
+    } for p in query.limit(limit)]
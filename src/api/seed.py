@@ -0,0 +1,215 @@
+import random
+from datetime import datetime, timedelta
+from .models import db, User, Product, Quote, Order, OrderItem
+from .passwords import password_hasher
+from .facets import sync_product_ids
+from .search import create_search_index
+
+SEED_PASSWORD = 'benchmark'
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+# Las fechas se reparten hacia atrás desde aquí, no desde ahora
+SEED_EPOCH = datetime(2026, 1, 1)
+
+CATEGORIES = {
+    'cars': ('suv', 'sedan', 'coupe', 'van'),
+    'yachts': ('sailboat', 'catamaran', 'motor'),
+    'jets': ('light', 'midsize', 'heavy'),
+    'homes': ('villa', 'cabin', 'penthouse')
+}
+COLORS = ('white', 'black', 'silver', 'green', 'blue', 'red', 'sand')
+MATERIALS = ('leather', 'recycled-fabric', 'cork', 'bamboo', 'wool')
+EXTRAS = ('solar-roof', 'smart-glass', 'heat-pump', 'sound-system', 'air-filter')
+QUOTE_STATUSES = (('pending', 5), ('approved', 3), ('rejected', 2))
+ORDER_STATUSES = ('pending', 'paid', 'shipped', 'delivered', 'cancelled')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bulk_insert(model, rows, batch_size, returning=False):
+    """executemany por lotes, con un commit por lote. Devuelve los ids si se piden."""
+    ids = []
+    for chunk in _chunks(rows, batch_size):
+        if returning:
+            ids.extend(db.session.execute(
+                db.insert(model).returning(model.id, sort_by_parameter_order=True),
+                chunk).scalars())
+        else:
+            db.session.execute(db.insert(model), chunk)
+        db.session.commit()
+    return ids
+
+
+def _moment(rng, now, days):
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _product_features(rng):
+    # Mismo formato que espera el motor de precios:
+    # {feature: {option: {'additional_cost': x}}}
+    return {
+        'color': {c: {'additional_cost': rng.choice((0, 0, 500, 1500))}
+                  for c in rng.sample(COLORS, 3)},
+        'interior': {m: {'additional_cost': rng.randrange(0, 8000, 250)}
+                     for m in rng.sample(MATERIALS, 2)},
+        'extras': {e: {'additional_cost': rng.randrange(1000, 20000, 500)}
+                   for e in rng.sample(EXTRAS, 2)}
+    }
+
+
+def _product_specifications(rng, category):
+    specs = {'warranty_years': rng.choice((2, 3, 5, 10)),
+             'origin': rng.choice(('ES', 'IT', 'DE', 'FR', 'NL'))}
+    if category in ('cars', 'yachts', 'jets'):
+        specs['range_km'] = rng.randrange(300, 9000, 50)
+        specs['seats'] = rng.choice((2, 4, 5, 7, 8, 12))
+    else:
+        specs['area_m2'] = rng.randrange(60, 800, 10)
+        specs['bedrooms'] = rng.randrange(1, 7)
+    return specs
+
+
+def _customization(rng, features):
+    return {feature: rng.choice(list(options))
+            for feature, options in features.items() if rng.random() < 0.7}
+
+
+def _price(product, customization):
+    return product['price'] + sum(
+        product['features'][feature][option]['additional_cost']
+        for feature, option in customization.items())
+
+
+def _status(rng, choices):
+    total = sum(weight for _, weight in choices)
+    pick = rng.randrange(total)
+    for status, weight in choices:
+        if pick < weight:
+            return status
+        pick -= weight
+
+
+def seed_email(seed, n):
+    return 'seed-{}-{}@{}'.format(seed, n, SEED_EMAIL_DOMAIN)
+
+
+def generate_dataset(users=1000, products=500, quotes=100000, orders=20000,
+                     days=365, seed=42, batch_size=5000, epoch=SEED_EPOCH, log=print):
+    """
+    Dataset reproducible (misma semilla, mismos datos) insertado por lotes.
+    Las fechas caen en los `days` días anteriores a `epoch` y los emails
+    son seed-<semilla>-<n>@seed.example.com, así que nada depende del
+    momento ni de lo que ya haya en la base de datos. Todos los usuarios
+    tienen la contraseña SEED_PASSWORD y el primero es de tipo business.
+    Cada semilla solo se puede cargar una vez por base de datos.
+    """
+    if User.query.filter_by(email=seed_email(seed, 0)).first() is not None:
+        raise ValueError('Seed {} is already loaded; use another seed'.format(seed))
+
+    rng = random.Random(seed)
+    now = epoch
+    # bcrypt es deliberadamente lento: un solo hash para todos los usuarios
+    password = password_hasher.hash_password(SEED_PASSWORD)
+
+    log('Users...')
+    user_ids = _bulk_insert(User, ({
+        'email': seed_email(seed, n),
+        'password': password,
+        'first_name': 'Seed',
+        'last_name': str(n),
+        'company_name': 'Seed Co {}'.format(n) if n % 4 == 0 else None,
+        'role': 'business' if n == 0 else 'customer',
+        'is_active': True,
+        'created_at': _moment(rng, now, days)
+    } for n in range(users)), batch_size, returning=True)[1:]
+
+    log('Products...')
+    catalog = []
+    for n in range(products):
+        category = rng.choice(sorted(CATEGORIES))
+        catalog.append({
+            'name': '{} {} {}'.format(rng.choice(COLORS).title(),
+                                      rng.choice(CATEGORIES[category]), n + 1),
+            'description': 'Eco {} built with {} and {}.'.format(
+                category, rng.choice(MATERIALS), rng.choice(EXTRAS)),
+            'price': float(rng.randrange(20000, 2000000, 1000)),
+            'category': category,
+            'product_type': rng.choice(CATEGORIES[category]),
+            'stock': rng.randrange(0, 50),
+            'image_url': None,
+            'is_eco_friendly': rng.random() < 0.8,
+            'features': _product_features(rng),
+            'specifications': _product_specifications(rng, category),
+            'created_at': _moment(rng, now, days),
+            'updated_at': now,
+            'is_active': rng.random() < 0.95
+        })
+    product_ids = _bulk_insert(Product, catalog, batch_size, returning=True)
+    for product_id, product in zip(product_ids, catalog):
+        product['id'] = product_id
+    for chunk in _chunks(product_ids, batch_size):
+        sync_product_ids(chunk)
+        db.session.commit()
+    create_search_index(rebuild=True)
+
+    if not user_ids or not catalog:
+        return {'users': users, 'products': products, 'quotes': 0, 'orders': 0}
+
+    log('Quotes...')
+
+    def quote_rows():
+        for _ in range(quotes):
+            product = rng.choice(catalog)
+            customization = _customization(rng, product['features'])
+            created_at = _moment(rng, now, days)
+            yield {
+                'user_id': rng.choice(user_ids),
+                'product_id': product['id'],
+                'customization': customization,
+                'total_price': _price(product, customization),
+                'status': _status(rng, QUOTE_STATUSES),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+    _bulk_insert(Quote, quote_rows(), batch_size)
+
+    log('Orders...')
+    # Los pedidos se insertan por lotes y sus artículos con los ids devueltos
+    for chunk in _chunks(range(orders), batch_size):
+        order_rows = []
+        item_rows = []
+        for _ in chunk:
+            items = []
+            for product in rng.sample(catalog, min(len(catalog), rng.randrange(1, 4))):
+                customization = _customization(rng, product['features'])
+                items.append({'product_id': product['id'],
+                              'quantity': rng.randrange(1, 3),
+                              'price': _price(product, customization),
+                              'customization': customization})
+            created_at = _moment(rng, now, days)
+            order_rows.append({
+                'user_id': rng.choice(user_ids),
+                'total_amount': sum(i['price'] * i['quantity'] for i in items),
+                'status': rng.choice(ORDER_STATUSES),
+                'shipping_address': {'city': 'Madrid', 'country': 'ES'},
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            item_rows.append(items)
+        order_ids = db.session.execute(
+            db.insert(Order).returning(Order.id, sort_by_parameter_order=True),
+            order_rows).scalars().all()
+        db.session.execute(db.insert(OrderItem), [
+            dict(item, order_id=order_id)
+            for order_id, items in zip(order_ids, item_rows) for item in items])
+        db.session.commit()
+
+    return {'users': users, 'products': products, 'quotes': quotes, 'orders': orders}
@@ -0,0 +1,92 @@
+import threading
+from operator import attrgetter
+from .models import Product, User
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class Serializer:
+    """
+    Función objeto -> dict compilada una vez para un conjunto de campos.
+    Un solo attrgetter lee todos los atributos; solo los campos con
+    conversión (p. ej. fechas) pasan por una función aparte.
+    """
+
+    def __init__(self, fields, converters=None):
+        self.fields = tuple(fields)
+        converters = converters or {}
+        getter = attrgetter(*self.fields)
+        if len(self.fields) == 1:
+            single = getter
+
+            def getter(obj):
+                return (single(obj),)
+        self._getter = getter
+        self._converters = tuple(
+            (index, converters[field]) for index, field in enumerate(self.fields)
+            if field in converters)
+
+    def __call__(self, obj):
+        values = self._getter(obj)
+        if self._converters:
+            values = list(values)
+            for index, convert in self._converters:
+                values[index] = convert(values[index])
+        return dict(zip(self.fields, values))
+
+    def many(self, objs):
+        return [self(obj) for obj in objs]
+
+
+class SerializerRegistry:
+    """
+    Serializadores por nombre. Los de los campos por defecto se compilan
+    al registrar; los subconjuntos (?fields=) la primera vez que se piden.
+    Hay una entrada por tupla de campos, así que quien los recibe del
+    cliente debe normalizarlos antes (ver parse_product_fields).
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, model, fields, converters=None):
+        fields = tuple(fields)
+        unknown = [f for f in fields if not hasattr(model, f)]
+        if unknown:
+            raise AttributeError('{} has no field(s) {}'.format(
+                model.__name__, ', '.join(unknown)))
+        self._specs[name] = (fields, converters or {})
+        self._compiled[(name, fields)] = Serializer(fields, converters)
+
+    def get(self, name, fields=None):
+        default_fields, converters = self._specs[name]
+        key = (name, tuple(fields) if fields is not None else default_fields)
+        serializer = self._compiled.get(key)
+        if serializer is None:
+            with self._lock:
+                serializer = self._compiled.setdefault(key, Serializer(key[1], converters))
+        return serializer
+
+    def fields(self, name):
+        return self._specs[name][0]
+
+
+serializers = SerializerRegistry()
+
+
+def serialize(name, obj, fields=None):
+    return serializers.get(name, fields)(obj)
+
+
+serializers.register('product', Product, (
+    'id', 'name', 'description', 'price', 'category', 'product_type', 'stock',
+    'image_url', 'is_eco_friendly', 'features', 'specifications'))
+serializers.register('user', User, (
+    'id', 'email', 'first_name', 'last_name', 'role', 'company_name'))
+serializers.register('user.profile', User, (
+    'id', 'email', 'first_name', 'last_name', 'phone', 'company_name', 'role',
+    'created_at'), {'created_at': isoformat})
@@ -0,0 +1,23 @@
+import json
+from flask import request, Response, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson():
+    """Solo se hace streaming si el cliente pide NDJSON explícitamente."""
+    return any(mimetype == NDJSON_MIMETYPE and quality > 0
+               for mimetype, quality in request.accept_mimetypes)
+
+
+def stream_ndjson(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    """
+    Respuesta NDJSON (un objeto por línea) que va leyendo la consulta por
+    lotes con yield_per; en PostgreSQL usa un cursor del lado del servidor.
+    """
+    def generate():
+        for row in query.execution_options(yield_per=batch_size):
+            yield json.dumps(serialize(row), default=str) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
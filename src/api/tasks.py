@@ -0,0 +1,99 @@
+import json
+import logging
+import smtplib
+from email.message import EmailMessage
+from urllib import error, parse, request as urlrequest
+from flask import current_app
+from .jobs import task, PermanentJobError
+from .models import db, User, Quote, Order
+
+logger = logging.getLogger('api.tasks')
+
+STRIPE_PAYMENT_INTENTS_URL = 'https://api.stripe.com/v1/payment_intents'
+# Errores de Stripe que no se arreglan reintentando
+STRIPE_PERMANENT_STATUSES = (400, 401, 402, 403, 404)
+
+
+def send_email(to, subject, body):
+    config = current_app.config
+    if not config.get('MAIL_SERVER'):
+        logger.info('MAIL_SERVER not set, skipping email to %s: %s', to, subject)
+        return
+
+    message = EmailMessage()
+    message['From'] = config.get('MAIL_SENDER', 'no-reply@ecoluxury.example.com')
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    with smtplib.SMTP(config['MAIL_SERVER'], config.get('MAIL_PORT', 587), timeout=10) as smtp:
+        if config.get('MAIL_USE_TLS', True):
+            smtp.starttls()
+        if config.get('MAIL_USERNAME'):
+            smtp.login(config['MAIL_USERNAME'], config.get('MAIL_PASSWORD', ''))
+        smtp.send_message(message)
+
+
+@task('email.welcome', queue='email', max_concurrency=8)
+def welcome_email(user_id):
+    user = db.session.get(User, user_id)
+    if user is None:
+        return
+    send_email(user.email, 'Welcome to EcoLuxury Craft',
+               'Hi {},\n\nYour account is ready.\n'.format(user.first_name))
+
+
+@task('email.quote_received', queue='email', max_concurrency=8)
+def quote_received_email(quote_id):
+    quote = db.session.get(Quote, quote_id)
+    if quote is None:
+        return
+    send_email(quote.user.email, 'We received your quote request #{}'.format(quote.id),
+               'Hi {},\n\nYour quote for {} comes to {:.2f}. We will review it shortly.\n'.format(
+                   quote.user.first_name, quote.product.name, quote.total_price))
+
+
+@task('email.order_placed', queue='email', max_concurrency=8)
+def order_placed_email(order_id):
+    order = db.session.get(Order, order_id)
+    if order is None:
+        return
+    send_email(order.user.email, 'Order #{} placed'.format(order.id),
+               'Hi {},\n\nThank you for your order of {:.2f}.\n'.format(
+                   order.user.first_name, order.total_amount))
+
+
+@task('payments.create_intent', queue='payments', max_attempts=8, max_concurrency=4)
+def create_payment_intent(order_id):
+    """
+    Crea el PaymentIntent de Stripe del pedido. La Idempotency-Key por
+    pedido hace que los reintentos devuelvan el mismo intent.
+    """
+    order = db.session.get(Order, order_id)
+    if order is None or order.stripe_payment_intent_id:
+        return
+    secret = current_app.config.get('STRIPE_SECRET_KEY')
+    if not secret:
+        raise PermanentJobError('STRIPE_SECRET_KEY is not configured')
+
+    body = parse.urlencode({
+        'amount': int(round(order.total_amount * 100)),
+        'currency': current_app.config.get('STRIPE_CURRENCY', 'eur'),
+        'metadata[order_id]': order.id
+    }).encode('utf-8')
+    stripe_request = urlrequest.Request(
+        STRIPE_PAYMENT_INTENTS_URL, data=body, method='POST', headers={
+            'Authorization': 'Bearer ' + secret,
+            'Idempotency-Key': 'order-{}-payment-intent'.format(order.id)
+        })
+    try:
+        with urlrequest.urlopen(stripe_request, timeout=10) as response:
+            intent = json.load(response)
+    except error.HTTPError as e:
+        if e.code in STRIPE_PERMANENT_STATUSES:
+            raise PermanentJobError('Stripe returned {}: {}'.format(
+                e.code, e.read()[:500].decode('utf-8', 'replace')))
+        raise
+
+    db.session.execute(db.update(Order).where(
+        Order.id == order_id, Order.stripe_payment_intent_id.is_(None)
+    ).values(stripe_payment_intent_id=intent['id']))
@@ -2,36 +2,63 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import ProductCard from '../components/Shared/ProductCard.jsx';
 
+const PAGE_SIZE = 50;
+
+// GET /products devuelve páginas de PAGE_SIZE con next_cursor: los filtros
+// se aplican en el servidor y "Cargar más" pide la página siguiente
+const productsUrl = (category, type, cursor) => {
+  const params = new URLSearchParams({ category, type, limit: PAGE_SIZE });
+  if (cursor) params.set('cursor', cursor);
+  return `${import.meta.env.VITE_BACKEND_URL}/products?${params}`;
+};
+
 const ProductCatalog = () => {
   const [products, setProducts] = useState([]);
-  const [filteredProducts, setFilteredProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [categories, setCategories] = useState([]);
   const [productTypes, setProductTypes] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState('all');
   const [selectedType, setSelectedType] = useState('all');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
-    fetchProducts();
     fetchCategories();
   }, []);
 
   useEffect(() => {
-    filterProducts();
-  }, [selectedCategory, selectedType, products]);
+    // Al cambiar de filtro se ignora la respuesta de la petición anterior
+    let ignore = false;
+    fetchProducts(selectedCategory, selectedType).then(data => {
+      if (!ignore && data) {
+        setProducts(data.products);
+        setNextCursor(data.next_cursor);
+      }
+      if (!ignore) setLoading(false);
+    });
+    return () => { ignore = true; };
+  }, [selectedCategory, selectedType]);
 
-  const fetchProducts = async () => {
+  const fetchProducts = async (category, type, cursor = null) => {
     try {
-      const response = await fetch(`${import.meta.env.VITE_BACKEND_URL}/products`);
+      const response = await fetch(productsUrl(category, type, cursor));
       if (response.ok) {
-        const data = await response.json();
-        setProducts(data.products);
+        return await response.json();
       }
     } catch (error) {
       console.error('Error fetching products:', error);
-    } finally {
-      setLoading(false);
     }
+    return null;
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    const data = await fetchProducts(selectedCategory, selectedType, nextCursor);
+    if (data) {
+      setProducts(current => [...current, ...data.products]);
+      setNextCursor(data.next_cursor);
+    }
+    setLoadingMore(false);
   };
 
   const fetchCategories = async () => {
@@ -47,20 +74,6 @@ const ProductCatalog = () => {
     }
   };
 
-  const filterProducts = () => {
-    let filtered = products;
-
-    if (selectedCategory !== 'all') {
-      filtered = filtered.filter(p => p.category === selectedCategory);
-    }
-
-    if (selectedType !== 'all') {
-      filtered = filtered.filter(p => p.product_type === selectedType);
-    }
-
-    setFilteredProducts(filtered);
-  };
-
   if (loading) {
     return (
       <div className="catalog-loading">
@@ -115,12 +128,20 @@ const ProductCatalog = () => {
       </div>
 
       <div className="products-grid">
-        {filteredProducts.map(product => (
+        {products.map(product => (
           <ProductCard key={product.id} product={product} />
         ))}
       </div>
 
-      {filteredProducts.length === 0 && (
+      {nextCursor && (
+        <div className="catalog-load-more">
+          <button onClick={loadMore} disabled={loadingMore} className="reset-filters-btn">
+            {loadingMore ? 'Cargando...' : 'Cargar más productos'}
+          </button>
+        </div>
+      )}
+
+      {products.length === 0 && (
         <div className="no-products">
           <h3>No se encontraron productos</h3>
           <p>Intenta con otros filtros o categorías</p>
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Antes de importar la app: la configuración se lee del entorno al importar
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-with-at-least-32-bytes')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+from api.app import app as flask_app  # noqa: E402
+from api.cache import catalog_cache  # noqa: E402
+from api.identity import create_user_token, user_cache  # noqa: E402
+from api.ratelimit import login_limiter, _LocalStore  # noqa: E402
+from api.models import db, User, Product, Quote  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        catalog_cache.local.clear()
+        catalog_cache._version = None
+        user_cache.local.clear()
+        login_limiter._local = _LocalStore()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(role='customer', email=None):
+    user = User(email=email or '{}{}@example.com'.format(role, User.query.count()),
+                password='x', first_name='Ana', last_name='García', role=role)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_product(**fields):
+    values = {'name': 'Mesa de roble', 'description': 'Mesa artesanal',
+              'price': 1200.0, 'category': 'furniture', 'stock': 5}
+    values.update(fields)
+    product = Product(**values)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def make_quotes(user, product, count):
+    db.session.add_all([Quote(user_id=user.id, product_id=product.id,
+                              total_price=100.0 + i) for i in range(count)])
+    db.session.commit()
+
+
+def auth_headers(user):
+    return {'Authorization': 'Bearer ' + create_user_token(user)}
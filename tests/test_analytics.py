@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from api.models import db, Analytics, Order, OrderItem, Quote
+from api.rollups import backfill_orders_by_category, rollup_analytics
+from conftest import auth_headers, make_product, make_user
+
+
+def add_quote(user, product, days_ago, status='pending', total_price=100.0):
+    db.session.add(Quote(user_id=user.id, product_id=product.id, status=status,
+                         total_price=total_price,
+                         created_at=datetime.utcnow() - timedelta(days=days_ago)))
+    db.session.commit()
+
+
+def test_overview_sums_all_days_and_popular_products(app, client):
+    business = make_user('business')
+    customer = make_user()
+    old = make_product(name='Silla antigua')
+    recent = make_product(name='Mesa nueva')
+    for _ in range(3):
+        add_quote(customer, old, 200, status='approved')
+    add_quote(customer, recent, 5)
+    add_quote(customer, recent, 0)
+    rollup_analytics()
+
+    response = client.get('/analytics/overview', headers=auth_headers(business))
+    assert response.status_code == 200
+    overview = response.get_json()['overview']
+    assert overview['total_quotes'] == 5
+    assert overview['pending_quotes'] == 2
+    assert overview['total_sales'] == 300.0
+    assert overview['popular_products_days'] is None
+    assert overview['popular_products'] == [{'name': 'Silla antigua', 'quotes': 3},
+                                            {'name': 'Mesa nueva', 'quotes': 2}]
+
+    response = client.get('/analytics/overview?popular_days=90', headers=auth_headers(business))
+    overview = response.get_json()['overview']
+    assert overview['total_quotes'] == 5
+    assert overview['popular_products_days'] == 90
+    assert overview['popular_products'] == [{'name': 'Mesa nueva', 'quotes': 2}]
+
+
+def test_overview_needs_a_rollup_for_past_days(app, client):
+    business = make_user('business')
+    customer = make_user()
+    product = make_product()
+    add_quote(customer, product, 0)
+    response = client.get('/analytics/overview', headers=auth_headers(business))
+    assert response.status_code == 200
+    assert response.get_json()['overview']['total_quotes'] == 1
+
+    add_quote(customer, product, 3)
+    response = client.get('/analytics/overview', headers=auth_headers(business))
+    assert response.status_code == 503
+
+    rollup_analytics()
+    response = client.get('/analytics/overview', headers=auth_headers(business))
+    assert response.get_json()['overview']['total_quotes'] == 2
+
+
+def test_timeseries_rejects_ranges_over_the_limit(app, client):
+    headers = auth_headers(make_user('business'))
+    response = client.get('/analytics/timeseries?from=2024-01-01&to=2025-12-31',
+                          headers=headers)
+    assert response.status_code == 400
+    assert '366 days' in response.get_json()['error']
+
+    response = client.get('/analytics/timeseries?from=2025-01-01&to=2025-12-31&bucket=week',
+                          headers=headers)
+    assert response.status_code == 200
+
+
+def test_backfill_fills_only_missing_category_breakdowns(app):
+    customer = make_user()
+    product = make_product(category='lighting')
+    order = Order(user_id=customer.id, total_amount=50.0, status='pending',
+                  created_at=datetime.utcnow() - timedelta(days=3))
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, price=50.0))
+    db.session.commit()
+    rollup_analytics()
+
+    # Como las filas que ya existían al añadir la columna
+    db.session.execute(db.update(Analytics).where(Analytics.total_orders == 1)
+                       .values(orders_by_category=db.null()))
+    db.session.commit()
+
+    assert backfill_orders_by_category() == 1
+    row = Analytics.query.filter(Analytics.total_orders == 1).one()
+    assert row.orders_by_category == {'lighting': 1}
+    assert backfill_orders_by_category() == 0
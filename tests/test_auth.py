@@ -0,0 +1,75 @@
+from flask_jwt_extended import decode_token
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from api.identity import user_cache
+from api.models import db, User
+from api.ratelimit import login_limiter
+from conftest import make_user, auth_headers
+
+
+def register(client, email, role='customer'):
+    return client.post('/api/register', json={
+        'email': email, 'password': 'secreto123', 'first_name': 'Ana',
+        'last_name': 'García', 'role': role})
+
+
+def login(client, email, **kwargs):
+    return client.post('/api/login', json={'email': email, 'password': 'secreto123'}, **kwargs)
+
+
+def test_login_token_carries_role_claims(app, client):
+    assert register(client, 'empresa@example.com', role='business').status_code == 201
+    response = login(client, 'empresa@example.com')
+    assert response.status_code == 200
+    claims = decode_token(response.get_json()['access_token'])
+    assert claims['role'] == 'business'
+    assert claims['active'] is True
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(app, client):
+    assert app.config['TRUSTED_PROXY_COUNT'] == 0
+    for i in range(login_limiter.ip_capacity):
+        response = login(client, 'nadie{}@example.com'.format(i),
+                         headers={'X-Forwarded-For': '10.0.0.{}'.format(i)})
+        assert response.status_code == 401
+    response = login(client, 'otro@example.com', headers={'X-Forwarded-For': '10.0.1.1'})
+    assert response.status_code == 429
+
+
+def test_trusted_proxy_hop_sets_the_client_address(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'wsgi_app', ProxyFix(app.wsgi_app, x_for=1, x_proto=1))
+    for i in range(login_limiter.ip_capacity):
+        assert login(client, 'nadie{}@example.com'.format(i),
+                     headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 401
+    assert login(client, 'otro@example.com',
+                 headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 429
+    # Otro cliente detrás del mismo proxy tiene su propio cupo
+    assert login(client, 'otro@example.com',
+                 headers={'X-Forwarded-For': '203.0.113.8'}).status_code == 401
+
+
+def test_revoked_token_is_rejected_by_other_workers(app, client):
+    user = make_user('business')
+    headers = auth_headers(user)
+    assert client.get('/system/jobs', headers=headers).status_code == 200
+
+    # Otro worker da de baja la cuenta: aquí solo caduca la caché local
+    assert client.delete('/customer/delete-account', headers=headers).status_code == 200
+    user_cache.local.clear()
+    assert client.get('/system/jobs', headers=headers).status_code == 403
+
+    # Reactivarla no resucita el token anterior; uno nuevo sí vale
+    db.session.execute(db.update(User).values(is_active=True))
+    db.session.commit()
+    user_cache.local.clear()
+    assert client.get('/system/jobs', headers=headers).status_code == 403
+    assert client.get('/system/jobs', headers=auth_headers(db.session.get(User, user.id))).status_code == 200
+
+
+def test_hash_stats_needs_a_business_token(app, client):
+    assert client.get('/api/auth/hash-stats').status_code == 401
+    assert client.get('/api/auth/hash-stats',
+                      headers=auth_headers(make_user())).status_code == 403
+    response = client.get('/api/auth/hash-stats', headers=auth_headers(make_user('business')))
+    assert response.status_code == 200
+    assert 'password_hashing' in response.get_json()
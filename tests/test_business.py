@@ -0,0 +1,26 @@
+import pytest
+
+from conftest import auth_headers, make_product, make_quotes, make_user
+
+
+@pytest.mark.parametrize('query', ['product_id=abc', 'customer_id=1x', 'product_id=0'])
+def test_quote_filters_reject_invalid_ids(app, client, query):
+    headers = auth_headers(make_user('business'))
+    response = client.get('/business/quotes?' + query, headers=headers)
+    assert response.status_code == 400
+    assert 'must be' in response.get_json()['error']
+
+
+def test_quote_filters_by_product_and_customer(app, client):
+    business = make_user('business')
+    customer = make_user()
+    product = make_product()
+    other = make_product(name='Lámpara')
+    make_quotes(customer, product, 2)
+    make_quotes(make_user(), other, 3)
+
+    headers = auth_headers(business)
+    response = client.get('/business/quotes?product_id={}'.format(product.id), headers=headers)
+    assert response.get_json()['pagination']['total'] == 2
+    response = client.get('/business/quotes?customer_id={}'.format(customer.id), headers=headers)
+    assert response.get_json()['pagination']['total'] == 2
@@ -0,0 +1,37 @@
+from api.cache import catalog_cache
+from api.models import db, CacheVersion
+from conftest import make_product
+
+
+def test_version_is_shared_through_the_database(app, client):
+    catalog_cache.bump_version()
+    product = make_product(stock=5)
+    assert client.get('/products/{}'.format(product.id)).get_json()['product']['stock'] == 5
+
+    # Otro worker cambia el producto y sube la versión en la base de datos
+    db.session.execute(db.update(CacheVersion).values(version=CacheVersion.version + 1))
+    product.stock = 2
+    db.session.commit()
+    assert client.get('/products/{}'.format(product.id)).get_json()['product']['stock'] == 5
+
+    catalog_cache._version_read_at = 0  # vence el TTL de la versión
+    assert client.get('/products/{}'.format(product.id)).get_json()['product']['stock'] == 2
+
+
+def test_bump_version_creates_and_increments_the_row(app):
+    assert catalog_cache.version == 0
+    assert catalog_cache.bump_version() == 1
+    assert catalog_cache.bump_version() == 2
+    assert db.session.get(CacheVersion, 'catalog').version == 2
+
+
+def test_write_during_load_does_not_cache_under_the_new_version(app):
+    catalog_cache.bump_version()
+
+    def loader():
+        # Otro worker escribe mientras se carga y esta versión caduca
+        catalog_cache.bump_version()
+        return {'stock': 5}
+
+    assert catalog_cache.get_or_set('product', (1,), loader) == {'stock': 5}
+    assert catalog_cache.get_or_set('product', (1,), lambda: {'stock': 2}) == {'stock': 2}
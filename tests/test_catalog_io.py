@@ -0,0 +1,53 @@
+import io
+import json
+
+from api.catalog_io import import_products
+from api.models import db, Product, ProductAttribute
+from conftest import auth_headers, make_user
+
+
+def ndjson(*rows):
+    return io.StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+def product_row(name, **extra):
+    return dict(name=name, description='Hecho a mano', price=10, category='decor', **extra)
+
+
+def test_failed_chunk_is_rolled_back_and_reported(app):
+    stream = ndjson(
+        product_row('A'), product_row('B'),
+        product_row('C', id=500), product_row('D', id=500),  # el segundo choca en la BD
+        product_row('E'))
+    report = import_products(stream, 'ndjson', chunk_size=2)
+
+    assert report['inserted'] == 3
+    assert report['failed'] == 2
+    assert [error['line'] for error in report['errors']] == [3, 4]
+    assert report['errors'][0]['error'].startswith('Chunk rolled back')
+    assert sorted(name for (name,) in Product.query.with_entities(Product.name)) == ['A', 'B', 'E']
+
+
+def test_import_route_returns_207_on_partial_success(app, client):
+    body = ''.join(json.dumps(row) + '\n' for row in (
+        product_row('A', id=7), product_row('B', id=7)))
+    response = client.post('/products/import', data=body,
+                           content_type='application/x-ndjson',
+                           headers=auth_headers(make_user('business')))
+    assert response.status_code == 207
+    assert response.get_json()['import']['failed'] == 2
+
+
+def test_import_syncs_attributes_of_inserted_rows_only(app):
+    existing = Product(name='Ya estaba', description='x', price=1, category='decor',
+                       specifications={'seats': 2})
+    db.session.add(existing)
+    db.session.commit()
+
+    report = import_products(ndjson(
+        product_row('Nueva', specifications={'seats': 8}),
+        product_row('Con id', id=40, specifications={'seats': 4})), 'ndjson')
+    assert report['inserted'] == 2
+
+    synced = {product_id for (product_id,) in db.session.query(ProductAttribute.product_id)}
+    assert synced == {p.id for p in Product.query.filter(Product.name != 'Ya estaba')}
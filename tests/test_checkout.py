@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from api.checkout import release_expired_reservations
+from api.models import db, Order
+from conftest import auth_headers, make_product, make_user
+
+
+def product_stock(client, product_id):
+    response = client.get('/products/{}'.format(product_id))
+    assert response.status_code == 200
+    return response.get_json()['product']['stock']
+
+
+def reserve(client, user, product_id, quantity):
+    response = client.post('/orders', headers=auth_headers(user), json={
+        'items': [{'product_id': product_id, 'quantity': quantity}]})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['order']['id']
+
+
+def test_reservation_refreshes_cached_product(app, client):
+    customer = make_user()
+    product_id = make_product(stock=5).id
+    assert product_stock(client, product_id) == 5
+
+    order_id = reserve(client, customer, product_id, 2)
+    assert product_stock(client, product_id) == 3
+
+    response = client.post('/orders/{}/cancel'.format(order_id),
+                           headers=auth_headers(customer))
+    assert response.status_code == 200
+    assert product_stock(client, product_id) == 5
+
+
+def test_expired_reservation_refreshes_cached_product(app, client):
+    customer = make_user()
+    product_id = make_product(stock=5).id
+    order_id = reserve(client, customer, product_id, 4)
+    assert product_stock(client, product_id) == 1
+
+    db.session.get(Order, order_id).reserved_until = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+    assert release_expired_reservations() == 1
+    assert product_stock(client, product_id) == 5
@@ -0,0 +1,38 @@
+import gzip
+
+from conftest import make_product
+
+
+def test_compressed_variant_has_its_own_etag(app, client):
+    product = make_product(description='Mesa de roble macizo. ' * 100)
+    url = '/products/{}'.format(product.id)
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    etag = plain.headers['ETag']
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['ETag'] == etag[:-1] + '-gzip"'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.data) == plain.data
+
+    # La ETag de la variante gzip valida la caché de quien acepta gzip...
+    gzip_etag = compressed.headers['ETag']
+    response = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzip_etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == gzip_etag
+
+    # ...pero no la de un cliente que recibiría la representación sin comprimir
+    response = client.get(url, headers={'If-None-Match': gzip_etag})
+    assert response.status_code == 200
+    assert response.data == plain.data
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_small_responses_are_not_compressed(app, client):
+    product = make_product()
+    response = client.get('/products/{}'.format(product.id), headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,18 @@
+from api.facets import sync_product_ids
+from api.models import db
+from conftest import make_product
+
+
+def names(response):
+    assert response.status_code == 200, response.get_json()
+    return sorted(p['name'] for p in response.get_json()['products'])
+
+
+def test_ne_excludes_products_having_the_value(app, client):
+    ids = [make_product(name=name, features={'color': colors}).id for name, colors in (
+        ('Roja y azul', ['red', 'blue']), ('Azul', ['blue']), ('Verde', ['green']))]
+    sync_product_ids(ids)
+    db.session.commit()
+
+    assert names(client.get('/products?feature.color[ne]=red')) == ['Azul', 'Verde']
+    assert names(client.get('/products?feature.color=blue')) == ['Azul', 'Roja y azul']
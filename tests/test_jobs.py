@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api import jobs
+from api.jobs import (task, enqueue, claim_jobs, run_worker, heartbeat_jobs,
+                      requeue_stale_jobs, PermanentJobError, PENDING, RUNNING, DONE, FAILED)
+from api.models import db, Job
+
+calls = []
+
+
+@task('test.record', queue='test')
+def record(value):
+    calls.append(value)
+
+
+@task('test.flaky', queue='test', max_attempts=2)
+def flaky():
+    raise RuntimeError('API caída')
+
+
+@task('test.broken', queue='test')
+def broken():
+    raise PermanentJobError('payload inválido')
+
+
+@task('test.limited', queue='test', max_concurrency=1)
+def limited():
+    pass
+
+
+@pytest.fixture
+def worker(app, monkeypatch):
+    calls.clear()
+    # run_worker instala manejadores de SIGTERM/SIGINT: no en el proceso de pytest
+    monkeypatch.setattr(jobs.signal, 'signal', lambda *args: None)
+
+    def burst():
+        processed = run_worker(app, queues=('test',), concurrency=1, poll_interval=0.01,
+                               burst=True, log=lambda *args: None)
+        db.session.expire_all()
+        return processed
+    return burst
+
+
+def add_jobs(*names, **payload):
+    created = [enqueue(name, **payload) for name in names]
+    db.session.commit()
+    return created
+
+
+def test_burst_worker_runs_pending_jobs(worker):
+    job, = add_jobs('test.record', value=7)
+    assert worker() == 1
+    assert calls == [7]
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts, job.locked_by) == (DONE, 1, None)
+    assert job.finished_at is not None
+
+
+def test_failed_job_backs_off_then_fails_at_max_attempts(worker):
+    job, = add_jobs('test.flaky')
+    before = datetime.utcnow()
+    assert worker() == 1
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == (PENDING, 1)
+    assert job.run_at >= before + timedelta(seconds=jobs.BACKOFF_BASE_SECONDS * 0.5)
+    assert 'API caída' in job.last_error
+
+    # Hasta run_at no se vuelve a reclamar
+    assert worker() == 0
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    assert worker() == 1
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == (FAILED, 2)
+
+
+def test_permanent_errors_are_not_retried(worker):
+    job, = add_jobs('test.broken')
+    assert worker() == 1
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == (FAILED, 1)
+
+
+def test_max_concurrency_spreads_limited_jobs(app):
+    first, second = add_jobs('test.limited', 'test.limited')
+    assert claim_jobs('worker-1', ('test',), 5) == [first.id]
+    assert claim_jobs('worker-2', ('test',), 5) == []
+
+    db.session.execute(db.update(Job).where(Job.id == first.id).values(status=DONE))
+    db.session.commit()
+    assert claim_jobs('worker-2', ('test',), 5) == [second.id]
+
+
+def test_heartbeat_keeps_slow_jobs_from_being_requeued(app):
+    slow, dead = add_jobs('test.record', 'test.record', value=1)
+    assert sorted(claim_jobs('worker-1', ('test',), 2)) == sorted([slow.id, dead.id])
+    long_ago = datetime.utcnow() - timedelta(seconds=jobs.LOCK_TIMEOUT_SECONDS + 1)
+    db.session.execute(db.update(Job).values(locked_at=long_ago))
+    db.session.commit()
+
+    # Solo renueva los trabajos del propio worker
+    assert heartbeat_jobs('worker-2', [slow.id]) == 0
+    assert heartbeat_jobs('worker-1', [slow.id]) == 1
+    assert requeue_stale_jobs() == 1
+    db.session.expire_all()
+    assert db.session.get(Job, slow.id).status == RUNNING
+    assert db.session.get(Job, dead.id).status == PENDING
@@ -0,0 +1,37 @@
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from api.jsonprovider import OrjsonProvider
+from api.cache import catalog_cache
+from conftest import make_user, make_product, auth_headers
+
+
+def _providers(app):
+    for provider in (DefaultJSONProvider(app), OrjsonProvider(app)):
+        provider.sort_keys = app.json.sort_keys
+        yield provider
+
+
+def test_providers_write_the_same_bodies(app, client, monkeypatch):
+    user = make_user(email='josé@example.com')
+    product = make_product(name='Sofá 🌿 Ñandú', price=1999.99,
+                           features={'color': {'verde': {'additional_cost': 0}}},
+                           specifications={'origin': 'ES', 'seats': 3, 'eco': True})
+    paths = [('/products/{}'.format(product.id), {}),
+             ('/customer/profile', auth_headers(user))]
+
+    bodies = []
+    for provider in _providers(app):
+        monkeypatch.setattr(app, 'json', provider)
+        catalog_cache.local.clear()
+        bodies.append([client.get(path, headers=headers).data for path, headers in paths])
+    assert bodies[0] == bodies[1]
+    assert b'Sof\\u00e1 \\ud83c\\udf3f' in bodies[1][0]
+
+
+def test_orjson_dumps_honours_stdlib_arguments(app):
+    payload = {'b': 'ñ', 'a': [1, 2.5, None], 'at': datetime(2026, 1, 2, 3, 4, 5)}
+    stdlib, fast = _providers(app)
+    for kwargs in ({}, {'separators': (',', ':')}, {'indent': 2}, {'indent': 4},
+                   {'ensure_ascii': False, 'separators': (',', ':')},
+                   {'sort_keys': False, 'separators': (',', ':')}):
+        assert fast.dumps(payload, **kwargs) == stdlib.dumps(payload, **kwargs)
@@ -0,0 +1,39 @@
+import threading
+import time
+
+import pytest
+
+from api.passwords import PasswordHasher, HasherBusy
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher()
+    hasher.workers = 1
+    hasher.max_pending = 1
+    hasher.timeout = 0.2
+    hasher._slots = threading.BoundedSemaphore(1)
+    try:
+        with pytest.raises(HasherBusy, match='timed out'):
+            hasher._run('hash', _slow, 1.0)
+        # El proceso hijo sigue ocupado: no se acepta otra petición
+        with pytest.raises(HasherBusy, match='queue is full'):
+            hasher._run('hash', _slow, 0)
+
+        time.sleep(1.2)
+        assert hasher._run('hash', _slow, 0) == 0
+    finally:
+        hasher._executor().shutdown(wait=True)
+
+
+def test_hash_and_verify_inline():
+    hasher = PasswordHasher()
+    hasher.rounds = 4
+    hasher.workers = 0
+    hashed = hasher.hash_password('secreto')
+    assert hasher.verify_password('secreto', hashed)
+    assert not hasher.verify_password('otro', hashed)
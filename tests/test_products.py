@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from api.cache import catalog_cache
+from conftest import make_product
+
+
+def test_cursor_walks_every_product_once_in_order(app, client):
+    start = datetime(2026, 1, 1)
+    ids = []
+    for n in range(5):
+        # Dos productos con el mismo created_at: desempata el id
+        ids.append(make_product(name='Producto {}'.format(n),
+                                created_at=start + timedelta(days=min(n, 3))).id)
+    expected = [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/products?limit=2' + ('&cursor=' + cursor if cursor else '')
+        data = client.get(url).get_json()
+        assert len(data['products']) <= 2
+        seen.extend(p['id'] for p in data['products'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_invalid_cursor_and_limit_return_400(app, client):
+    make_product()
+    assert client.get('/products?cursor=basura').status_code == 400
+    assert client.get('/products?limit=0').status_code == 400
+    assert client.get('/products?limit=abc').status_code == 400
+
+
+def test_fields_selects_and_validates_columns(app, client):
+    make_product(name='Mesa', price=10.0)
+    data = client.get('/products?fields=price,name,price').get_json()
+    assert data['products'] == [{'id': data['products'][0]['id'], 'name': 'Mesa', 'price': 10.0}]
+
+    response = client.get('/products?fields=name,password')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown fields: password'
+
+
+def test_catalog_answers_304_until_a_product_changes(app, client):
+    product = make_product()
+    response = client.get('/products')
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    assert client.get('/products', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/products', headers={
+        'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+    # Cada combinación de parámetros es otra representación
+    assert client.get('/products?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+    make_product(name='Otro producto')
+    catalog_cache.bump_version()
+    assert client.get('/products', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_product_detail_answers_304_with_its_etag(app, client):
+    product = make_product()
+    url = '/products/{}'.format(product.id)
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert client.get(url, headers={'If-None-Match': '"otra"'}).status_code == 200
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from api.models import db, User
+from conftest import auth_headers, make_product, make_quotes, make_user
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def queries_for(client, url, headers):
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', ['/business/products', '/business/quotes'])
+def test_query_count_does_not_grow_with_rows(app, client, url):
+    business = make_user('business')
+    customer = make_user('customer')
+    headers = auth_headers(business)
+
+    product = make_product()
+    make_quotes(customer, product, 1)
+    db.session.remove()
+    queries_for(client, url, headers)  # carga al usuario en user_cache
+    one_row = queries_for(client, url, headers)
+
+    for i in range(9):
+        make_quotes(make_user('customer'), make_product(name='Producto {}'.format(i)), 3)
+    db.session.remove()
+    many_rows = queries_for(client, url, headers)
+
+    assert one_row == many_rows
+
+
+def test_customer_quote_list_query_count_does_not_grow_with_rows(app, client):
+    customer = make_user('customer')
+    customer_id = customer.id
+    headers = auth_headers(customer)
+    make_quotes(customer, make_product(), 1)
+    db.session.remove()
+    queries_for(client, '/quotes', headers)
+    one_row = queries_for(client, '/quotes', headers)
+
+    customer = db.session.get(User, customer_id)
+    for i in range(9):
+        make_quotes(customer, make_product(name='Producto {}'.format(i)), 3)
+    db.session.remove()
+    response = client.get('/quotes', headers=headers)
+    assert len(response.get_json()['quotes']) == 28
+    assert queries_for(client, '/quotes', headers) == one_row
@@ -0,0 +1,13 @@
+from api.query_plans import check_query_plans, hot_queries
+
+
+def test_hot_queries_run(app):
+    for name, query in hot_queries().items():
+        query.all()
+
+
+def test_hot_queries_use_indexes(app):
+    results = check_query_plans()
+    assert 'products.list' in results
+    full_scans = {name: plan for name, (plan, full_scan) in results.items() if full_scan}
+    assert full_scans == {}
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from api.models import db, Quote
+from conftest import auth_headers, make_product, make_quotes, make_user
+
+
+def test_create_quote_rejects_invalid_product_ids(app, client):
+    headers = auth_headers(make_user())
+    for body in ({}, {'product_id': 'abc'}, {'product_id': 0}, {'product_id': None}):
+        response = client.post('/quotes', json=body, headers=headers)
+        assert response.status_code == 400, body
+        assert 'product_id' in response.get_json()['error']
+
+    assert client.post('/quotes', json={'product_id': 999}, headers=headers).status_code == 404
+    product = make_product()
+    response = client.post('/quotes', json={'product_id': str(product.id)}, headers=headers)
+    assert response.status_code == 201
+
+
+def test_quote_detail_answers_304_until_the_quote_changes(app, client):
+    customer = make_user()
+    headers = auth_headers(customer)
+    make_quotes(customer, make_product(), 1)
+    quote = Quote.query.one()
+    url = '/quotes/{}'.format(quote.id)
+
+    etag = client.get(url, headers=headers).headers['ETag']
+    assert client.get(url, headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+    # Otro cliente no puede validar (ni ver) la cotización
+    other = auth_headers(make_user(email='otro@example.com'))
+    assert client.get(url, headers=dict(other, **{'If-None-Match': etag})).status_code == 404
+
+    quote = db.session.get(Quote, quote.id)
+    quote.status = 'approved'
+    quote.updated_at = quote.updated_at + timedelta(seconds=1)
+    db.session.commit()
+    response = client.get(url, headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.get_json()['quote']['status'] == 'approved'
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+from flask_jwt_extended import verify_jwt_in_request
+
+from api.replicas import replica_router, STICKY_HEADER
+from conftest import auth_headers, make_product, make_user
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    # Basta con que haya réplicas configuradas; aquí no se llega a conectar
+    monkeypatch.setattr(replica_router, 'engines', [object()])
+    monkeypatch.setattr(replica_router, '_sticky_identities', {})
+    return replica_router
+
+
+def test_write_returns_sticky_header_and_remembers_identity(app, client, replicas):
+    customer = make_user()
+    product = make_product()
+    response = client.post('/orders', headers=auth_headers(customer), json={
+        'items': [{'product_id': product.id, 'quantity': 1}]})
+    assert response.status_code == 201
+    until = float(response.headers[STICKY_HEADER])
+    assert until > time.time()
+    assert STICKY_HEADER in response.headers['Access-Control-Expose-Headers']
+    assert replicas._sticky_identities[str(customer.id)] == until
+
+
+def test_sticky_header_keeps_reads_on_primary(app, replicas):
+    with app.test_request_context('/products'):
+        assert replicas.wants_replica()
+    headers = {STICKY_HEADER: str(time.time() + 3)}
+    with app.test_request_context('/products', headers=headers):
+        assert not replicas.wants_replica()
+    with app.test_request_context('/products', headers={STICKY_HEADER: 'x'}):
+        assert replicas.wants_replica()
+
+
+def test_recent_writer_identity_reads_from_primary(app, replicas):
+    writer, other = make_user(), make_user()
+    replicas._remember_identity(writer.id, time.time() + 5)
+
+    with app.test_request_context('/quotes', headers=auth_headers(writer)):
+        verify_jwt_in_request()
+        assert not replicas.wants_replica()
+    with app.test_request_context('/quotes', headers=auth_headers(other)):
+        verify_jwt_in_request()
+        assert replicas.wants_replica()
@@ -0,0 +1,14 @@
+from api.search import create_search_index
+from conftest import make_product
+
+
+def test_highlights_escape_product_text(app, client):
+    create_search_index()
+    make_product(name='<img src=x onerror=alert(1)> Mesa',
+                 description='Mesa & silla <b>de roble</b>')
+
+    response = client.get('/products/search?q=mesa')
+    assert response.status_code == 200
+    highlight = response.get_json()['results'][0]['highlight']
+    assert highlight['name'] == '&lt;img src=x onerror=alert(1)&gt; <mark>Mesa</mark>'
+    assert highlight['description'] == '<mark>Mesa</mark> &amp; silla &lt;b&gt;de roble&lt;/b&gt;'
@@ -0,0 +1,41 @@
+import pytest
+from api.models import db, User, Product, Quote, Order
+from api.seed import generate_dataset, SEED_EPOCH
+
+
+def _generate():
+    generate_dataset(users=5, products=4, quotes=20, orders=6, days=30,
+                     seed=7, batch_size=8, log=lambda message: None)
+
+
+def _snapshot():
+    # La contraseña lleva sal aleatoria de bcrypt: se deja fuera
+    return {
+        'users': db.session.query(User.email, User.last_name, User.role,
+                                  User.created_at).order_by(User.id).all(),
+        'products': db.session.query(Product.name, Product.price, Product.features,
+                                     Product.created_at, Product.updated_at
+                                     ).order_by(Product.id).all(),
+        'quotes': db.session.query(Quote.user_id, Quote.product_id, Quote.total_price,
+                                   Quote.status, Quote.created_at).order_by(Quote.id).all(),
+        'orders': db.session.query(Order.user_id, Order.total_amount, Order.status,
+                                   Order.created_at).order_by(Order.id).all()
+    }
+
+
+def test_same_seed_generates_same_rows(app):
+    _generate()
+    first = _snapshot()
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    _generate()
+    assert _snapshot() == first
+    assert all(created_at < SEED_EPOCH for *_, created_at in first['quotes'])
+
+
+def test_same_seed_cannot_be_loaded_twice(app):
+    _generate()
+    with pytest.raises(ValueError):
+        _generate()
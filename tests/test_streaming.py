@@ -0,0 +1,55 @@
+import json
+
+from conftest import auth_headers, make_product, make_quotes, make_user
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+
+
+def ndjson_lines(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+def test_products_stream_every_row_with_the_requested_fields(app, client):
+    for n in range(60):
+        make_product(name='Producto {}'.format(n), description='x' * 50)
+
+    # Sin límite por defecto: las 60 filas, no la primera página de 50
+    rows = ndjson_lines(client.get('/products?fields=name', headers=NDJSON))
+    assert len(rows) == 60
+    assert set(rows[0]) == {'id', 'name'}
+
+    rows = ndjson_lines(client.get('/products?limit=5', headers=NDJSON))
+    assert len(rows) == 5
+
+
+def test_streams_are_not_compressed_or_cached(app, client):
+    for n in range(60):
+        make_product(name='Producto {}'.format(n), description='x' * 50)
+    response = client.get('/products', headers=dict(NDJSON, **{'Accept-Encoding': 'gzip'}))
+    assert 'Content-Encoding' not in response.headers
+    assert 'ETag' not in response.headers
+    assert len(ndjson_lines(response)) == 60
+
+
+def test_json_is_still_the_default(app, client):
+    make_product()
+    response = client.get('/products', headers={'Accept': 'application/json, */*'})
+    assert response.mimetype == 'application/json'
+
+
+def test_quote_streams_are_scoped_to_the_caller(app, client):
+    customer = make_user()
+    other = make_user(email='otro@example.com')
+    product = make_product()
+    make_quotes(customer, product, 3)
+    make_quotes(other, product, 2)
+
+    rows = ndjson_lines(client.get('/quotes', headers=dict(NDJSON, **auth_headers(customer))))
+    assert [row['total_price'] for row in rows] == [100.0, 101.0, 102.0]
+    assert rows[0]['product_name'] == product.name
+
+    business = auth_headers(make_user('business', email='empresa@example.com'))
+    rows = ndjson_lines(client.get('/business/quotes', headers=dict(NDJSON, **business)))
+    assert len(rows) == 5